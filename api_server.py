@@ -0,0 +1,261 @@
+# api_server.py - 진단/보고서 HTTP API (ASGI)
+# 형식: Python (.py)
+# 역할: Streamlit UI 없이 파트너 포털 등에서 진단과 보고서를 요청할 수 있는 헤드리스 API
+#
+# 실행 방법:
+#   uvicorn api_server:app --host 0.0.0.0 --port 8000
+#
+# Streamlit 앱과 같은 모델 레지스트리, 작업 큐, 캐시를 공유합니다.
+# 요청 처리는 asyncio 이벤트 루프에서 이루어지고, 블로킹 작업(보고서 생성, 파일 읽기)은
+# 스레드로 넘기므로 하나의 프로세스가 여러 요청과 keep-alive 연결을 동시에 처리합니다.
+#
+# 엔드포인트:
+#   GET  /health                  상태 확인
+#   POST /score                   {"answers": {...}} -> calculate_score 결과
+#   POST /improvements            {"diagnosis_result": {...}} 또는 {"answers": {...}} -> suggest_improvements 결과
+#   POST /reports                 {"answers": {...}} -> 보고서 작업 등록 (202, job_id)
+#                                 ?profile=1 또는 본문 "profile": true -> 이 진단만 CPU 프로파일 (utils/cpu_profile.py)
+#   GET  /reports/{job_id}        작업 상태/보고서 조회
+#   GET  /reports/{job_id}/pdf    PDF 다운로드
+#   GET  /reports/{job_id}/trace  단계별 실행 시간 JSON 트레이스
+#   GET  /reports/{job_id}/usage  보고서 생성에 사용된 LLM 토큰/비용 (섹션별)
+#   GET  /usage                   LLM 토큰/비용 집계 (일자별, 섹션별)
+#   GET  /metrics                 Prometheus 형식 계측 지표
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from utils.questions import calculate_score, suggest_improvements, diagnosis_questions
+from utils.report_jobs import get_job_queue
+from utils.metrics import span, export_prometheus, get_trace
+from utils.usage import get_usage_store
+from utils.report_library import get_report_library, library_model_name
+from utils.model_registry import get_rag_model
+from utils.cpu_profile import is_requested, profile_request, profile_block
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    """HTTP 오류 응답용 예외"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _diagnose(answers: Dict[str, str]) -> Dict[str, Any]:
+    """calculate_diagnosis와 같은 방식으로 점수와 개선 제안을 계산합니다."""
+    with span("calculate_score"):
+        diagnosis_result = calculate_score(answers)
+    with span("suggest_improvements"):
+        diagnosis_result["improvements"] = suggest_improvements(diagnosis_result)
+    return diagnosis_result
+
+
+# 문항 ID -> 선택 가능한 응답 값
+_OPTION_VALUES = {
+    question["id"]: {option["value"] for option in question["options"]}
+    for questions in diagnosis_questions.values() for question in questions
+}
+
+
+def _require_answers(body: Dict[str, Any]) -> Dict[str, str]:
+    answers = body.get("answers")
+    if not isinstance(answers, dict):
+        raise HTTPError(400, "answers 필드가 필요합니다.")
+    for question_id, value in answers.items():
+        if question_id not in _OPTION_VALUES:
+            raise HTTPError(400, f"알 수 없는 문항입니다: {question_id}")
+        if not isinstance(value, str) or value not in _OPTION_VALUES[question_id]:
+            raise HTTPError(400, f"{question_id}의 응답은 {', '.join(sorted(_OPTION_VALUES[question_id]))} 중 하나여야 합니다.")
+    return answers
+
+
+def _validate_diagnosis_result(diagnosis_result: Dict[str, Any]):
+    """suggest_improvements가 사용하는 level/stage_scores 형식을 확인합니다."""
+    level = diagnosis_result.get("level")
+    if not isinstance(level, dict) or not isinstance(level.get("name"), str):
+        raise HTTPError(400, "diagnosis_result.level은 name(문자열)을 가진 객체여야 합니다.")
+    stage_scores = diagnosis_result.get("stage_scores")
+    if not isinstance(stage_scores, dict) or not stage_scores:
+        raise HTTPError(400, "diagnosis_result.stage_scores는 영역별 점수 객체여야 합니다.")
+    for stage, info in stage_scores.items():
+        if stage not in diagnosis_questions:
+            raise HTTPError(400, f"알 수 없는 영역입니다: {stage}")
+        score = info.get("avg_score") if isinstance(info, dict) else None
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 5:
+            raise HTTPError(400, f"stage_scores[{stage}].avg_score는 0~5 사이의 숫자여야 합니다.")
+
+
+async def handle_score(body: Dict[str, Any]) -> Tuple[int, Any]:
+    return 200, calculate_score(_require_answers(body))
+
+
+async def handle_improvements(body: Dict[str, Any]) -> Tuple[int, Any]:
+    diagnosis_result = body.get("diagnosis_result")
+    if not isinstance(diagnosis_result, dict):
+        diagnosis_result = calculate_score(_require_answers(body))
+    _validate_diagnosis_result(diagnosis_result)
+    return 200, suggest_improvements(diagnosis_result)
+
+
+async def handle_create_report(body: Dict[str, Any]) -> Tuple[int, Any]:
+    answers = _require_answers(body)
+    profile = is_requested(body.get("profile"))
+
+    def create():
+        with profile_request(enabled=profile), profile_block("calculate_diagnosis") as block:
+            diagnosis_result = _diagnose(answers)
+            job_id = get_job_queue().submit(
+                {"answers": answers, "diagnosis_result": diagnosis_result, "profile": profile}
+            )
+            block.diagnosis_id = job_id
+        return job_id, diagnosis_result
+    job_id, diagnosis_result = await asyncio.to_thread(create)
+    return 202, {"job_id": job_id, "status": "queued", "diagnosis_result": diagnosis_result}
+
+
+async def handle_get_report(job_id: str) -> Tuple[int, Any]:
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPError(404, "작업을 찾을 수 없습니다.")
+    result = job["result"] or {}
+    return 200, {
+        "job_id": job_id,
+        "status": job["status"],
+        "progress": job["progress"],
+        "message": job["message"],
+        "error": job["error"],
+        "diagnosis_result": job["payload"]["diagnosis_result"],
+        "report_data": result.get("report_data"),
+        "tier": result.get("tier"),
+        "pdf_available": bool(result.get("pdf_path"))
+    }
+
+
+async def handle_get_pdf(job_id: str) -> bytes:
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPError(404, "작업을 찾을 수 없습니다.")
+    if job["status"] != "done":
+        raise HTTPError(409, "보고서가 아직 생성되지 않았습니다.")
+    pdf_path = (job["result"] or {}).get("pdf_path")
+    if not pdf_path or not os.path.exists(pdf_path):
+        raise HTTPError(404, "PDF 보고서가 없습니다.")
+
+    def read():
+        with open(pdf_path, "rb") as f:
+            return f.read()
+    return await asyncio.to_thread(read)
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _send(send, status: int, body: bytes, content_type: str, extra_headers: Optional[list] = None):
+    headers = [
+        (b"content-type", content_type.encode("latin-1")),
+        (b"content-length", str(len(body)).encode("latin-1")),
+    ] + (extra_headers or [])
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send, status: int, data: Any):
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    await _send(send, status, body, "application/json; charset=utf-8")
+
+
+async def _dispatch(method: str, path: str, receive, send, query: Optional[Dict[str, list]] = None):
+    parts = [p for p in path.split("/") if p]
+
+    if method == "GET" and parts == ["health"]:
+        return await _send_json(send, 200, {"status": "ok"})
+
+    if method == "GET" and parts == ["metrics"]:
+        return await _send(send, 200, export_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+
+    if method == "GET" and parts == ["usage"]:
+        store = get_usage_store()
+        by_day, by_section = await asyncio.gather(
+            asyncio.to_thread(store.by_day), asyncio.to_thread(store.by_section)
+        )
+        return await _send_json(send, 200, {"by_day": by_day, "by_section": by_section})
+
+    if method == "POST" and len(parts) == 1 and parts[0] in ("score", "improvements", "reports"):
+        try:
+            body = json.loads(await _read_body(receive) or b"{}")
+        except ValueError:
+            raise HTTPError(400, "요청 본문이 올바른 JSON이 아닙니다.")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "요청 본문은 JSON 객체여야 합니다.")
+        if is_requested((query or {}).get("profile")):
+            body["profile"] = True
+        handler = {
+            "score": handle_score,
+            "improvements": handle_improvements,
+            "reports": handle_create_report
+        }[parts[0]]
+        status, data = await handler(body)
+        return await _send_json(send, status, data)
+
+    if method == "GET" and len(parts) == 2 and parts[0] == "reports":
+        status, data = await handle_get_report(parts[1])
+        return await _send_json(send, status, data)
+
+    if method == "GET" and len(parts) == 3 and parts[0] == "reports" and parts[2] == "trace":
+        trace = get_trace(parts[1])
+        if trace is None:
+            raise HTTPError(404, "트레이스를 찾을 수 없습니다.")
+        return await _send_json(send, 200, trace)
+
+    if method == "GET" and len(parts) == 3 and parts[0] == "reports" and parts[2] == "usage":
+        usage = await asyncio.to_thread(get_usage_store().by_diagnosis, parts[1])
+        return await _send_json(send, 200, {"job_id": parts[1], "sections": usage})
+
+    if method == "GET" and len(parts) == 3 and parts[0] == "reports" and parts[2] == "pdf":
+        pdf = await handle_get_pdf(parts[1])
+        disposition = f'attachment; filename="place_optimization_report_{parts[1]}.pdf"'
+        return await _send(send, 200, pdf, "application/pdf",
+                           [(b"content-disposition", disposition.encode("latin-1"))])
+
+    raise HTTPError(404, "요청한 경로를 찾을 수 없습니다.")
+
+
+async def app(scope, receive, send):
+    """ASGI 애플리케이션 진입점"""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # 작업 큐(와 미완료 작업 복구), 사전 생성 보고서 라이브러리를 요청 전에 준비
+                await asyncio.to_thread(get_job_queue)
+                await asyncio.to_thread(lambda: get_report_library(library_model_name(get_rag_model())))
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    try:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        await _dispatch(scope["method"], scope["path"], receive, send, query)
+    except HTTPError as e:
+        await _send_json(send, e.status, {"error": e.message})
+    except Exception:
+        logger.exception("API 처리 중 오류 발생")
+        await _send_json(send, 500, {"error": "서버 내부 오류가 발생했습니다."})
@@ -10,11 +10,23 @@ load_dotenv()
 # OpenAI API 키 설정
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# OpenAI HTTP 클라이언트 설정 (utils/openai_client.py, 모든 LLM/임베딩 호출이 공유)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # 비우면 기본 API 주소 (모의 서버 테스트 시 지정)
+OPENAI_MAX_CONNECTIONS = 20
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_TIMEOUT = 60.0
+OPENAI_MAX_RETRIES = 4
+OPENAI_BACKOFF_BASE = 0.5  # 초
+OPENAI_BACKOFF_MAX = 20.0  # 초
+OPENAI_BREAKER_THRESHOLD = 5  # 연속 실패 횟수
+OPENAI_BREAKER_COOLDOWN = 30.0  # 초
+
 # 파일 경로 설정
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 EBOOK_PATH = os.path.join(DATA_DIR, "ebook_content.txt")
 DB_DIR = os.path.join(PROJECT_ROOT, "db")
+REPORTS_DIR = os.path.join(PROJECT_ROOT, "reports")
 
 # 앱 설정
 APP_TITLE = "사장님 AI 마케팅 부스터"
@@ -27,8 +39,117 @@ EMBEDDING_MODEL = "text-embedding-3-small"
 # LLM 모델 설정 (최신 gpt-4o-mini-2024-07-18 사용)
 LLM_MODEL = "gpt-4o-mini-2024-07-18"  # 기존 "gpt-4o"에서 변경
 TEMPERATURE = 0.2
+# 모델별 단가 (USD / 1M 토큰: 입력, 출력) - 비용 추정용
+LLM_PRICING = {
+    "gpt-4o-mini-2024-07-18": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-3.5-turbo": (0.50, 1.50)
+}
+# 섹션별 토큰 예산 (입력 + 출력, 초과 시 llm_budget_exceeded_total 지표 증가)
+SECTION_TOKEN_BUDGETS = {}
+# 벡터 검색 백엔드 (utils/vector_backends.py): "faiss_flat", "faiss_hnsw", "faiss_ivf", "numpy",
+# "chroma" (db/chroma.sqlite3에 영구 저장, utils/chroma_store.py)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "faiss_flat")
+VECTOR_INDEX_DIR = os.path.join(DATA_DIR, "vector_index")
+VECTOR_HNSW_M = 32
+VECTOR_HNSW_EF_SEARCH = 64
+VECTOR_IVF_NPROBE = 8
+CHROMA_COLLECTION = "ebook_content"
+# Chroma HNSW 색인 설정 (컬렉션 생성 시 적용)
+CHROMA_HNSW = {"space": "l2", "ef_construction": 200, "ef_search": 64, "max_neighbors": 16}
+# 보고서 생성 모델: "mock" (API 호출 없는 MockRAGModel) 또는 "openai" (RAGModel)
+RAG_BACKEND = os.getenv("RAG_BACKEND", "mock")
+# 보고서 단일 호출 모드: 모든 섹션을 JSON 한 번의 호출로 생성 (누락 섹션만 개별 호출)
+REPORT_SINGLE_CALL = os.getenv("REPORT_SINGLE_CALL", "false").lower() == "true"
+# 프로바이더 프롬프트 캐싱: 켜져 있고 공유 접두부가 최소 길이 이상일 때만 모든 섹션이 같은 접두부를 사용
+# (끄면 섹션별로 필요한 참고 자료만 보내 원본 입력 토큰을 줄임, utils/prompt_templates.section_prefixes)
+PROMPT_CACHING = os.getenv("PROMPT_CACHING", "true").lower() == "true"
+PROMPT_CACHE_MIN_TOKENS = 1024  # OpenAI 프롬프트 캐싱 최소 프롬프트 길이
 
 # PDF 설정
 COMPANY_NAME = "스마트 플레이스 최적화 컨설팅"
 REPORT_TITLE = "스마트 플레이스 최적화 진단 보고서"
-LOGO_PATH = os.path.join(PROJECT_ROOT, "assets", "logo.png") 
\ No newline at end of file
+LOGO_PATH = os.path.join(PROJECT_ROOT, "assets", "logo.png") 
+
+# 캐시 설정
+# 로컬 응답 캐시 크기 (프롬프트 접두부 해시 + 섹션 지시문 기준)
+RESPONSE_CACHE_SIZE = 256
+# 임의 검색 쿼리 임베딩 LRU 캐시 크기 (고정 진단 쿼리는 색인과 함께 미리 계산, utils/query_embeddings.py)
+QUERY_EMBEDDING_CACHE_SIZE = 512
+# Streamlit st.cache_data 설정 (점수 계산/개선 제안/보고서 렌더링 결과)
+APP_CACHE_TTL = 3600  # 초
+APP_CACHE_MAX_ENTRIES = 1024
+# 보고서 생성 마감 시간(초) - 초과 시 캐시/템플릿 보고서로 응답 (utils/report_policy.py)
+REPORT_DEADLINE_SECONDS = float(os.getenv("REPORT_DEADLINE_SECONDS", "20"))
+REPORT_FULL_WORKERS = 4
+REPORT_FULL_MAX_PENDING = 16  # 대기 중인 full 생성이 이 수 이상이면 새 생성을 접수하지 않음
+# 점수 프로필 기반 보고서 재사용 색인 (utils/report_index.py)
+REPORT_INDEX_DB_PATH = os.path.join(DB_DIR, "report_index.sqlite3")
+REPORT_NN_ENABLED = os.getenv("REPORT_NN_ENABLED", "true").lower() == "true"
+REPORT_NN_METRIC = "euclidean"  # euclidean, manhattan, chebyshev
+REPORT_NN_MAX_DISTANCE = float(os.getenv("REPORT_NN_MAX_DISTANCE", "0.5"))  # 작을수록 품질↑ 적중률↓
+REPORT_NN_FALLBACK_DISTANCE = 1.0  # 마감 시간 초과 시 허용하는 거리
+REPORT_NN_SAME_WEAK_AREAS = True  # 취약 영역 3개가 같은 보고서만 재사용
+REPORT_NN_MAX_ENTRIES = 5000  # 색인에 유지할 최대 보고서 수 (오래된 항목부터 삭제)
+# 프로필별 사전 생성 보고서 라이브러리 (python -m utils.report_library build 로 생성)
+REPORT_LIBRARY_PATH = os.path.join(DATA_DIR, "report_library.json.gz")
+# 서버 측 보고서 저장소 (내용 해시 ID로 저장, 세션에는 ID만 보관 - utils/report_store.py)
+REPORT_STORE_DB_PATH = os.path.join(DB_DIR, "report_store.sqlite3")
+REPORT_STORE_CACHE_SIZE = 256  # 메모리에 유지할 최근 문서 수
+# 마지막으로 저장/조회된 뒤 이 시간이 지난 문서는 삭제 (세션이 보관한 ID도 더 이상 조회되지 않음)
+REPORT_STORE_TTL_HOURS = float(os.getenv("REPORT_STORE_TTL_HOURS", str(24 * 7)))
+REPORT_STORE_PURGE_INTERVAL = 600  # 만료 문서 삭제 주기 (초, 새 문서 저장 시 확인)
+# 보고서 본문 정규화 결과(블록 목록) 캐시 - 화면과 PDF가 공유 (utils/report_text.py)
+REPORT_TEXT_CACHE_SIZE = 256
+# 복사 버튼이 클릭 시 가져가는 전체 보고서 텍스트 파일 (Streamlit 정적 파일 제공: .streamlit/config.toml)
+# 앱 디렉토리의 static/ 아래 파일이 app/static/ 주소로 제공되며, 보고서 ID(내용 해시)별로 한 번만 씁니다.
+REPORT_TEXT_STATIC_DIR = os.path.join(PROJECT_ROOT, "static", "report_text")
+REPORT_TEXT_STATIC_URL = "app/static/report_text"
+REPORT_TEXT_FILES_MAX = 1000  # 유지할 최대 파일 수 (초과하면 오래된 파일부터 삭제)
+
+# 백그라운드 작업 큐 설정 (보고서/PDF 생성)
+JOB_DB_PATH = os.path.join(DB_DIR, "jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# 실행 중 작업의 소유 기간(초) - 워커가 주기적으로 연장하며, 만료된 작업만 다른 프로세스가 다시 실행
+JOB_LEASE_SECONDS = 60.0
+JOB_POLL_INTERVAL = 1.0  # 결과 페이지 진행 상태 갱신 주기 (초)
+# 끝난 작업(입력/결과 포함)을 보관하는 시간 - 지나면 하트비트에서 삭제 (새로고침 시 ?job= 조회 가능 기간)
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+# PDF 사전 생성 (보고서가 준비되면 백그라운드에서 생성해 두고 다운로드 버튼이 바로 제공 - utils/report_pdf.py)
+PDF_CACHE_DIR = os.path.join(REPORTS_DIR, "cache")
+PDF_WORKERS = 2
+PDF_FAILURE_RETRY_SECONDS = 60  # PDF 생성 실패 후 다시 시도하기까지 실패 상태를 유지하는 시간 (초)
+PDF_CACHE_SIZE = 32  # 메모리에 유지할 PDF 수 (나머지는 PDF_CACHE_DIR에서 읽음)
+PDF_CACHE_MAX_FILES = 500  # PDF_CACHE_DIR에 유지할 최대 파일 수 (초과하면 오래된 파일부터 삭제)
+# PDF 점수 분석 차트 (레이더 + 영역별 막대, utils/score_charts.py) - reportlab (벡터) 또는 matplotlib (이미지)
+SCORE_CHART_BACKEND = os.getenv("SCORE_CHART_BACKEND", "reportlab")
+SCORE_CHART_CACHE_SIZE = 256  # 점수 조합별 차트 캐시 (점수는 0.25 단위)
+
+# 계측 설정: 지정하면 진단별 JSON 트레이스를 이 디렉토리에 저장
+TRACE_DIR = os.getenv("TRACE_DIR")
+# LLM 토큰/비용 사용량 기록 DB
+USAGE_DB_PATH = os.path.join(DB_DIR, "usage.sqlite3")
+
+# CPU 프로파일링 (utils/cpu_profile.py): 켜면 진단/보고서/PDF 구간의 collapsed stack을
+# CPU_PROFILE_DIR/{진단 ID}.folded에 기록 (요청 하나만: URL/API 쿼리 ?profile=1)
+CPU_PROFILE = os.getenv("CPU_PROFILE", "false").lower() == "true"
+CPU_PROFILE_MODE = os.getenv("CPU_PROFILE_MODE", "sample")  # sample (스택 샘플링) 또는 cprofile
+CPU_PROFILE_DIR = os.getenv("CPU_PROFILE_DIR", os.path.join(REPORTS_DIR, "profiles"))
+CPU_PROFILE_INTERVAL = 0.002  # 샘플링 주기 (초)
+
+# 메모리 프로파일링 (utils/memory_profile.py): 켜면 tracemalloc으로 단계 경계마다 스냅샷을 찍어
+# VectorStore/RAGModel/PDFGenerator/세션 상태별 할당 증가량을 MEMORY_PROFILE_DIR에 기록 (오버헤드 큼)
+MEMORY_PROFILE = os.getenv("MEMORY_PROFILE", "false").lower() == "true"
+MEMORY_PROFILE_DIR = os.getenv("MEMORY_PROFILE_DIR", os.path.join(REPORTS_DIR, "memory"))
+MEMORY_PROFILE_FRAMES = 12  # 할당 위치별로 보관하는 호출 스택 깊이 (구성 요소 판별용, 깊을수록 느림)
+MEMORY_PROFILE_TOP = 15  # 단계별로 기록하는 증가량 상위 할당 위치 수
+# 스냅샷을 찍는 단계 (metrics.span 이름, 종료 시점)
+MEMORY_PROFILE_STAGES = (
+    "calculate_score",
+    "suggest_improvements",
+    "rag_model.generate_diagnosis_report",
+    "mock_rag_model.generate_diagnosis_report",
+    "report_policy.full",
+    "pdf_generator.render_bytes",
+    "pdf_generator.generate_report",
+)
@@ -1,7 +1,8 @@
 import streamlit as st
-import openai
 import os
 
+from utils.openai_client import create_openai_client
+
 st.set_page_config(page_title="OpenAI API 키 테스트", page_icon="🤖")
 
 st.title("🔑 OpenAI API Key 테스트 페이지")
@@ -13,11 +14,10 @@ if st.button("API 키로 테스트"):
     if not api_key or not api_key.startswith("sk-"):
         st.error("유효한 OpenAI API 키를 입력하세요.")
     else:
-        openai.api_key = api_key
         try:
             with st.spinner("OpenAI API 키를 테스트 중입니다..."):
                 # 최신 openai 패키지에서는 실제 채팅 호출로 테스트
-                response = openai.chat.completions.create(
+                response = create_openai_client(api_key).chat.completions.create(
                     model="gpt-3.5-turbo",
                     messages=[{"role": "user", "content": "Hello, are you working?"}]
                 )
@@ -4,14 +4,13 @@
 
 import os
 import time
+import json
 import streamlit as st
+import streamlit.components.v1 as components
 from datetime import datetime
 from typing import Dict, List, Any
-from utils.pdf_generator import PDFGenerator
 from io import BytesIO
-import re
 import logging
-import openai
 
 # 페이지 설정 - 가장 먼저 호출되어야 함
 st.set_page_config(
@@ -24,11 +23,21 @@ st.set_page_config(
 
 
 # 자체 모듈 임포트
-from utils.questions import diagnosis_questions, calculate_score, suggest_improvements
-from utils.mock_rag_model import MockRAGModel
+from utils.questions import diagnosis_questions
+from utils.app_cache import (
+    load_resources, load_question_index, cached_calculate_score, cached_suggest_improvements,
+    report_markdown, report_text_url
+)
+from utils.report_store import get_report_store
+from utils.report_pdf import start_pdf, get_pdf_bytes, STATUS_READY, STATUS_PENDING
+from utils.report_jobs import get_job_queue
+from utils.report_policy import template_report
+from utils.metrics import span
+from utils.cpu_profile import is_requested, profile_request, profile_block
+from utils.openai_client import create_openai_client
 
 # 설정 로드
-from config import APP_TITLE, APP_DESCRIPTION, REPORT_TITLE, COMPANY_NAME, LOGO_PATH, LLM_MODEL
+from config import APP_TITLE, APP_DESCRIPTION, REPORT_TITLE, COMPANY_NAME, LOGO_PATH, LLM_MODEL, JOB_POLL_INTERVAL
 
 # 나머지 코드는 그대로 유지... 
 
@@ -52,28 +61,55 @@ from config import APP_TITLE, APP_DESCRIPTION, REPORT_TITLE, COMPANY_NAME, LOGO_
 #     st.sidebar.error(f"ebook_content.txt 파일 없음")
 
 # 전역 변수 설정
+# 진단 결과/보고서 본문은 서버 측 저장소(utils/report_store.py)에 두고 세션에는 내용 해시 ID만 보관
 if 'answers' not in st.session_state:
     st.session_state.answers = {}
 if 'current_stage' not in st.session_state:
     st.session_state.current_stage = list(diagnosis_questions.keys())[0]
-if 'diagnosis_result' not in st.session_state:
-    st.session_state.diagnosis_result = None
-if 'report_data' not in st.session_state:
-    st.session_state.report_data = None
+if 'diagnosis_id' not in st.session_state:
+    st.session_state.diagnosis_id = None
+if 'report_id' not in st.session_state:
+    st.session_state.report_id = None
 if 'page' not in st.session_state:
     st.session_state.page = 'welcome'  # welcome, diagnostic, result
-if 'copy_clicked' not in st.session_state:
-    st.session_state.copy_clicked = False
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
+    # 새로고침 시 URL의 작업 ID로 진행 중이던 보고서를 이어서 조회
+    if st.query_params.get("job"):
+        st.session_state.job_id = st.query_params["job"]
+        st.session_state.page = 'result'
 
 # 함수 정의
 def reset_diagnostic():
     """진단 상태를 초기화합니다."""
     st.session_state.answers = {}
     st.session_state.current_stage = list(diagnosis_questions.keys())[0]
-    st.session_state.diagnosis_result = None
-    st.session_state.report_data = None
+    st.session_state.diagnosis_id = None
+    st.session_state.report_id = None
     st.session_state.page = 'welcome'
-    st.session_state.copy_clicked = False
+    st.session_state.job_id = None
+    st.query_params.clear()
+
+def store_result(diagnosis_result, report_data):
+    """
+    진단 결과와 보고서를 서버 측 저장소에 저장하고 세션에는 ID만 남깁니다. (None이면 ID도 None)
+    보고서가 있으면 PDF 생성을 바로 백그라운드에서 시작합니다.
+    """
+    store = get_report_store()
+    st.session_state.diagnosis_id = store.put(diagnosis_result) if diagnosis_result is not None else None
+    st.session_state.report_id = store.put(report_data) if report_data is not None else None
+    start_pdf(st.session_state.diagnosis_id, st.session_state.report_id)
+
+def error_report(error_message):
+    """오류 안내용 보고서 데이터"""
+    return {
+        "title": "오류 발생",
+        "level": "오류",
+        "overview": error_message,
+        "strengths_analysis": error_message,
+        "improvements_analysis": error_message,
+        "action_plan": error_message
+    }
 
 def save_answer(question_id, answer):
     """질문에 대한 응답을 저장합니다."""
@@ -83,7 +119,7 @@ def save_answer(question_id, answer):
 
 def get_progress():
     """진단 진행 상황을 백분율로 반환합니다."""
-    total_questions = sum(len(qs) for qs in diagnosis_questions.values())
+    total_questions = load_question_index()["total_questions"]
     answered_questions = len(st.session_state.answers)
     return int((answered_questions / total_questions) * 100)
 
@@ -111,76 +147,70 @@ def prev_stage():
 
 def calculate_diagnosis():
     """진단 결과를 계산하고 보고서 데이터를 생성합니다."""
+    diagnosis_result = None
+    # URL에 ?profile=1이 있으면 이 진단의 계산/보고서/PDF 구간을 CPU 프로파일 (utils/cpu_profile.py)
+    profile_requested = is_requested(st.query_params.get("profile"))
     try:
-        # 진단 결과 계산
-        diagnosis_result = calculate_score(st.session_state.answers)
-        # 개선 제안 생성
-        improvements = suggest_improvements(diagnosis_result)
-        diagnosis_result['improvements'] = improvements
-        # 세션 상태에 저장
-        st.session_state.diagnosis_result = diagnosis_result
-        
-        # 무조건 MockRAGModel 사용
-        with st.spinner("(모의) 진단 보고서를 생성하고 있습니다..."):
-            rag_model = MockRAGModel()
-            report_data = rag_model.generate_diagnosis_report(
-                answers=st.session_state.answers,
-                diagnosis_result=diagnosis_result
-            )
-            st.session_state.report_data = report_data
+        with profile_request(enabled=profile_requested), profile_block("calculate_diagnosis") as profile:
+            # 진단 결과 계산
+            with span("calculate_score"):
+                diagnosis_result = cached_calculate_score(st.session_state.answers)
+            # 개선 제안 생성
+            with span("suggest_improvements"):
+                improvements = cached_suggest_improvements(diagnosis_result)
+            diagnosis_result['improvements'] = improvements
+            # 서버 측 저장소에 저장 (보고서/PDF 생성은 백그라운드 작업 큐에 등록하고 결과 페이지에서 진행 상태를 조회)
+            store_result(diagnosis_result, None)
+            st.session_state.job_id = get_job_queue().submit({
+                "answers": st.session_state.answers,
+                "diagnosis_result": diagnosis_result,
+                "profile": profile_requested
+            })
+            profile.diagnosis_id = st.session_state.job_id
+            st.query_params["job"] = st.session_state.job_id
     except Exception as e:
         logging.exception(f"진단 계산 중 오류 발생: {e}")
         error_message = "진단 계산 중 오류가 발생했습니다. 다시 시도해주세요."
         st.error(error_message)
-        st.session_state.diagnosis_result = {
-            "level": {"name": "오류", "description": error_message}
-        }
-        st.session_state.report_data = {
-            "title": "오류 발생",
-            "level": "오류",
-            "overview": error_message,
-            "strengths_analysis": error_message,
-            "improvements_analysis": error_message,
-            "action_plan": error_message
-        }
+        if diagnosis_result is not None:
+            # 점수 계산까지 끝났다면 작업 큐 없이 템플릿 보고서로 대체
+            store_result(diagnosis_result, dict(template_report(diagnosis_result), tier="template"))
+            return
+        store_result({"level": {"name": "오류", "description": error_message}}, error_report(error_message))
+
+def poll_report_job() -> bool:
+    """
+    백그라운드 보고서 작업 상태를 확인합니다.
+    완료되면 결과를 세션 상태에 반영하고 True, 아직 진행 중이면 진행률을 표시하고 False를 반환합니다.
+    """
+    if st.session_state.report_id is not None or not st.session_state.job_id:
+        return True
+
+    job = get_job_queue().get(st.session_state.job_id)
+    if job is None:
+        st.session_state.job_id = None
+        return True
+
+    if job["status"] == "done":
+        store_result(job["payload"]["diagnosis_result"], job["result"]["report_data"])
+        return True
+
+    if job["status"] == "failed":
+        error_message = "보고서 생성 중 오류가 발생했습니다. 다시 시도해주세요."
+        st.error(error_message)
+        store_result(job["payload"]["diagnosis_result"], error_report(error_message))
+        return True
 
-def toggle_copy():
-    """복사 상태를 토글합니다."""
-    st.session_state.copy_clicked = not st.session_state.copy_clicked
-
-def clipboard_button(text_to_copy: str, label: str = "📄", tooltip: str = "복사하기"):
-    # 버튼을 오른쪽 상단에 띄우기 위해 columns 사용
-    col1, col2 = st.columns([10, 1])
-    with col2:
-        # HTML+JS로 복사 버튼 구현
-        st.components.v1.html(f"""
-        <button id="copy-btn" title="{tooltip}" style="font-size:1.2em; border:none; background:transparent; cursor:pointer;">
-            {label}
-        </button>
-        <script>
-        const btn = document.getElementById('copy-btn');
-        btn.onclick = function() {{
-            navigator.clipboard.writeText({repr(text_to_copy)});
-            btn.innerText = "✅";
-            setTimeout(()=>{{btn.innerText="{label}";}}, 1200);
-        }};
-        </script>
-        """, height=35)
-
-def clean_text(text):
-    # 큰따옴표, 별표 등 불필요한 특수문자 제거
-    return re.sub(r'["*]', '', text)
-
-def clean_pdf_text(text):
-    text = re.sub(r'\n+', '\n', text)
-    text = re.sub(r'[ \t]+', ' ', text)
-    text = re.sub(r'\n\s*\n', '\n', text)
-    return text.strip()
+    # 대기/진행 중: 진행률 표시 후 잠시 뒤 다시 실행
+    st.progress(job["progress"])
+    st.info(job["message"] or "진단 보고서를 생성하고 있습니다...")
+    time.sleep(JOB_POLL_INTERVAL)
+    st.rerun()
+    return False
 
 def check_openai_api_key(api_key):
     try:
-        openai.api_key = api_key
-        openai.Model.list()  # 가장 간단한 API 호출
+        create_openai_client(api_key).models.list()  # 가장 간단한 API 호출 (공용 연결 풀 사용)
         return True, "API 키가 정상적으로 작동합니다."
     except Exception as e:
         return False, f"API 키 오류: {e}"
@@ -228,6 +258,7 @@ def show_diagnostic_page():
     st.title(f"{current_stage} 단계 진단")
     
     questions = diagnosis_questions[current_stage]
+    question_index = load_question_index()["questions"]
     
     # 폼 대신 일반 컨테이너 사용
     container = st.container()
@@ -235,11 +266,11 @@ def show_diagnostic_page():
         for question in questions:
             q_id = question["id"]
             st.markdown(f"### {question['question']}")
-            options = [f"{opt['value']}. {opt['text']}" for opt in question["options"]]
+            options = question_index[q_id]["labels"]
             default_index = 0
             if q_id in st.session_state.answers:
                 selected_value = st.session_state.answers[q_id]
-                option_values = [opt["value"] for opt in question["options"]]
+                option_values = question_index[q_id]["values"]
                 if selected_value in option_values:
                     default_index = option_values.index(selected_value)
             
@@ -273,15 +304,19 @@ def show_diagnostic_page():
 
 def show_result_page():
     """결과 페이지를 표시합니다."""
-    if not st.session_state.diagnosis_result:
+    if not poll_report_job():
+        return
+
+    store = get_report_store()
+    diagnosis_result = store.get(st.session_state.diagnosis_id)
+    report_data = store.get(st.session_state.report_id)
+
+    if not diagnosis_result:
         st.error("진단 결과가 없습니다. 먼저 진단을 완료해주세요.")
         if st.button("진단 페이지로 돌아가기"):
             st.session_state.page = 'diagnostic'
         return
 
-    diagnosis_result = st.session_state.diagnosis_result
-    report_data = st.session_state.report_data
-
     # 보고서 데이터 유효성 검사
     if not report_data or not isinstance(report_data, dict):
         st.error("보고서 데이터가 올바르지 않습니다. 다시 진단을 시작해주세요.")
@@ -297,48 +332,136 @@ def show_result_page():
     st.markdown(f"**진단 레벨:** {level_name}")
     if level_desc:
         st.markdown(f"**레벨 설명:** {level_desc}")
+    if report_data.get("tier") == "template":
+        st.caption("AI 보고서 생성이 지연되어 진단 결과 기반 기본 보고서를 표시합니다.")
+
+    # PDF 다운로드 - 보고서가 준비될 때 백그라운드에서 만들어 둔 PDF 바이트를 바로 제공
+    pdf_status = start_pdf(st.session_state.diagnosis_id, st.session_state.report_id)
+    if pdf_status == STATUS_READY:
+        st.download_button(
+            "📄 PDF 보고서 다운로드",
+            data=get_pdf_bytes(st.session_state.diagnosis_id, st.session_state.report_id),
+            file_name="place_optimization_report.pdf",
+            mime="application/pdf",
+            type="primary"
+        )
+    elif pdf_status == STATUS_PENDING:
+        # 누르면 다시 실행되어 준비된 PDF의 다운로드 버튼이 표시됨
+        st.button("📄 PDF 보고서 준비 중... (잠시 후 눌러주세요)", key="pdf_refresh")
+    else:
+        st.caption("PDF 보고서를 만들지 못했습니다. 아래 보고서 텍스트를 복사해 사용해주세요.")
 
-    # 보고서 섹션 정의
-    sections = {
-        "📊 종합 진단": report_data.get("overview", "진단 결과를 불러올 수 없습니다."),
-        "💪 강점 분석": report_data.get("strengths_analysis", "진단 결과를 불러올 수 없습니다."),
-        "🎯 개선점 분석": report_data.get("improvements_analysis", "진단 결과를 불러올 수 없습니다."),
-        "📝 액션 플랜": report_data.get("action_plan", "진단 결과를 불러올 수 없습니다."),
-    }
+    # 복사 영역 - 버튼을 누르면 브라우저가 보고서 텍스트 파일을 가져와 복사 (스크립트 재실행/본문 재전송 없음)
+    st.subheader("📋 전체 보고서 복사하기", anchor="report-copy")
+    components.html(
+        COPY_BUTTON_HTML.replace("__REPORT_TEXT_URL__", json.dumps(report_text_url(st.session_state.report_id))),
+        height=60
+    )
+    st.markdown("---")
 
-    # 전체 보고서 텍스트 생성
-    full_report = "\n\n".join([f"# {title}\n{content}" for title, content in sections.items()])
-
-    # 복사 버튼 컨테이너
-    copy_container = st.container()
-    with copy_container:
-        if st.button("📋 전체 보고서 복사하기", key="copy_all", help="클릭하면 전체 보고서 내용을 복사할 수 있습니다"):
-            toggle_copy()
-
-    if st.session_state.copy_clicked:
-        with copy_container:
-            st.text_area("아래 내용을 선택하여 복사하세요 (Ctrl+A, Ctrl+C)", full_report, height=300)
-            st.info("👆 위 텍스트를 선택하고 Ctrl+A, Ctrl+C를 눌러 복사하세요!")
-            if st.button("닫기", key="close_copy"):
-                toggle_copy()
-        st.markdown("---")
-
-    # 각 섹션별로 표시
-    for title, content in sections.items():
-        st.markdown(f"## {title}")
-        st.markdown(content)
-        st.markdown("---")
+    # 보고서 본문 - 보고서 ID별로 한 번만 만든 마크다운을 하나의 요소로 표시
+    st.markdown(report_markdown(st.session_state.report_id))
 
     st.markdown("## 새 진단 시작")
     if st.button("새로운 진단 시작하기"):
         reset_diagnostic()
 
+# 전체 보고서 복사 버튼 - 클릭할 때만 텍스트 파일을 가져와 클립보드에 씀 (components.html iframe 안에서 실행)
+# 가져오기가 끝나기 전에 클립보드 쓰기를 시작해야 클릭 직후의 사용자 동작으로 인정되므로 ClipboardItem에 Promise를 넘김
+COPY_BUTTON_HTML = """
+<style>
+button {
+    font-family: "Source Sans Pro", sans-serif;
+    font-size: 16px;
+    padding: 8px 16px;
+    border-radius: 8px;
+    border: 1px solid rgba(49, 51, 63, 0.2);
+    background-color: white;
+    cursor: pointer;
+}
+button:hover {
+    border-color: #ff4b4b;
+    color: #ff4b4b;
+}
+#copy-status {
+    font-family: "Source Sans Pro", sans-serif;
+    font-size: 14px;
+    margin-left: 8px;
+    color: rgba(49, 51, 63, 0.6);
+}
+</style>
+
+<button id="copy-button">📋 보고서 텍스트 복사</button>
+<span id="copy-status"></span>
+
+<script>
+const url = new URL(__REPORT_TEXT_URL__, document.baseURI).href;
+const status = document.getElementById("copy-status");
+
+function fetchText() {
+    return fetch(url).then((response) => {
+        if (!response.ok) throw new Error(response.status);
+        return response.text();
+    });
+}
+
+document.getElementById("copy-button").addEventListener("click", async () => {
+    status.textContent = "복사 중...";
+    try {
+        if (window.ClipboardItem) {
+            const blob = fetchText().then((text) => new Blob([text], {type: "text/plain"}));
+            await navigator.clipboard.write([new ClipboardItem({"text/plain": blob})]);
+        } else {
+            await navigator.clipboard.writeText(await fetchText());
+        }
+        status.textContent = "전체 보고서가 복사되었습니다.";
+    } catch (error) {
+        status.textContent = "복사하지 못했습니다. PDF 보고서나 아래 본문을 이용해주세요.";
+    }
+});
+</script>
+"""
+
+# 결과 페이지 하단 고정 버튼 - 복사 영역(#report-copy)으로 이동 (스크립트 재실행 없음)
+FLOATING_COPY_BUTTON = """
+<style>
+.floating-button {
+    position: fixed;
+    bottom: 20px;
+    right: 20px;
+    z-index: 1000;
+    border-radius: 50%;
+    width: 60px;
+    height: 60px;
+    font-size: 24px;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    background-color: #ff4b4b;
+    color: white;
+    box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
+    cursor: pointer;
+    border: none;
+    text-decoration: none;
+}
+.floating-button:hover {
+    background-color: #ff2e2e;
+}
+</style>
+
+<a class="floating-button" href="#report-copy">
+    📋 전체 보고서 복사하기
+</a>
+"""
+
 # 메인 앱 구성
 def main():
     """메인 애플리케이션 실행"""
     try:
-        # 페이지 설정
-        
+        # 공유 리소스 준비 (st.cache_resource - 프로세스의 첫 실행에서만 실제로 생성, 세션당 한 번 확인)
+        if 'resources_ready' not in st.session_state:
+            load_resources()
+            st.session_state.resources_ready = True
         
         # 사이드바
         with st.sidebar:
@@ -366,40 +489,8 @@ def main():
             show_result_page()
             
         # 맨 밑에 고정된 복사 버튼 추가 (결과 페이지인 경우)
-        if st.session_state.page == 'result' and not st.session_state.copy_clicked:
-            # 고정된 위치에 복사 버튼 표시
-            st.markdown(
-                """
-                <style>
-                .floating-button {
-                    position: fixed;
-                    bottom: 20px;
-                    right: 20px;
-                    z-index: 1000;
-                    border-radius: 50%;
-                    width: 60px;
-                    height: 60px;
-                    font-size: 24px;
-                    display: flex;
-                    align-items: center;
-                    justify-content: center;
-                    background-color: #ff4b4b;
-                    color: white;
-                    box-shadow: 0 4px 8px rgba(0, 0, 0, 0.2);
-                    cursor: pointer;
-                    border: none;
-                }
-                .floating-button:hover {
-                    background-color: #ff2e2e;
-                }
-                </style>
-                
-                <button class="floating-button" onclick="document.getElementById('copy_all').click()">
-                    📋 전체 보고서 복사하기
-                </button>
-                """,
-                unsafe_allow_html=True
-            )
+        if st.session_state.page == 'result' and st.session_state.report_id:
+            st.markdown(FLOATING_COPY_BUTTON, unsafe_allow_html=True)
     except Exception as e:
         st.error(f"애플리케이션 실행 중 오류 발생: {e}")
 
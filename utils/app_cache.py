@@ -0,0 +1,144 @@
+# utils/app_cache.py
+# 역할: Streamlit 앱의 리소스 캐시(st.cache_resource)와 결정적 계산 캐시(st.cache_data)
+#
+# 앱 스크립트는 재실행마다 처음부터 다시 실행되므로, 캐시 함수를 스크립트 안에서 정의하면
+# 재실행마다 데코레이터가 함수 키를 다시 계산합니다. 이 모듈은 한 번만 임포트되어 그 비용이 없습니다.
+#
+# - 리소스: 프로세스당 한 번 생성되어 모든 세션/재실행이 함께 사용합니다.
+#   model_registry와 같은 인스턴스를 반환하므로 백그라운드 작업 큐/HTTP API와도 공유됩니다.
+# - 계산: 같은 입력이면 세션이 달라도 결과를 재사용합니다. (TTL/항목 수 제한, 반환값은 복사본)
+#   보고서 섹션 변환(render_report)은 인자 해싱/복사 비용이 변환 자체보다 커서 캐시하지 않고,
+#   화면 본문(report_markdown)과 전체 텍스트(report_text)는 서버 측 저장소의 보고서 ID로 캐시합니다.
+#   화면 본문은 PDF와 같은 캐시된 구문 트리(utils/report_text.py)로 만듭니다.
+# - 복사용 전체 텍스트는 페이지로 보내지 않고 정적 파일로 한 번 써 두며, 복사 버튼이 클릭 시 브라우저에서 가져갑니다.
+import logging
+import os
+from typing import Any, Dict
+
+import streamlit as st
+
+from utils.questions import calculate_score, suggest_improvements, build_question_index
+from utils.model_registry import get_rag_model, get_pdf_generator, get_vector_store
+from utils.report_store import get_report_store
+from utils.report_text import parse_report_text, to_markdown
+from utils.file_retention import prune_oldest_files
+
+from config import (
+    RAG_BACKEND, APP_CACHE_TTL, APP_CACHE_MAX_ENTRIES,
+    REPORT_TEXT_STATIC_DIR, REPORT_TEXT_STATIC_URL, REPORT_TEXT_FILES_MAX
+)
+
+logger = logging.getLogger(__name__)
+
+
+@st.cache_resource(show_spinner=False)
+def load_question_index() -> Dict[str, Any]:
+    """질문 ID별 라벨/선택지 값 색인"""
+    return build_question_index()
+
+
+@st.cache_resource(show_spinner=False)
+def load_rag_model():
+    """보고서 생성 모델 (실패 시 None - 작업 큐가 보고서 생성 시 다시 시도)"""
+    try:
+        return get_rag_model()
+    except Exception as e:
+        logger.exception(f"RAG 모델 로드 실패: {e}")
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def load_vector_store():
+    """벡터 검색 색인 (OpenAI 백엔드에서만 사용)"""
+    if RAG_BACKEND != "openai":
+        return None
+    try:
+        return get_vector_store()
+    except Exception as e:
+        logger.exception(f"벡터 색인 로드 실패: {e}")
+        return None
+
+
+@st.cache_resource(show_spinner=False)
+def load_pdf_generator():
+    """PDF 생성기 (폰트 등록/스타일 설정 포함)"""
+    return get_pdf_generator()
+
+
+def load_resources():
+    """모든 공유 리소스를 준비합니다. (프로세스의 첫 실행에서만 실제로 생성)"""
+    load_question_index()
+    load_rag_model()
+    load_vector_store()
+    load_pdf_generator()
+
+
+@st.cache_data(ttl=APP_CACHE_TTL, max_entries=APP_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_calculate_score(answers: Dict[str, str]) -> Dict[str, Any]:
+    """calculate_score 메모이제이션"""
+    return calculate_score(answers)
+
+
+@st.cache_data(ttl=APP_CACHE_TTL, max_entries=APP_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_suggest_improvements(diagnosis_result: Dict[str, Any]) -> Dict[str, Any]:
+    """suggest_improvements 메모이제이션"""
+    return suggest_improvements(diagnosis_result)
+
+
+# 화면 섹션 (제목, 보고서 데이터 키)
+REPORT_SECTIONS = (
+    ("📊 종합 진단", "overview"),
+    ("💪 강점 분석", "strengths_analysis"),
+    ("🎯 개선점 분석", "improvements_analysis"),
+    ("📝 액션 플랜", "action_plan"),
+)
+
+
+def render_report(report_data: Dict[str, Any]) -> Dict[str, str]:
+    """보고서 데이터를 화면 섹션(제목 → 본문)으로 변환합니다."""
+    return {
+        title: report_data.get(field, "진단 결과를 불러올 수 없습니다.")
+        for title, field in REPORT_SECTIONS
+    }
+
+
+@st.cache_data(ttl=APP_CACHE_TTL, max_entries=APP_CACHE_MAX_ENTRIES, show_spinner=False)
+def report_text(report_id: str) -> str:
+    """
+    복사/다운로드용 전체 보고서 텍스트
+    ID가 내용 해시이므로 짧은 ID 문자열만으로 캐시합니다. (보고서 딕셔너리를 해싱하지 않음)
+    """
+    report_data = get_report_store().get(report_id) or {}
+    return "\n\n".join([f"# {title}\n{content}" for title, content in render_report(report_data).items()])
+
+
+def report_text_url(report_id: str) -> str:
+    """
+    복사 버튼이 가져갈 전체 보고서 텍스트 파일의 주소 (app/static/ 기준 상대 주소)
+    파일이 없을 때만 씁니다. (ID가 내용 해시이므로 내용이 바뀌지 않음) 파일 수는 REPORT_TEXT_FILES_MAX로 제한
+    """
+    path = os.path.join(REPORT_TEXT_STATIC_DIR, f"{report_id}.txt")
+    if not os.path.exists(path):
+        os.makedirs(REPORT_TEXT_STATIC_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(report_text(report_id))
+        os.replace(tmp_path, path)
+        prune_oldest_files(REPORT_TEXT_STATIC_DIR, ".txt", REPORT_TEXT_FILES_MAX)
+    return f"{REPORT_TEXT_STATIC_URL}/{report_id}.txt"
+
+
+@st.cache_data(ttl=APP_CACHE_TTL, max_entries=APP_CACHE_MAX_ENTRIES, show_spinner=False)
+def report_markdown(report_id: str) -> str:
+    """
+    결과 페이지 본문 마크다운 (섹션 제목/본문/구분선을 하나로 합쳐 st.markdown 한 번으로 표시)
+    섹션마다 요소 3개를 만들던 것을 요소 하나로 줄여 재실행 시 CPU와 전송량을 줄입니다.
+    본문은 PDF와 같은 구문 트리로 만듭니다. (액션 플랜의 "영역명: ..." 줄은 굵게)
+    """
+    report_data = get_report_store().get(report_id) or {}
+    sections = []
+    for title, field in REPORT_SECTIONS:
+        nodes = parse_report_text(report_data.get(field, ""), labels=field == "action_plan")
+        content = to_markdown(nodes) if nodes else "진단 결과를 불러올 수 없습니다."
+        sections.append(f"## {title}\n\n{content}\n\n---")
+    return "\n\n".join(sections)
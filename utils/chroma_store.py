@@ -0,0 +1,299 @@
+# utils/chroma_store.py
+# 역할: Chroma(db/chroma.sqlite3) 기반 벡터 스토어 - utils.vector_store.VectorStore와 같은 검색 API 제공
+#
+# - HNSW 색인이 DB_DIR에 영구 저장되어 재시작 시 다시 임베딩하지 않습니다.
+# - 로드할 때마다 말뭉치 청크 ID(출처 + 내용 해시)와 저장된 ID를 비교해 새로 추가/변경된 청크만 임베딩하고,
+#   말뭉치에서 사라진 청크는 삭제합니다.
+# - 검색 시 메타데이터 필터(where)를 지정할 수 있습니다.
+# - PersistentClient는 스레드 안전하며, 여러 세션/워커가 같은 인스턴스로 동시에 검색합니다.
+import hashlib
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import streamlit as st
+from langchain_core.documents import Document
+
+from config import OPENAI_API_KEY, DATA_DIR, DB_DIR, CHROMA_COLLECTION, CHROMA_HNSW
+from utils.metrics import span
+from utils.openai_client import create_embeddings
+from utils.vector_store import load_corpus_documents
+from utils.prompt_templates import TITLE_MAP, diagnosis_query, fixed_queries
+from utils.query_embeddings import QueryEmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+# 한 번에 임베딩/저장할 청크 수
+UPSERT_BATCH_SIZE = 64
+
+
+def chunk_id(document: Document) -> str:
+    """출처 파일명과 내용으로 청크 ID를 만듭니다. (내용이 같으면 같은 ID)"""
+    source = os.path.basename(document.metadata.get("source", ""))
+    return hashlib.sha256(f"{source}\n{document.page_content}".encode("utf-8")).hexdigest()[:32]
+
+
+class ChromaVectorStore:
+    """Chroma 벡터 스토어 클래스: VectorStore와 같은 검색 메서드를 제공합니다."""
+
+    def __init__(self, persist_dir: str = DB_DIR, collection_name: str = CHROMA_COLLECTION,
+                 embeddings=None, data_dir: str = DATA_DIR):
+        """
+        벡터 스토어 초기화
+
+        Args:
+            persist_dir: Chroma 저장 디렉토리 (chroma.sqlite3 위치)
+            collection_name: 컬렉션 이름
+            embeddings: 임베딩 객체 (None이면 OpenAI 임베딩)
+            data_dir: 원본 텍스트 데이터 디렉토리
+        """
+        import chromadb
+
+        try:
+            if embeddings is None:
+                api_key = st.secrets["OPENAI_API_KEY"] if "OPENAI_API_KEY" in st.secrets else OPENAI_API_KEY
+                if not api_key:
+                    st.error("OpenAI API 키가 설정되지 않았습니다.")
+                    raise ValueError("API 키가 없습니다")
+                embeddings = create_embeddings(api_key, model="text-embedding-ada-002")
+            self.embeddings = embeddings
+            self.data_dir = data_dir
+            self._write_lock = threading.Lock()
+
+            self.client = chromadb.PersistentClient(
+                path=persist_dir,
+                settings=chromadb.Settings(anonymized_telemetry=False)
+            )
+            self.collection = self.client.get_or_create_collection(
+                collection_name,
+                configuration={"hnsw": dict(CHROMA_HNSW)},
+                embedding_function=None
+            )
+            added, deleted = self.sync_documents(load_corpus_documents(self.data_dir))
+            if added or deleted:
+                logger.info(f"Chroma 컬렉션 동기화: {added}개 추가, {deleted}개 삭제")
+
+            # 고정 진단 쿼리 임베딩은 컬렉션과 같은 디렉토리에 저장
+            self.query_cache = QueryEmbeddingCache(self.embeddings)
+            self.query_cache.load_or_build(os.path.join(persist_dir, f"{collection_name}_queries.npz"), fixed_queries())
+        except Exception as e:
+            st.error(f"Chroma 벡터 스토어 초기화 오류: {e}")
+            raise
+
+    def _compute_index_version(self) -> str:
+        """저장된 청크 ID 목록으로 인덱스 버전을 계산합니다."""
+        ids = sorted(self.collection.get(include=[])["ids"])
+        return hashlib.sha256("\n".join(ids).encode("utf-8")).hexdigest()[:12]
+
+    def sync_documents(self, documents: List[Document]) -> Tuple[int, int]:
+        """
+        컬렉션을 말뭉치와 맞춥니다. 없는 청크는 임베딩해 추가하고, 말뭉치에 없는 청크는 삭제합니다.
+
+        Returns:
+            (새로 임베딩한 청크 수, 삭제한 청크 수)
+        """
+        corpus_ids = {chunk_id(doc) for doc in documents}
+        with self._write_lock:
+            stale = [cid for cid in self.collection.get(include=[])["ids"] if cid not in corpus_ids]
+            if stale:
+                self.collection.delete(ids=stale)
+        return self.upsert_documents(documents), len(stale)
+
+    def upsert_documents(self, documents: List[Document]) -> int:
+        """
+        청크 ID 기준으로 문서를 추가/갱신합니다. 이미 저장된 청크는 다시 임베딩하지 않습니다.
+
+        Returns:
+            새로 임베딩한 청크 수
+        """
+        unique = {chunk_id(doc): doc for doc in documents}
+        with self._write_lock:
+            existing = set(self.collection.get(ids=list(unique), include=[])["ids"]) if unique else set()
+            new_items = [(cid, doc) for cid, doc in unique.items() if cid not in existing]
+            for start in range(0, len(new_items), UPSERT_BATCH_SIZE):
+                batch = new_items[start:start + UPSERT_BATCH_SIZE]
+                texts = [doc.page_content for _, doc in batch]
+                with span("chroma.embed_documents", n=len(texts)):
+                    vectors = self.embeddings.embed_documents(texts)
+                self.collection.upsert(
+                    ids=[cid for cid, _ in batch],
+                    embeddings=vectors,
+                    documents=texts,
+                    metadatas=[self._metadata(doc) for _, doc in batch]
+                )
+            self.index_version = self._compute_index_version()
+        return len(new_items)
+
+    @staticmethod
+    def _metadata(document: Document) -> Dict[str, Any]:
+        # Chroma 메타데이터는 str/int/float/bool 값만 허용
+        metadata = {k: v for k, v in document.metadata.items() if isinstance(v, (str, int, float, bool))}
+        if "source" in metadata:
+            metadata["source"] = os.path.basename(metadata["source"])
+        return metadata
+
+    def _search(self, query: str, k: int, where: Optional[Dict[str, Any]] = None) -> List[Document]:
+        return self.search_many([query], k, where)[0]
+
+    def _query(self, vectors: List[List[float]], k: int, where: Optional[Dict[str, Any]] = None) -> List[List[Document]]:
+        with span("vector_store.similarity_search", k=k, backend="chroma", n=len(vectors)):
+            result = self.collection.query(
+                query_embeddings=vectors,
+                n_results=k,
+                where=where,
+                include=["documents", "metadatas", "distances"]
+            )
+        return [
+            [Document(page_content=text, metadata=dict(metadata or {}, distance=distance))
+             for text, metadata, distance in zip(texts, metadatas, dists)]
+            for texts, metadatas, dists in zip(result["documents"], result["metadatas"], result["distances"])
+        ]
+
+    def search_many(self, queries: List[str], k: int = 3, where: Optional[Dict[str, Any]] = None) -> List[List[Document]]:
+        """여러 쿼리를 한 번의 임베딩 요청과 한 번의 컬렉션 검색으로 처리합니다. (고정/최근 쿼리는 캐시 사용)"""
+        if not queries:
+            return []
+        return self._query(self.query_cache.embed(queries).tolist(), k, where)
+
+    def get_relevant_contents(self, queries: List[str], n_results: int = 3) -> List[str]:
+        """여러 쿼리의 관련 콘텐츠를 한 번에 검색합니다."""
+        try:
+            return ["\n\n".join([doc.page_content for doc in docs]) for docs in self.search_many(queries, k=n_results)]
+        except Exception as e:
+            st.error(f"콘텐츠 검색 오류: {e}")
+            return ["콘텐츠 검색 중 오류가 발생했습니다."] * len(queries)
+
+    def get_relevant_content(self, query: str, n_results: int = 3, where: Optional[Dict[str, Any]] = None) -> str:
+        """
+        쿼리와 관련된 콘텐츠를 검색합니다.
+
+        Args:
+            query: 검색 쿼리
+            n_results: 반환할 검색 결과 수
+            where: 메타데이터 필터 (예: {"source": "ebook_content.txt"})
+
+        Returns:
+            관련 콘텐츠를 포함한 문자열
+        """
+        try:
+            docs = self._search(query, n_results, where)
+            return "\n\n".join([doc.page_content for doc in docs])
+        except Exception as e:
+            st.error(f"콘텐츠 검색 오류: {e}")
+            return "콘텐츠 검색 중 오류가 발생했습니다."
+
+    def get_relevant_content_for_diagnosis(self, answers, weak_areas, n_results: int = 3) -> str:
+        """
+        진단 결과에 맞는 콘텐츠를 검색합니다. (VectorStore와 같은 쿼리)
+        """
+        try:
+            if not weak_areas:
+                return "개선 필요 영역이 확인되지 않았습니다."
+
+            all_contents = []
+            area_terms = [TITLE_MAP.get(area, area) for area in weak_areas[:2]]
+            queries = [diagnosis_query(area) for area in weak_areas[:2]]
+            for area_term, docs in zip(area_terms, self.search_many(queries, n_results)):
+                area_content = f"\n## {area_term} 관련 콘텐츠:\n"
+                area_content += "\n\n".join([doc.page_content for doc in docs])
+                all_contents.append(area_content)
+            return "\n\n".join(all_contents)
+        except Exception as e:
+            st.error(f"진단 콘텐츠 검색 오류: {e}")
+            return f"콘텐츠 검색 중 오류가 발생했습니다: {str(e)}"
+
+    def raw_similarity_search(self, query: str, k: int = 5, where: Optional[Dict[str, Any]] = None):
+        """
+        쿼리와 유사한 원본 문서를 검색합니다.
+
+        Args:
+            query: 검색 쿼리
+            k: 반환할 결과 수
+            where: 메타데이터 필터
+
+        Returns:
+            유사한 문서 객체 리스트 (metadata["distance"]에 거리 포함)
+        """
+        try:
+            if not query:
+                return []
+            return self._search(query, k, where)
+        except Exception as e:
+            st.error(f"문서 검색 오류: {e}")
+            return []
+
+
+# FAISS와 Chroma의 로드 시간, 검색 지연 시간, 메모리 비교
+#   python -m utils.chroma_store            (OpenAI 임베딩)
+#   python -m utils.chroma_store --offline  (API 없이 결정적 가짜 임베딩)
+if __name__ == "__main__":
+    import argparse
+    import shutil
+    import statistics
+    import tempfile
+    import time
+    import tracemalloc
+
+    from langchain_community.vectorstores import FAISS
+
+    parser = argparse.ArgumentParser(description="FAISS vs Chroma 벤치마크")
+    parser.add_argument("--offline", action="store_true", help="가짜 임베딩 사용 (API 호출 없음)")
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.offline:
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        embeddings = DeterministicFakeEmbedding(size=1536)
+    else:
+        embeddings = create_embeddings(OPENAI_API_KEY, model="text-embedding-ada-002")
+
+    documents = load_corpus_documents(DATA_DIR)
+    queries = [diagnosis_query(area) for area in TITLE_MAP]
+    queries = (queries * (args.queries // len(queries) + 1))[:args.queries]
+    query_vectors = {q: embeddings.embed_query(q) for q in set(queries)}
+    print(f"청크 {len(documents)}개, 쿼리 {len(queries)}개")
+
+    tmp = tempfile.mkdtemp()
+    try:
+        FAISS.from_documents(documents, embeddings).save_local(os.path.join(tmp, "faiss"))
+        ChromaVectorStore(os.path.join(tmp, "chroma"), "benchmark", embeddings=embeddings, data_dir=DATA_DIR)
+
+        def rss_mb():
+            # 네이티브(FAISS/Chroma) 메모리까지 포함한 RSS (Linux)
+            try:
+                with open("/proc/self/statm") as f:
+                    return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+            except (OSError, ValueError):
+                return 0.0
+
+        def measure(name, load, search):
+            rss_before = rss_mb()
+            tracemalloc.start()
+            start = time.perf_counter()
+            store = load()
+            load_time = time.perf_counter() - start
+            latencies = []
+            for q in queries:
+                start = time.perf_counter()
+                search(store, query_vectors[q])
+                latencies.append((time.perf_counter() - start) * 1000)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            latencies.sort()
+            print(f"{name:7s} 로드 {load_time * 1000:8.1f}ms | 검색 p50 {statistics.median(latencies):6.2f}ms "
+                  f"p95 {latencies[int(len(latencies) * 0.95) - 1]:6.2f}ms | "
+                  f"파이썬 할당 최대 {peak / 1024 / 1024:5.1f}MB, RSS 증가 {rss_mb() - rss_before:6.1f}MB")
+
+        measure(
+            "FAISS",
+            lambda: FAISS.load_local(os.path.join(tmp, "faiss"), embeddings, allow_dangerous_deserialization=True),
+            lambda store, v: store.similarity_search_by_vector(v, k=3)
+        )
+        measure(
+            "Chroma",
+            lambda: ChromaVectorStore(os.path.join(tmp, "chroma"), "benchmark", embeddings=embeddings, data_dir=DATA_DIR),
+            lambda store, v: store.collection.query(query_embeddings=[v], n_results=3)
+        )
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,258 @@
+# utils/cpu_profile.py
+# 역할: 진단 요청 단위 CPU 프로파일링 (플레임그래프용 collapsed stack 파일 출력)
+#
+# 프로파일 대상 구간: calculate_diagnosis, generate_diagnosis_report, PDFGenerator.generate_report/render_bytes
+# 켜는 방법:
+#   - 환경 변수 CPU_PROFILE=true: 모든 요청
+#   - 요청 하나만: Streamlit URL ?profile=1, HTTP API POST /reports?profile=1 (또는 본문 "profile": true)
+#     요청 시점에 profile_request()로 켜면 같은 컨텍스트(작업 큐 처리, 보고서 생성 스레드)의 구간만 기록
+# 방식 (CPU_PROFILE_MODE):
+#   - sample: 구간을 실행하는 스레드의 호출 스택을 CPU_PROFILE_INTERVAL마다 기록 (실제 스택, 오버헤드 작음,
+#             LLM 응답 대기 같은 벽시계 시간도 보임)
+#   - cprofile: cProfile 호출 그래프를 호출 관계 비율로 스택에 나눠 기록 (모든 호출 포함, 단위 µs)
+#
+# 결과: CPU_PROFILE_DIR/{진단 ID}.folded - "구간;함수 (파일:줄);... 값" 형식, 같은 진단의 구간은 한 파일에 추가
+#   flamegraph.pl {진단 ID}.folded > flame.svg   또는 https://www.speedscope.app 에서 열기
+import contextvars
+import cProfile
+import functools
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from utils.metrics import current_diagnosis_id
+
+from config import PROJECT_ROOT, CPU_PROFILE, CPU_PROFILE_MODE, CPU_PROFILE_DIR, CPU_PROFILE_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# 요청 단위 프로파일링 (None이면 꺼짐, 켜져 있으면 진단 ID 또는 "")
+_request: contextvars.ContextVar = contextvars.ContextVar("cpu_profile_request", default=None)
+_write_lock = threading.Lock()
+# 스레드별 진행 중인 구간
+_active = threading.local()
+
+MAX_DEPTH = 128
+
+
+def is_requested(value) -> bool:
+    """쿼리 파라미터/본문 값이 프로파일 요청인지 확인합니다. (1, true, yes, on)"""
+    if isinstance(value, (list, tuple)):
+        value = value[0] if value else None
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+@contextmanager
+def profile_request(diagnosis_id: Optional[str] = None, enabled: bool = True):
+    """
+    블록 안(과 여기서 복사된 컨텍스트)의 프로파일 구간을 켭니다.
+    enabled가 거짓이면 아무것도 하지 않습니다.
+    """
+    if not enabled:
+        yield
+        return
+    token = _request.set(diagnosis_id or "")
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+def profiling_enabled() -> bool:
+    """현재 컨텍스트에서 프로파일링이 켜져 있는지 여부"""
+    return CPU_PROFILE or _request.get() is not None
+
+
+def _short_path(filename: str) -> str:
+    """프로젝트 파일은 프로젝트 기준 경로, 패키지 파일은 site-packages 이후 경로"""
+    filename = filename.replace(os.sep, "/")
+    root = PROJECT_ROOT.replace(os.sep, "/") + "/"
+    if filename.startswith(root):
+        return filename[len(root):]
+    if "site-packages/" in filename:
+        return filename.split("site-packages/", 1)[1]
+    return filename
+
+
+def _frame_label(code) -> str:
+    """스택 프레임 이름 - 함수 (파일:정의 줄)"""
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _label(func) -> str:
+    """pstats 함수 키 (파일, 줄, 이름) -> 스택 프레임 이름"""
+    filename, lineno, name = func
+    if filename == "~":
+        return name  # 내장 함수 (<built-in method ...>)
+    return f"{name} ({_short_path(filename)}:{lineno})"
+
+
+def _depth(frame) -> int:
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+class StackSampler:
+    """
+    등록된 스레드의 호출 스택을 주기적으로 기록하는 샘플러 (프로세스당 하나)
+    """
+
+    def __init__(self, interval: float = CPU_PROFILE_INTERVAL):
+        self.interval = interval
+        self._targets: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, thread_id: int, skip: int = 0) -> Counter:
+        """
+        스레드를 샘플링 대상으로 등록하고 스택별 샘플 수를 모을 Counter를 반환합니다.
+        skip: 기록하지 않을 바깥쪽 프레임 수 (구간 진입 전 스택)
+        """
+        counts = Counter()
+        with self._lock:
+            self._targets[thread_id] = (counts, skip)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="cpu-profile-sampler", daemon=True)
+                self._thread.start()
+        return counts
+
+    def remove(self, thread_id: int):
+        with self._lock:
+            self._targets.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._targets:
+                    self._thread = None
+                    return
+                targets = dict(self._targets)
+            frames = sys._current_frames()
+            for thread_id, (counts, skip) in targets.items():
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack = stack[:len(stack) - skip][:MAX_DEPTH]
+                if stack:
+                    counts[";".join(_frame_label(code) for code in reversed(stack))] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+_sampler = StackSampler()
+
+
+def folded_from_cprofile(profile: cProfile.Profile) -> Counter:
+    """
+    cProfile 결과를 collapsed stack(µs)으로 변환합니다.
+    cProfile은 호출자-피호출자 관계만 기록하므로, 함수의 시간을 호출 경로별 누적 시간 비율로 나눕니다.
+    """
+    stats = pstats.Stats(profile).stats
+    callees: Dict[tuple, Dict[tuple, float]] = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, {})[func] = cumulative
+    folded = Counter()
+
+    def visit(func, path, share):
+        _, _, self_time, total_time, _ = stats[func]
+        if total_time <= 0 or len(path) >= MAX_DEPTH:
+            return
+        fraction = min(share / total_time, 1.0)
+        path = path + [_label(func)]
+        micros = int(self_time * fraction * 1e6)
+        if micros:
+            folded[";".join(path)] += micros
+        for callee, cumulative in callees.get(func, {}).items():
+            if _label(callee) not in path and callee in stats:
+                visit(callee, path, cumulative * fraction)
+
+    # 프로파일 구간에서 호출자가 없는 함수 = 구간의 최상위 호출
+    for func, (_, _, _, total_time, callers) in stats.items():
+        if not callers and not func[2].startswith("<method 'disable'"):
+            visit(func, [], total_time)
+    return folded
+
+
+def write_folded(diagnosis_id: str, block: str, folded: Counter) -> Optional[str]:
+    """구간 이름을 최상위 프레임으로 붙여 진단 ID 파일에 추가합니다."""
+    if not folded:
+        return None
+    path = os.path.join(CPU_PROFILE_DIR, f"{diagnosis_id}.folded")
+    try:
+        os.makedirs(CPU_PROFILE_DIR, exist_ok=True)
+        with _write_lock, open(path, "a", encoding="utf-8") as f:
+            for stack, value in sorted(folded.items()):
+                f.write(f"{block};{stack} {value}\n")
+        return path
+    except OSError:
+        logger.exception("CPU 프로파일 저장 중 오류")
+        return None
+
+
+class ProfileBlock:
+    """프로파일 구간 하나 (diagnosis_id는 구간 안에서 정해지면 바꿀 수 있음)"""
+
+    def __init__(self, block: str, diagnosis_id: Optional[str]):
+        self.block = block
+        self.diagnosis_id = diagnosis_id
+
+
+@contextmanager
+def profile_block(block: str, diagnosis_id: Optional[str] = None):
+    """
+    프로파일링이 켜져 있으면 블록을 프로파일해 collapsed stack 파일에 기록합니다.
+    진단 ID는 인자 → 구간 안에서 지정한 값 → profile_request의 값 → 현재 트레이스 순서로 정합니다.
+
+    사용 예:
+        with profile_block("calculate_diagnosis") as profile:
+            ...
+            profile.diagnosis_id = job_id
+    """
+    # 같은 스레드에서 중첩된 구간은 바깥 구간에 포함되므로 따로 기록하지 않음
+    if not profiling_enabled() or getattr(_active, "block", None):
+        yield ProfileBlock(block, diagnosis_id)
+        return
+
+    profile = ProfileBlock(block, diagnosis_id or _request.get() or current_diagnosis_id())
+    thread_id = threading.get_ident()
+    if CPU_PROFILE_MODE == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        # 구간을 연 호출자 프레임부터 기록 (profile_block → contextlib.__enter__ → 호출자)
+        counts = _sampler.add(thread_id, skip=_depth(sys._getframe(2)) - 1)
+    _active.block = block
+    try:
+        yield profile
+    finally:
+        _active.block = None
+        if CPU_PROFILE_MODE == "cprofile":
+            profiler.disable()
+            folded = folded_from_cprofile(profiler)
+        else:
+            _sampler.remove(thread_id)
+            folded = counts
+        write_folded(profile.diagnosis_id or "unknown", block, folded)
+
+
+def profiled(block: str):
+    """함수 전체를 profile_block으로 감싸는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_block(block):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
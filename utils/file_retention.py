@@ -0,0 +1,39 @@
+# utils/file_retention.py
+# 역할: 파일 캐시 디렉토리(PDF, 복사용 보고서 텍스트)의 파일 수 제한
+#
+# 캐시 파일은 내용 해시 이름으로 한 번만 쓰고 다시 쓰지 않으므로, 새 파일을 쓸 때마다
+# 수정 시각이 오래된 파일부터 지워 최대 개수만 남깁니다. (지워진 파일은 다음 요청 때 다시 생성)
+import os
+
+from utils.metrics import incr
+
+
+def _mtime(entry: os.DirEntry) -> float:
+    try:
+        return entry.stat().st_mtime
+    except OSError:
+        return 0.0  # 이미 삭제된 파일
+
+
+def prune_oldest_files(directory: str, suffix: str, max_files: int) -> int:
+    """
+    directory의 suffix 파일이 max_files개를 넘으면 오래된 파일부터 삭제합니다.
+
+    Returns:
+        삭제한 파일 수
+    """
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.name.endswith(suffix)]
+    except FileNotFoundError:
+        return 0
+    if len(entries) <= max_files:
+        return 0
+    deleted = 0
+    for entry in sorted(entries, key=_mtime)[:len(entries) - max_files]:
+        try:
+            os.remove(entry.path)
+            deleted += 1
+        except OSError:
+            pass  # 다른 프로세스가 먼저 삭제
+    incr("cache_files_pruned_total", value=deleted, suffix=suffix)
+    return deleted
@@ -0,0 +1,216 @@
+# utils/job_queue.py
+# 역할: SQLite 기반 로컬 작업 큐 - 보고서/PDF 생성을 Streamlit 스크립트 실행과 분리합니다.
+#
+# Streamlit 앱, api_server, 추가 uvicorn 워커가 같은 DB를 공유하므로 실행 중 작업에는 소유자(owner)와
+# 소유 기한(lease_until)을 기록합니다. 소유 프로세스는 하트비트 스레드로 기한을 연장하고,
+# 다른 프로세스는 기한이 지난 작업(소유 프로세스 종료)만 다시 실행합니다.
+# 끝난 작업(done/failed)은 입력/결과를 포함해 retention_seconds 동안만 보관하고 하트비트에서 삭제합니다.
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from utils.metrics import incr, observe
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    SQLite에 작업 상태를 저장하고 백그라운드 워커 스레드로 실행하는 작업 큐 클래스
+    작업 상태가 DB에 남으므로 페이지를 새로고침해도 작업 ID로 결과를 다시 조회할 수 있습니다.
+    """
+
+    def __init__(self, db_path: str, handler: Callable[[str, Dict[str, Any], Callable], Dict[str, Any]],
+                 workers: int = 2, lease_seconds: float = 60.0, retention_seconds: float = 24 * 3600):
+        """
+        초기화
+
+        Args:
+            db_path: 작업 DB 파일 경로
+            handler: 작업 처리 함수 handler(job_id, payload, report_progress) -> 결과 딕셔너리
+            workers: 동시에 실행할 워커 수
+            lease_seconds: 실행 중 작업의 소유 기간 (하트비트로 연장, 만료되면 다른 프로세스가 복구)
+            retention_seconds: 끝난 작업을 보관하는 기간 (지나면 삭제되어 작업 ID로 조회할 수 없음)
+        """
+        self.db_path = db_path
+        self.handler = handler
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._init_db()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-worker")
+        self._recover(include_queued=True)
+        threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True).start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        """작업 테이블 생성"""
+        with self._lock, self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    message TEXT,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner TEXT,
+                    lease_until REAL
+                )
+            """)
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(jobs)")]
+            for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at)")
+
+    def _recover(self, include_queued: bool = False):
+        """
+        소유 기한이 지난 실행 중 작업(소유 프로세스 종료)을 다시 큐에 넣습니다.
+        (소유자가 살아 있는 작업은 건드리지 않음 - 같은 DB를 쓰는 다른 프로세스의 작업을 두 번 실행하지 않도록)
+
+        Args:
+            include_queued: 대기 중 작업도 이 프로세스의 워커에 넣을지 여부 (시작 시, 실행 여부는 _run의 조건부 갱신으로 결정)
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            expired = [row["id"] for row in conn.execute(
+                "SELECT id FROM jobs WHERE status = 'running' AND (lease_until IS NULL OR lease_until < ?) ORDER BY created_at",
+                (now,)
+            )]
+            # 조회 후 다른 프로세스가 먼저 복구했을 수 있으므로 같은 조건으로 갱신한 작업만 제출
+            recovered = [job_id for job_id in expired if conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, lease_until = NULL "
+                "WHERE id = ? AND status = 'running' AND (lease_until IS NULL OR lease_until < ?)",
+                (job_id, now)
+            ).rowcount]
+            queued = [row["id"] for row in conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            )] if include_queued else []
+        if recovered:
+            incr("jobs_recovered_total", value=len(recovered))
+        # 시작 시에는 복구한 작업을 포함한 모든 대기 작업을 제출
+        for job_id in (queued if include_queued else recovered):
+            self._executor.submit(self._run, job_id)
+
+    def _heartbeat(self):
+        """
+        이 프로세스가 실행 중인 작업의 소유 기한을 연장하고, 기한이 지난 다른 작업을 복구하고,
+        보관 기간이 지난 끝난 작업을 삭제합니다.
+        """
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            try:
+                with self._lock, self._connect() as conn:
+                    conn.execute(
+                        "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = 'running'",
+                        (time.time() + self.lease_seconds, self.owner)
+                    )
+                self._recover()
+                self._purge()
+            except Exception:
+                logger.exception("작업 하트비트 오류")
+
+    def _purge(self) -> int:
+        """보관 기간이 지난 끝난 작업(done/failed)을 삭제하고 삭제한 수를 반환합니다."""
+        with self._lock, self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - self.retention_seconds,)
+            ).rowcount
+        if deleted:
+            incr("jobs_purged_total", value=deleted)
+        return deleted
+
+    def submit(self, payload: Dict[str, Any]) -> str:
+        """
+        작업을 등록하고 즉시 작업 ID를 반환합니다.
+
+        Args:
+            payload: JSON 직렬화 가능한 작업 입력
+
+        Returns:
+            작업 ID
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, progress, message, payload, created_at) VALUES (?, 'queued', 0, ?, ?, ?)",
+                (job_id, "대기 중", json.dumps(payload, ensure_ascii=False), time.time())
+            )
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 상태를 조회합니다. 없으면 None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def update_progress(self, job_id: str, progress: int, message: str = ""):
+        """작업 진행률을 기록합니다."""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, message = ? WHERE id = ?",
+                (int(progress), message, job_id)
+            )
+
+    def _run(self, job_id: str):
+        """워커 스레드에서 작업 하나를 실행합니다."""
+        with self._lock, self._connect() as conn:
+            now = time.time()
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, owner = ?, lease_until = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (now, self.owner, now + self.lease_seconds, job_id)
+            ).rowcount
+            row = conn.execute("SELECT payload, created_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not claimed or row is None:
+            return
+        observe("job_queue_wait_seconds", time.time() - row["created_at"])
+
+        try:
+            result = self.handler(
+                job_id,
+                json.loads(row["payload"]),
+                lambda progress, message="": self.update_progress(job_id, progress, message)
+            )
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "UPDATE jobs SET status = 'done', progress = 100, message = ?, result = ?, finished_at = ?, "
+                    "lease_until = NULL WHERE id = ? AND owner = ?",
+                    ("완료", json.dumps(result, ensure_ascii=False), time.time(), job_id, self.owner)
+                )
+            incr("jobs_total", status="done")
+        except Exception as e:
+            logger.exception(f"작업 실행 중 오류 ({job_id})")
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', message = ?, error = ?, finished_at = ?, "
+                    "lease_until = NULL WHERE id = ? AND owner = ?",
+                    ("실패", str(e), time.time(), job_id, self.owner)
+                )
+            incr("jobs_total", status="failed")
@@ -0,0 +1,580 @@
+# utils/load_test.py
+# 역할: 동시 Streamlit 세션 부하 테스트
+#
+# 별도 프로세스로 실제 Streamlit 서버를 띄우고, 브라우저와 같은 웹소켓 프로토콜(BackMsg/ForwardMsg)로
+# 세션 N개를 동시에 접속시켜 실제 사용자 흐름을 그대로 따라갑니다.
+#   환영 페이지 → 진단 시작 → 5개 단계(무작위 응답) → 진단 완료 → 보고서 대기 → 결과 페이지
+# 세션은 서버의 실제 Runtime/ScriptRunner에서 서로 격리되어 실행되고, st.cache_resource/st.cache_data,
+# 작업 큐, 보고서 저장소, PDF 사전 생성은 운영 서버처럼 공유됩니다. RSS는 서버 프로세스 기준입니다.
+#
+# 오류는 두 가지로 나눠 집계합니다.
+#   - 서버 오류: 앱이 예외/오류 메시지를 표시했거나 서버가 연결을 끊은 경우 (측정 결과에 포함)
+#   - 하네스 오류: 클라이언트가 응답을 기다리다 시간 초과되었거나 예상한 위젯을 찾지 못한 경우 (측정에서 제외)
+#
+# LLM과 임베딩은 오프라인 대체 객체를 사용합니다. (API 호출/비용 없음)
+#   - LLM: 로그정규 분포 지연 후 마크다운 텍스트 반환 (섹션별 호출, 실제 RAGModel 파이프라인 사용)
+#   - 임베딩: 지연 후 DeterministicFakeEmbedding 결과 반환 (실제 VectorStore 색인/검색 사용)
+# DB/PDF 캐시 등 파일은 모두 임시 디렉토리에 만들어 운영 데이터에 영향을 주지 않습니다.
+#
+# 사용 예:
+#   python -m utils.load_test --concurrency 1,2,4,8 --sessions 8
+#   python -m utils.load_test --concurrency 4 --sessions 20 --llm-latency 0.5 --poll-interval 0.2
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import config
+
+APP_PATH = os.path.join(config.PROJECT_ROOT, "streamlit_app.py")
+
+# 단계 이름 (보고서 출력 순서)
+STEP_WELCOME = "welcome"
+STEP_START = "start"
+STEP_REPORT = "submit_report"  # 진단 완료 클릭 → 결과 페이지 작업 조회 → 보고서 표시
+STEP_RESULT = "result_rerun"
+
+# 결과 페이지 PDF 영역 표시 상태 (utils.report_pdf의 상태 이름)
+PDF_READY = "ready"
+PDF_PENDING = "pending"
+PDF_FAILED = "failed"
+
+# PDF 생성에 필요한 한글 글꼴 (utils/pdf_generator.py)
+KOREAN_FONT_PATH = os.path.join(config.PROJECT_ROOT, "assets", "fonts", "malgun.ttf")
+
+# 대체 LLM 응답 문단 (섹션 길이 제한 800자에 맞춰 잘림)
+STAND_IN_PARAGRAPHS = [
+    "스마트 플레이스의 기본 정보와 키워드를 점검하고, 고객이 검색하는 표현으로 상세 설명을 다듬어야 합니다.",
+    "대표 이미지와 메뉴 사진을 최신 상태로 유지하면 검색 결과에서의 클릭률이 눈에 띄게 달라집니다.",
+    "리뷰에 빠르게 답변하고 단골 고객에게 재방문 혜택을 안내해 관계를 이어가는 것이 중요합니다.",
+    "예약/문의 버튼과 쿠폰을 활성화해 방문 결정을 미루지 않도록 전환 경로를 짧게 만드세요.",
+]
+
+
+def _proc_status_mb(pid: int, field: str) -> float:
+    """/proc/<pid>/status의 메모리 항목 (Linux, MB)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return 0.0
+
+
+def rss_mb(pid: Optional[int] = None) -> float:
+    """프로세스 RSS (기본값: 현재 프로세스, MB)"""
+    return _proc_status_mb(pid or os.getpid(), "VmRSS")
+
+
+def peak_rss_mb(pid: Optional[int] = None) -> float:
+    """프로세스 최대 RSS (기본값: 현재 프로세스, MB)"""
+    return _proc_status_mb(pid or os.getpid(), "VmHWM")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """백분위수 (값이 없으면 nan)"""
+    return float(np.percentile(values, q)) if values else math.nan
+
+
+class LatencyModel:
+    """
+    로그정규 분포 지연 (중앙값 median초, 분산 sigma)
+    """
+
+    def __init__(self, median: float, sigma: float = 0.4, seed: Optional[int] = None):
+        self.median = median
+        self.sigma = sigma
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sleep(self):
+        if self.median <= 0:
+            return
+        with self._lock:
+            delay = self._rng.lognormvariate(math.log(self.median), self.sigma)
+        time.sleep(delay)
+
+
+class StandInLLM:
+    """
+    오프라인 LLM 대체 객체 (utils.usage.call_llm이 사용하는 predict만 제공)
+    """
+
+    model_name = "load-test-stand-in"
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    def predict(self, prompt: str) -> str:
+        self.latency.sleep()
+        # 프롬프트마다 다른 응답이 나오도록 문단 순서를 프롬프트 해시로 정함
+        rng = random.Random(hash(prompt))
+        paragraphs = rng.sample(STAND_IN_PARAGRAPHS, len(STAND_IN_PARAGRAPHS))
+        lines = ["### 핵심 요약", paragraphs[0], "", "### 실행 항목"]
+        lines += [f"- **{i + 1}단계**: {p}" for i, p in enumerate(paragraphs[1:])]
+        return "\n".join(lines)
+
+
+def create_stand_in_embeddings(latency: LatencyModel, size: int = 1536):
+    """지연을 주입한 DeterministicFakeEmbedding"""
+    from langchain_community.embeddings import DeterministicFakeEmbedding
+
+    class LatencyEmbedding(DeterministicFakeEmbedding):
+        def embed_documents(self, texts):
+            latency.sleep()
+            return super().embed_documents(texts)
+
+        def embed_query(self, text):
+            latency.sleep()
+            return super().embed_query(text)
+
+    return LatencyEmbedding(size=size)
+
+
+def configure_environment(workdir: str, poll_interval: float):
+    """
+    DB/캐시 경로를 임시 디렉토리로 바꿉니다.
+    utils 모듈은 `from config import ...`로 값을 복사하므로 utils를 임포트하기 전에 호출해야 합니다.
+    """
+    db_dir = os.path.join(workdir, "db")
+    config.DB_DIR = db_dir
+    config.JOB_DB_PATH = os.path.join(db_dir, "jobs.sqlite3")
+    config.REPORT_INDEX_DB_PATH = os.path.join(db_dir, "report_index.sqlite3")
+    config.REPORT_STORE_DB_PATH = os.path.join(db_dir, "report_store.sqlite3")
+    config.USAGE_DB_PATH = os.path.join(db_dir, "usage.sqlite3")
+    config.PDF_CACHE_DIR = os.path.join(workdir, "pdf_cache")
+    # 사전 생성 라이브러리를 쓰지 않아야 보고서 생성 경로(full/nearest/template)가 측정됨
+    config.REPORT_LIBRARY_PATH = os.path.join(workdir, "report_library.json.gz")
+    config.JOB_POLL_INTERVAL = poll_interval
+    # 결과 페이지/리소스 로드가 벡터 스토어를 사용하도록 openai 백엔드 경로로 실행 (모델은 대체 객체)
+    config.RAG_BACKEND = "openai"
+    os.makedirs(db_dir, exist_ok=True)
+
+
+def install_stand_ins(workdir: str, llm_latency: LatencyModel, embedding_latency: LatencyModel):
+    """대체 LLM/임베딩으로 만든 RAGModel과 VectorStore를 공유 인스턴스로 등록합니다."""
+    from utils.model_registry import register_instance
+    from utils.rag_model import RAGModel
+    from utils.response_cache import ResponseCache
+    from utils.vector_store import VectorStore
+
+    class LoadTestRAGModel(RAGModel):
+        def __init__(self, vector_store):
+            # API 키 확인/테스트 호출 없이 대체 LLM으로 초기화
+            self.response_cache = ResponseCache(maxsize=config.RESPONSE_CACHE_SIZE)
+            self.llm = StandInLLM(llm_latency)
+            self.vector_store = vector_store
+
+    start = time.perf_counter()
+    vector_store = VectorStore(embeddings=create_stand_in_embeddings(embedding_latency),
+                               index_dir=os.path.join(workdir, "vector_index"))
+    register_instance("vector_store", vector_store)
+    register_instance("rag_model", LoadTestRAGModel(vector_store))
+    print(f"대체 모델/색인 준비 {time.perf_counter() - start:.2f}초")
+
+
+
+def serve(workdir: str, port: int, args: argparse.Namespace):
+    """
+    부하 테스트용 Streamlit 서버를 현재 프로세스에서 실행합니다. (대체 모델 등록 후 streamlit run과 같은 방식)
+    앱 스크립트가 같은 프로세스에서 실행되므로 등록한 대체 모델을 그대로 사용합니다.
+    """
+    from streamlit.web import bootstrap
+
+    configure_environment(workdir, args.poll_interval)
+    install_stand_ins(workdir, LatencyModel(args.llm_latency, args.sigma, args.seed),
+                      LatencyModel(args.embedding_latency, args.sigma, args.seed + 1))
+    flag_options = {
+        "server_port": port,
+        "server_address": "127.0.0.1",
+        "server_headless": True,
+        "server_fileWatcherType": "none",
+        "browser_gatherUsageStats": False,
+        "logger_level": "error",
+    }
+    bootstrap.load_config_options(flag_options)
+    bootstrap.run(APP_PATH, False, [], flag_options)
+
+
+def start_server(workdir: str, port: int, args: argparse.Namespace, timeout: float = 120.0) -> subprocess.Popen:
+    """서버 프로세스를 시작하고 상태 확인 엔드포인트가 응답할 때까지 기다립니다."""
+    from urllib.error import URLError
+    from urllib.request import urlopen
+
+    command = [sys.executable, "-m", "utils.load_test", "--serve-port", str(port), "--workdir", workdir,
+               "--llm-latency", str(args.llm_latency), "--embedding-latency", str(args.embedding_latency),
+               "--sigma", str(args.sigma), "--poll-interval", str(args.poll_interval), "--seed", str(args.seed)]
+    server = subprocess.Popen(command, cwd=config.PROJECT_ROOT)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"서버 프로세스가 종료되었습니다. (종료 코드 {server.returncode})")
+        try:
+            with urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return server
+        except (URLError, OSError):
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"서버가 {timeout:.0f}초 안에 준비되지 않았습니다.")
+
+
+class ServerError(Exception):
+    """앱/서버가 만든 오류 (측정 결과에 포함)"""
+
+
+class HarnessError(Exception):
+    """부하 테스트 클라이언트 쪽 오류 (측정에서 제외)"""
+
+
+class SessionClient:
+    """
+    브라우저 대신 웹소켓으로 앱 세션 하나를 조작하는 클라이언트
+
+    브라우저처럼 화면의 위젯 값을 보관했다가 재실행 요청(BackMsg.rerun_script)에 함께 보내고,
+    서버가 보낸 ForwardMsg로 현재 실행의 요소 목록을 만듭니다. (캐시 참조 메시지는 받은 메시지로 대체)
+    """
+
+    def __init__(self, port: int, timeout: float):
+        self.port = port
+        self.timeout = timeout
+        self.elements: Dict[tuple, Any] = {}
+        self.query_string = ""
+        self.page_script_hash = ""
+        self._values: Dict[str, int] = {}
+        self._cache: Dict[str, Any] = {}
+        self._ws = None
+
+    async def connect(self):
+        from tornado.websocket import websocket_connect
+
+        try:
+            self._ws = await asyncio.wait_for(
+                websocket_connect(f"ws://127.0.0.1:{self.port}/_stcore/stream", max_message_size=64 * 1024 * 1024),
+                self.timeout)
+        except (asyncio.TimeoutError, OSError) as e:
+            raise HarnessError(f"웹소켓 연결 실패: {type(e).__name__}: {e}")
+
+    def close(self):
+        if self._ws is not None:
+            self._ws.close()
+
+    def widgets(self, kind: str) -> List[Any]:
+        """현재 화면의 위젯 목록 (kind: button, radio, download_button, ...)"""
+        return [getattr(e, kind) for e in self.elements.values() if e.WhichOneof("type") == kind]
+
+    def find(self, kind: str, key: Optional[str] = None, label: Optional[str] = None):
+        """key(위젯 ID 끝부분) 또는 label로 위젯을 찾습니다. 없으면 HarnessError"""
+        for widget in self.widgets(kind):
+            if (key is not None and widget.id.endswith(f"-{key}")) or (label is not None and widget.label == label):
+                return widget
+        raise HarnessError(f"{kind} 위젯을 찾지 못했습니다. (key={key}, label={label})")
+
+    def set_radio(self, widget, index: int):
+        self._values[widget.id] = index
+
+    def texts(self) -> List[str]:
+        """현재 화면의 제목/마크다운/알림 텍스트"""
+        texts = []
+        for element in self.elements.values():
+            kind = element.WhichOneof("type")
+            if kind in ("heading", "markdown", "alert"):
+                texts.append(getattr(element, kind).body)
+        return texts
+
+    def _widget_states(self, trigger: Optional[str]):
+        from streamlit.proto.WidgetStates_pb2 import WidgetStates
+
+        states = WidgetStates()
+        for radio in self.widgets("radio"):
+            state = states.widgets.add()
+            state.id = radio.id
+            state.int_value = self._values.get(radio.id, radio.value if radio.set_value else radio.default)
+        for checkbox in self.widgets("checkbox"):
+            state = states.widgets.add()
+            state.id = checkbox.id
+            state.bool_value = checkbox.value if checkbox.set_value else checkbox.default
+        if trigger is not None:
+            state = states.widgets.add()
+            state.id = trigger
+            state.trigger_value = True
+        return states
+
+    async def rerun(self, trigger: Optional[str] = None):
+        """
+        재실행을 요청하고 스크립트가 끝까지 실행될 때까지 기다립니다.
+        (앱이 st.rerun()으로 이어서 실행하는 동안은 계속 기다림)
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        msg.rerun_script.page_script_hash = self.page_script_hash
+        msg.rerun_script.widget_states.CopyFrom(self._widget_states(trigger))
+        await self._ws.write_message(msg.SerializeToString(), binary=True)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            status = await self._receive(deadline)
+            if status is None:
+                continue
+            if status == "FINISHED_SUCCESSFULLY":
+                break
+            if status == "FINISHED_WITH_COMPILE_ERROR":
+                raise ServerError("스크립트 컴파일 오류")
+        for element in self.elements.values():
+            if element.WhichOneof("type") == "exception":
+                raise ServerError(f"{element.exception.type}: {element.exception.message}")
+            if element.WhichOneof("type") == "alert" and element.alert.format == element.alert.ERROR:
+                raise ServerError(element.alert.body)
+
+    async def _receive(self, deadline: float) -> Optional[str]:
+        """ForwardMsg 하나를 처리합니다. 스크립트 실행이 끝났으면 종료 상태 이름을 반환"""
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise HarnessError(f"{self.timeout:.0f}초 안에 스크립트 실행이 끝나지 않았습니다.")
+        try:
+            payload = await asyncio.wait_for(self._ws.read_message(), remaining)
+        except asyncio.TimeoutError:
+            raise HarnessError(f"{self.timeout:.0f}초 안에 스크립트 실행이 끝나지 않았습니다.")
+        if payload is None:
+            raise ServerError("서버가 웹소켓 연결을 닫았습니다.")
+        msg = ForwardMsg()
+        msg.ParseFromString(payload)
+        if msg.WhichOneof("type") == "ref_hash":
+            msg = await self._dereference(msg)
+        elif msg.metadata.cacheable:
+            self._cache[msg.hash] = msg
+
+        kind = msg.WhichOneof("type")
+        if kind == "new_session":
+            # 새 실행 시작 - 이번 실행에서 받은 요소만 화면에 남음
+            self.elements = {}
+            self.page_script_hash = msg.new_session.page_script_hash
+        elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            self.elements[tuple(msg.metadata.delta_path)] = msg.delta.new_element
+        elif kind == "page_info_changed":
+            self.query_string = msg.page_info_changed.query_string
+        elif kind == "script_finished":
+            return ForwardMsg.ScriptFinishedStatus.Name(msg.script_finished)
+        return None
+
+    async def _dereference(self, ref):
+        """캐시 참조 메시지를 이전에 받은 메시지(없으면 서버에서 조회)로 바꿉니다."""
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        cached = self._cache.get(ref.ref_hash)
+        msg = ForwardMsg()
+        if cached is not None:
+            msg.CopyFrom(cached)
+        else:
+            from tornado.httpclient import AsyncHTTPClient
+            response = await AsyncHTTPClient().fetch(f"http://127.0.0.1:{self.port}/_stcore/message?hash={ref.ref_hash}")
+            msg.ParseFromString(response.body)
+        msg.metadata.CopyFrom(ref.metadata)
+        return msg
+
+
+def job_tier(answers: Dict[str, str]) -> Optional[str]:
+    """
+    같은 응답으로 제출된 가장 최근 작업의 보고서 단계 (full/nearest/template/...)
+
+    URL의 ?job= 값은 앱이 설정한 직후 st.rerun()으로 다음 실행이 시작되면 전송 대기열과 함께 지워질 수 있어
+    (Streamlit은 실행 시작 시 아직 보내지 않은 메시지를 버림) 응답 내용으로 작업을 찾습니다.
+    """
+    with sqlite3.connect(config.JOB_DB_PATH, timeout=30) as conn:
+        rows = conn.execute(
+            "SELECT payload, result FROM jobs WHERE result IS NOT NULL ORDER BY created_at DESC"
+        ).fetchall()
+    for payload, result in rows:
+        if json.loads(payload)["answers"] == answers:
+            return json.loads(result)["report_data"].get("tier")
+    return None
+
+
+def pdf_state(client: SessionClient) -> str:
+    """결과 페이지에 표시된 PDF 상태"""
+    if client.widgets("download_button"):
+        return PDF_READY
+    if any(button.id.endswith("-pdf_refresh") for button in client.widgets("button")):
+        return PDF_PENDING
+    return PDF_FAILED
+
+
+async def run_session(port: int, seed: int, max_wait: float) -> Dict[str, Any]:
+    """
+    세션 하나로 전체 흐름을 실행하고 단계별 소요 시간을 반환합니다.
+
+    Returns:
+        {"steps": {단계: 초}, "tier": 보고서 단계, "pdf": PDF 상태,
+         "error": 오류 메시지 또는 None, "error_kind": "server"/"harness"/None}
+    """
+    from utils.questions import diagnosis_questions
+
+    rng = random.Random(seed)
+    steps: Dict[str, float] = {}
+    answers: Dict[str, str] = {}
+    client = SessionClient(port, max_wait)
+
+    async def timed_step(name, action):
+        start = time.perf_counter()
+        await action()
+        steps[name] = time.perf_counter() - start
+
+    async def welcome():
+        await client.connect()
+        await client.rerun()
+
+    async def start():
+        # 환영 페이지 버튼은 다음 실행에서 진단 페이지를 표시
+        await client.rerun(client.find("button", label="진단 시작하기").id)
+        await client.rerun()
+
+    try:
+        await timed_step(STEP_WELCOME, welcome)
+        await timed_step(STEP_START, start)
+
+        stages = list(diagnosis_questions)
+        for i, stage in enumerate(stages):
+            for question in diagnosis_questions[stage]:
+                radio = client.find("radio", key=f"radio_{question['id']}")
+                index = rng.randrange(len(radio.options))
+                client.set_radio(radio, index)
+                # 앱과 같은 방식으로 선택지 문구 앞부분을 응답 값으로 사용
+                answers[question["id"]] = radio.options[index].split(".")[0]
+            next_button = client.find("button", key="next_button").id
+            # 마지막 단계: 결과 페이지가 작업 진행 상태를 조회하며(st.rerun) 보고서가 준비될 때까지 다시 실행됨
+            name = STEP_REPORT if i == len(stages) - 1 else f"stage_{i + 1}"
+            await timed_step(name, lambda: client.rerun(next_button))
+
+        if not any("진단 결과" in text for text in client.texts()):
+            raise ServerError("결과 페이지가 표시되지 않았습니다.")
+        # 보고서가 표시된 결과 페이지의 재실행 (위젯 조작/새로고침 비용)
+        await timed_step(STEP_RESULT, client.rerun)
+
+        return {"steps": steps, "tier": job_tier(answers), "pdf": pdf_state(client), "error": None, "error_kind": None}
+    except ServerError as e:
+        return {"steps": steps, "tier": None, "pdf": None, "error": str(e), "error_kind": "server"}
+    except HarnessError as e:
+        return {"steps": steps, "tier": None, "pdf": None, "error": str(e), "error_kind": "harness"}
+    finally:
+        client.close()
+
+
+async def run_level(port: int, server_pid: int, concurrency: int, sessions: int, seed: int,
+                    max_wait: float) -> Dict[str, Any]:
+    """동시 세션 수 하나에 대한 부하 실행"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i):
+        async with semaphore:
+            return await run_session(port, seed + i, max_wait)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(limited(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    return {"concurrency": concurrency, "elapsed": elapsed, "results": list(results),
+            "rss": rss_mb(server_pid), "peak_rss": peak_rss_mb(server_pid)}
+
+
+def print_level(level: Dict[str, Any]):
+    """동시 세션 수별 처리량/단계 지연 백분위수/서버 RSS 출력 (하네스 오류 세션은 집계에서 제외)"""
+    results = level["results"]
+    measured = [r for r in results if r["error_kind"] != "harness"]
+    ok = [r for r in measured if r["error"] is None]
+    harness = len(results) - len(measured)
+    print(f"\n=== 동시 세션 {level['concurrency']} | 완료 {len(ok)}/{len(measured)} | "
+          f"{len(ok) / level['elapsed']:.3f} 세션/초 | 소요 {level['elapsed']:.1f}초 | "
+          f"서버 RSS {level['rss']:.1f}MB (최대 {level['peak_rss']:.1f}MB)"
+          + (f" | 측정 제외(하네스 오류) {harness}" if harness else ""))
+
+    step_names = []
+    for r in results:
+        step_names += [name for name in r["steps"] if name not in step_names]
+    print(f"{'단계':14s} {'p50(ms)':>10s} {'p95(ms)':>10s} {'p99(ms)':>10s} {'최대(ms)':>10s}")
+    for name in step_names:
+        values = [r["steps"][name] * 1000 for r in ok if name in r["steps"]]
+        if not values:
+            continue
+        print(f"{name:14s} {percentile(values, 50):10.1f} {percentile(values, 95):10.1f} "
+              f"{percentile(values, 99):10.1f} {max(values):10.1f}")
+
+    totals = [sum(r["steps"].values()) * 1000 for r in ok]
+    if totals:
+        print(f"{'(세션 전체)':14s} {percentile(totals, 50):10.1f} {percentile(totals, 95):10.1f} "
+              f"{percentile(totals, 99):10.1f} {max(totals):10.1f}")
+
+    tiers: Dict[str, int] = {}
+    pdfs: Dict[str, int] = {}
+    for r in ok:
+        tiers[r["tier"]] = tiers.get(r["tier"], 0) + 1
+        pdfs[r["pdf"]] = pdfs.get(r["pdf"], 0) + 1
+    if ok and set(pdfs) == {PDF_FAILED} and not os.path.exists(KOREAN_FONT_PATH):
+        # 글꼴이 없으면 모든 PDF가 실패하므로 측정값이 아님
+        pdf_text = f"측정 안 됨 (한글 글꼴 {os.path.relpath(KOREAN_FONT_PATH, config.PROJECT_ROOT)} 없음)"
+    else:
+        pdf_text = str(pdfs)
+    print(f"보고서 단계: {tiers} | PDF: {pdf_text}")
+    for r in results:
+        if r["error_kind"] == "server":
+            print(f"  서버 오류: {r['error']}")
+        elif r["error_kind"] == "harness":
+            print(f"  하네스 오류 (측정 제외): {r['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="동시 Streamlit 세션 부하 테스트 (오프라인 LLM/임베딩)")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="동시 세션 수 목록 (쉼표 구분, 순서대로 실행)")
+    parser.add_argument("--sessions", type=int, default=0, help="단계별 세션 수 (0이면 동시 세션 수의 2배)")
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="LLM 섹션 호출 지연 중앙값 (초)")
+    parser.add_argument("--embedding-latency", type=float, default=0.15, help="임베딩 호출 지연 중앙값 (초)")
+    parser.add_argument("--sigma", type=float, default=0.4, help="지연 로그정규 분산")
+    parser.add_argument("--poll-interval", type=float, default=config.JOB_POLL_INTERVAL, help="결과 페이지 작업 조회 주기 (초)")
+    parser.add_argument("--max-wait", type=float, default=300.0, help="스크립트 실행 1회 최대 시간 (보고서 대기 포함, 초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8599, help="부하 테스트 서버 포트")
+    parser.add_argument("--keep", action="store_true", help="임시 디렉토리(DB/PDF)를 지우지 않음")
+    # 내부용: 서버 프로세스 실행
+    parser.add_argument("--serve-port", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_port is not None:
+        serve(args.workdir, args.serve_port, args)
+        sys.exit(0)
+
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    configure_environment(workdir, args.poll_interval)
+    server = start_server(workdir, args.port, args)
+    print(f"작업 디렉토리 {workdir} | LLM 지연 중앙값 {args.llm_latency}초, 임베딩 {args.embedding_latency}초 | "
+          f"작업 큐 워커 {config.JOB_WORKERS}, 마감 {config.REPORT_DEADLINE_SECONDS}초 | "
+          f"서버 PID {server.pid}, RSS {rss_mb(server.pid):.1f}MB")
+
+    # 앞 단계에서 채워진 캐시/보고서 색인은 다음 단계에도 남음 (운영 중인 서버와 같은 조건)
+    seed = args.seed
+    try:
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            sessions = args.sessions or concurrency * 2
+            print_level(asyncio.run(run_level(args.port, server.pid, concurrency, sessions, seed, args.max_wait)))
+            seed += sessions
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
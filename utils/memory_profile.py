@@ -0,0 +1,318 @@
+# utils/memory_profile.py
+# 역할: tracemalloc 기반 메모리 프로파일링 (MEMORY_PROFILE=true 일 때만 동작)
+#
+# - 파이프라인 단계 경계(metrics.span 종료, config.MEMORY_PROFILE_STAGES)마다 스냅샷을 찍고,
+#   직전 스냅샷 이후 늘어난 할당을 그 단계에 귀속시킵니다. 추적은 첫 단계 경계에서 시작하므로
+#   모듈 임포트 등 시작 시점 할당은 제외되고, 운영 중 늘어나는 메모리만 보입니다.
+# - 할당 위치의 호출 스택을 안쪽 프레임부터 보며 구성 요소(VectorStore, RAGModel, PDFGenerator,
+#   ReportStore, session_state, metrics)를 판별합니다. 어느 것에도 속하지 않으면 other
+# - 보고서는 탭 구분 텍스트(타임스탬프 없음, 정렬된 순서)로 MEMORY_PROFILE_DIR에 기록되어
+#   두 실행 결과를 diff로 비교할 수 있습니다.
+#
+# 누수 회귀 검사 (진단 1,000회 실행 후 메모리 증가량이 한도 이내인지 확인, 초과 시 종료 코드 1):
+#   python -m utils.memory_profile --runs 1000 --max-growth-kb 1024
+import logging
+import os
+import threading
+import tracemalloc
+from typing import Dict, Optional
+
+from config import (
+    PROJECT_ROOT, MEMORY_PROFILE, MEMORY_PROFILE_DIR, MEMORY_PROFILE_FRAMES, MEMORY_PROFILE_TOP
+)
+
+logger = logging.getLogger(__name__)
+
+OTHER = "other"
+
+# 구성 요소별 파일 경로 패턴 (호출 스택의 안쪽 프레임부터 처음 일치하는 구성 요소로 귀속)
+COMPONENTS = (
+    ("VectorStore", ("utils/vector_store.py", "utils/vector_backends.py", "utils/chroma_store.py",
+                     "utils/query_embeddings.py", "/faiss/", "/chromadb/", "/hnswlib")),
+    ("RAGModel", ("utils/rag_model.py", "utils/rag_core.py", "utils/rag_diagnosis.py", "utils/rag_generator.py",
+                  "utils/mock_rag_model.py", "utils/prompt_templates.py", "utils/usage.py",
+                  "utils/openai_client.py", "/langchain", "/openai/", "/tiktoken/", "/httpx/")),
+    ("PDFGenerator", ("utils/pdf_generator.py", "utils/report_pdf.py", "/reportlab/")),
+    ("ReportStore", ("utils/report_store.py", "utils/report_policy.py", "utils/report_index.py",
+                     "utils/report_library.py", "utils/single_flight.py", "utils/job_queue.py")),
+    ("session_state", ("streamlit_app.py", "utils/app_cache.py", "/streamlit/runtime/state/")),
+    ("metrics", ("utils/metrics.py",)),
+)
+
+# 프로파일러 자신과 임포트 시스템의 할당은 제외
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+def _relative(filename: str) -> str:
+    """프로젝트 파일은 프로젝트 기준 경로, 패키지 파일은 site-packages 이후 경로"""
+    filename = filename.replace(os.sep, "/")
+    root = PROJECT_ROOT.replace(os.sep, "/") + "/"
+    if filename.startswith(root):
+        return filename[len(root):]
+    marker = "site-packages/"
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return filename
+
+
+def component_of(traceback: tracemalloc.Traceback) -> str:
+    """할당 호출 스택의 구성 요소 이름"""
+    # Traceback은 바깥 프레임 → 안쪽 프레임 순서
+    for frame in reversed(traceback):
+        filename = frame.filename.replace(os.sep, "/")
+        for name, patterns in COMPONENTS:
+            if any(pattern in filename for pattern in patterns):
+                return name
+    return OTHER
+
+
+def site_of(traceback: tracemalloc.Traceback) -> str:
+    """할당 위치 (가장 안쪽 프레임, 프로젝트 밖이면 가장 안쪽 프로젝트 프레임을 덧붙임)"""
+    innermost = traceback[-1]
+    site = f"{_relative(innermost.filename)}:{innermost.lineno}"
+    root = PROJECT_ROOT.replace(os.sep, "/")
+    if not innermost.filename.replace(os.sep, "/").startswith(root):
+        for frame in reversed(traceback):
+            filename = frame.filename.replace(os.sep, "/")
+            if filename.startswith(root) and "site-packages" not in filename:
+                return f"{site} <- {_relative(frame.filename)}:{frame.lineno}"
+    return site
+
+
+class MemoryProfiler:
+    """
+    단계 경계 스냅샷 비교로 구성 요소별 할당 증가량을 집계하는 클래스
+    """
+
+    def __init__(self, frames: int = MEMORY_PROFILE_FRAMES, top: int = MEMORY_PROFILE_TOP,
+                 report_path: Optional[str] = None):
+        """
+        초기화
+
+        Args:
+            frames: 할당 위치별 호출 스택 깊이
+            top: 단계별로 기록할 증가량 상위 할당 위치 수
+            report_path: 보고서 파일 경로 (None이면 MEMORY_PROFILE_DIR/memory-{pid}.txt)
+        """
+        self.frames = frames
+        self.top = top
+        self.report_path = report_path or os.path.join(MEMORY_PROFILE_DIR, f"memory-{os.getpid()}.txt")
+        self.checkpoints = 0
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._current: Dict[str, int] = {}
+        self._stages: Dict[str, Dict] = {}
+        self._labels: Dict[tracemalloc.Traceback, tuple] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> tracemalloc.Snapshot:
+        """추적을 시작하고 기준 스냅샷을 찍어 반환합니다."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            self._previous = self._snapshot()
+            return self._previous
+
+    @property
+    def latest(self) -> Optional[tracemalloc.Snapshot]:
+        """마지막 스냅샷"""
+        return self._previous
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    def _label(self, traceback: tracemalloc.Traceback) -> tuple:
+        """(구성 요소, 할당 위치) - 호출 스택별로 한 번만 계산"""
+        label = self._labels.get(traceback)
+        if label is None:
+            label = self._labels[traceback] = (component_of(traceback), site_of(traceback))
+        return label
+
+    def compare(self, snapshot: tracemalloc.Snapshot, previous: tracemalloc.Snapshot):
+        """
+        두 스냅샷의 구성 요소별 현재 크기/증가량과 할당 위치별 증가량
+
+        Returns:
+            (현재 크기, 증가량, 할당 위치별 증가량) - 모두 바이트
+        """
+        current: Dict[str, int] = {}
+        growth: Dict[str, int] = {}
+        sites: Dict[str, int] = {}
+        for diff in snapshot.compare_to(previous, "traceback"):
+            component, site = self._label(diff.traceback)
+            current[component] = current.get(component, 0) + diff.size
+            if diff.size_diff:
+                growth[component] = growth.get(component, 0) + diff.size_diff
+                sites[site] = sites.get(site, 0) + diff.size_diff
+        return current, growth, sites
+
+    def checkpoint(self, stage: str) -> Dict[str, int]:
+        """
+        단계 경계 스냅샷 - 직전 스냅샷 이후의 증가량을 stage에 귀속하고 보고서를 다시 씁니다.
+        추적 중이 아니면 추적을 시작하고(첫 단계 경계가 기준점) 빈 결과를 반환합니다.
+
+        Returns:
+            구성 요소별 증가량 (바이트)
+        """
+        if self._previous is None or not tracemalloc.is_tracing():
+            self.start()
+            return {}
+        with self._lock:
+            snapshot = self._snapshot()
+            current, growth, sites = self.compare(snapshot, self._previous)
+            self._previous = snapshot
+            self._current = current
+            self.checkpoints += 1
+            entry = self._stages.setdefault(stage, {"checkpoints": 0, "growth": {}, "sites": {}})
+            entry["checkpoints"] += 1
+            for component, size in growth.items():
+                entry["growth"][component] = entry["growth"].get(component, 0) + size
+            for site, size in sites.items():
+                entry["sites"][site] = entry["sites"].get(site, 0) + size
+            self.write_report()
+        return growth
+
+    def report(self) -> str:
+        """
+        diff로 비교할 수 있는 탭 구분 보고서
+            current  구성 요소  현재 크기(KB)
+            growth   단계  구성 요소  누적 증가량(KB)
+            site     단계  누적 증가량(KB)  할당 위치
+        """
+        lines = [f"# 메모리 프로파일 (스냅샷 {self.checkpoints}회, 스택 깊이 {self.frames})"]
+        for component in sorted(self._current):
+            lines.append(f"current\t{component}\t{self._current[component] / 1024:.1f}")
+        for stage in sorted(self._stages):
+            entry = self._stages[stage]
+            lines.append(f"stage\t{stage}\tcheckpoints={entry['checkpoints']}")
+            for component in sorted(entry["growth"]):
+                lines.append(f"growth\t{stage}\t{component}\t{entry['growth'][component] / 1024:+.1f}")
+            top = sorted(entry["sites"].items(), key=lambda item: (-item[1], item[0]))[:self.top]
+            for site, size in top:
+                lines.append(f"site\t{stage}\t{size / 1024:+.1f}\t{site}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self):
+        """보고서를 파일에 씁니다."""
+        try:
+            os.makedirs(os.path.dirname(self.report_path) or ".", exist_ok=True)
+            with open(self.report_path, "w", encoding="utf-8") as f:
+                f.write(self.report())
+        except OSError:
+            logger.exception("메모리 프로파일 보고서 저장 중 오류")
+
+
+_profiler: Optional[MemoryProfiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_memory_profiler() -> MemoryProfiler:
+    """프로세스 공용 메모리 프로파일러를 반환합니다."""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = MemoryProfiler()
+        return _profiler
+
+
+def checkpoint(stage: str):
+    """MEMORY_PROFILE이 켜져 있으면 단계 경계 스냅샷을 찍습니다. (metrics.span에서 호출)"""
+    if MEMORY_PROFILE:
+        get_memory_profiler().checkpoint(stage)
+
+
+# 누수 회귀 검사: 오프라인 대체 모델로 진단 → 보고서 → PDF 파이프라인을 반복 실행하고,
+# 캐시가 가득 찬 뒤(워밍업 이후)의 메모리 증가량이 한도 이내인지 확인합니다.
+if __name__ == "__main__":
+    import argparse
+    import gc
+    import random
+    import shutil
+    import sys
+    import tempfile
+    import time
+
+    parser = argparse.ArgumentParser(description="메모리 누수 회귀 검사")
+    parser.add_argument("--runs", type=int, default=1000, help="측정 구간 진단 횟수")
+    parser.add_argument("--warmup", type=int, default=300, help="캐시를 채우는 워밍업 진단 횟수 (측정 제외)")
+    parser.add_argument("--max-growth-kb", type=float, default=1024.0, help="측정 구간 허용 증가량 (KB)")
+    parser.add_argument("--every", type=int, default=100, help="중간 스냅샷 주기")
+    # 스택 깊이에 따라 추적 비용이 크게 달라짐 (PDF 1건: 추적 없음 30ms, 1프레임 0.2초, 10프레임 1.8초)
+    # 기본값 1은 증가량 검사용이고, 구성 요소별 귀속이 필요하면 --frames 10 이상으로 실행
+    parser.add_argument("--frames", type=int, default=1, help="호출 스택 깊이 (구성 요소 판별은 10 이상 권장)")
+    parser.add_argument("--no-pdf", action="store_true", help="PDF 생성 제외")
+    parser.add_argument("--report", default=os.path.join(MEMORY_PROFILE_DIR, "leakcheck.txt"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # utils 모듈을 임포트하기 전에 DB/캐시 경로를 임시 디렉토리로 변경 (부하 테스트와 같은 오프라인 환경)
+    from utils.load_test import LatencyModel, configure_environment, install_stand_ins
+    workdir = tempfile.mkdtemp(prefix="leakcheck_")
+    configure_environment(workdir, poll_interval=0)
+    install_stand_ins(workdir, LatencyModel(0), LatencyModel(0))
+
+    from utils.model_registry import get_rag_model
+    from utils.questions import build_question_index, calculate_score, suggest_improvements
+    from utils.report_policy import generate_report_tiered
+    from utils.report_store import get_report_store
+    from utils.report_pdf import pdf_key, render_pdf
+
+    question_index = build_question_index()["questions"]
+    rng = random.Random(args.seed)
+    pdf_errors = []
+
+    def run_diagnosis():
+        answers = {qid: rng.choice(q["values"]) for qid, q in question_index.items()}
+        diagnosis_result = calculate_score(answers)
+        diagnosis_result["improvements"] = suggest_improvements(diagnosis_result)
+        report = generate_report_tiered(get_rag_model(), answers=answers, diagnosis_result=diagnosis_result)
+        store = get_report_store()
+        diagnosis_id, report_id = store.put(diagnosis_result), store.put(report)
+        store.get(diagnosis_id), store.get(report_id)
+        if not args.no_pdf:
+            try:
+                render_pdf(diagnosis_result, report, pdf_key(diagnosis_id, report_id))
+            except Exception as e:
+                pdf_errors.append(f"{type(e).__name__}: {e}")
+
+    try:
+        # 워밍업도 추적해야 캐시 항목 교체(추적 전 할당 해제 + 추적 중 할당)가 증가량으로 잡히지 않음
+        profiler = MemoryProfiler(frames=args.frames, report_path=args.report)
+        profiler.start()
+        start = time.perf_counter()
+        for _ in range(args.warmup):
+            run_diagnosis()
+        gc.collect()
+        print(f"워밍업 {args.warmup}회 {time.perf_counter() - start:.1f}초")
+
+        baseline = profiler.start()
+        start = time.perf_counter()
+        for i in range(1, args.runs + 1):
+            run_diagnosis()
+            if i % args.every == 0 or i == args.runs:
+                gc.collect()
+                profiler.checkpoint("leakcheck")
+                _, growth, _ = profiler.compare(profiler.latest, baseline)
+                print(f"{i:5d}회 증가량 {sum(growth.values()) / 1024:+8.1f}KB  "
+                      + "  ".join(f"{c} {s / 1024:+.1f}" for c, s in sorted(growth.items())))
+        elapsed = time.perf_counter() - start
+
+        _, growth, sites = profiler.compare(profiler.latest, baseline)
+        total = sum(growth.values())
+        print(f"\n진단 {args.runs}회 {elapsed:.1f}초 | 증가량 {total / 1024:+.1f}KB "
+              f"(진단당 {total / args.runs:+.0f}B, 한도 {args.max_growth_kb:.0f}KB) | 보고서 {args.report}")
+        for site, size in sorted(sites.items(), key=lambda item: -item[1])[:10]:
+            print(f"  {size / 1024:+8.1f}KB  {site}")
+        if pdf_errors:
+            print(f"PDF 생성 실패 {len(pdf_errors)}회 (예: {pdf_errors[0]}) - PDFGenerator 할당은 측정되지 않음")
+        tracemalloc.stop()
+        if total > args.max_growth_kb * 1024:
+            print("실패: 메모리 증가량이 한도를 넘었습니다.")
+            sys.exit(1)
+        print("통과")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,215 @@
+# utils/metrics.py
+# 역할: 파이프라인 단계별 실행 시간, 토큰 수, 캐시 적중, 큐 대기 시간을 기록하는 계측 모듈
+#
+# - span(): 단계 실행 시간을 히스토그램으로 기록하고, 진행 중인 진단 트레이스가 있으면 함께 남깁니다.
+# - incr()/observe(): 카운터와 히스토그램 값 기록
+# - export_prometheus(): Prometheus 텍스트 형식 내보내기
+# - start_trace()/get_trace(): 진단 단위 JSON 트레이스
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import memory_profile
+
+from config import TRACE_DIR, MEMORY_PROFILE, MEMORY_PROFILE_STAGES
+
+logger = logging.getLogger(__name__)
+
+# 히스토그램 버킷 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+MAX_TRACES = 200
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Tuple], float] = {}
+_histograms: Dict[Tuple[str, Tuple], Dict[str, Any]] = {}
+_traces: "OrderedDict[str, Trace]" = OrderedDict()
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+
+
+def _label_key(labels: Dict[str, Any]) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Trace:
+    """
+    진단 한 건의 단계별 기록
+    """
+
+    def __init__(self, diagnosis_id: str):
+        """초기화"""
+        self.diagnosis_id = diagnosis_id
+        self.started_at = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self.events: List[Dict[str, Any]] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "diagnosis_id": self.diagnosis_id,
+            "started_at": self.started_at,
+            "spans": list(self.spans),
+            "events": list(self.events)
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+
+def incr(name: str, value: float = 1, **labels):
+    """카운터 값을 증가시키고 진행 중인 트레이스에 이벤트로 남깁니다."""
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.events.append({"name": name, "value": value, "labels": labels, "at": time.time()})
+
+
+def observe(name: str, value: float, buckets=DEFAULT_BUCKETS, **labels):
+    """히스토그램에 값을 기록합니다."""
+    key = (name, _label_key(labels))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            _histograms[key] = hist
+        for i, bound in enumerate(hist["buckets"]):
+            if value <= bound:
+                hist["counts"][i] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """
+    단계 실행 시간을 stage_duration_seconds 히스토그램과 현재 트레이스에 기록합니다.
+
+    사용 예:
+        with span("vector_store.similarity_search", k=3):
+            docs = self.vectorstore.similarity_search(query, k=3)
+    """
+    start = time.perf_counter()
+    started_at = time.time()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        observe("stage_duration_seconds", duration, stage=stage)
+        if error:
+            incr("stage_errors_total", stage=stage, error=error)
+        trace = _current_trace.get()
+        if trace is not None:
+            record = {"stage": stage, "start": started_at, "duration": round(duration, 6)}
+            if labels:
+                record["labels"] = labels
+            if error:
+                record["error"] = error
+            trace.spans.append(record)
+        if MEMORY_PROFILE and stage in MEMORY_PROFILE_STAGES:
+            memory_profile.checkpoint(stage)
+
+
+def timed(stage: str):
+    """함수 전체 실행 시간을 span으로 기록하는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def start_trace(diagnosis_id: str):
+    """
+    진단 단위 트레이스를 시작합니다. 블록 안에서 기록된 span/이벤트가 이 트레이스에 모입니다.
+    TRACE_DIR이 설정되어 있으면 종료 시 {diagnosis_id}.json 파일로 저장합니다.
+    """
+    trace = Trace(diagnosis_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        with _lock:
+            _traces[diagnosis_id] = trace
+            while len(_traces) > MAX_TRACES:
+                _traces.popitem(last=False)
+        if TRACE_DIR:
+            try:
+                os.makedirs(TRACE_DIR, exist_ok=True)
+                with open(os.path.join(TRACE_DIR, f"{diagnosis_id}.json"), "w", encoding="utf-8") as f:
+                    f.write(trace.to_json())
+            except OSError:
+                logger.exception("트레이스 저장 중 오류")
+
+
+def current_diagnosis_id() -> Optional[str]:
+    """진행 중인 트레이스의 진단 ID를 반환합니다. 없으면 None"""
+    trace = _current_trace.get()
+    return trace.diagnosis_id if trace else None
+
+
+def get_trace(diagnosis_id: str) -> Optional[Dict[str, Any]]:
+    """최근 진단 트레이스를 반환합니다. 없으면 None"""
+    with _lock:
+        trace = _traces.get(diagnosis_id)
+    return trace.to_dict() if trace else None
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key: Tuple, extra: Optional[Tuple] = None) -> str:
+    items = list(label_key) + list(extra or ())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def export_prometheus() -> str:
+    """수집된 카운터/히스토그램을 Prometheus 텍스트 형식으로 반환합니다."""
+    lines = []
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: dict(v, counts=list(v["counts"])) for k, v in _histograms.items()}
+
+    for name in sorted({n for n, _ in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for name in sorted({n for n, _ in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (n, labels), hist in sorted(histograms.items(), key=lambda item: item[0]):
+            if n != name:
+                continue
+            for bound, count in zip(hist["buckets"], hist["counts"]):
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {hist['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """수집된 모든 값을 초기화합니다. (벤치마크/부하 테스트용)"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _traces.clear()
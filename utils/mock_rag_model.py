@@ -11,6 +11,8 @@ from utils.vector_store import VectorStore
 
 # 설정 로드
 from config import REPORT_TITLE, COMPANY_NAME
+from utils.metrics import timed
+from utils.cpu_profile import profiled
 
 class MockRAGModel:
     """
@@ -73,6 +75,8 @@ class MockRAGModel:
                 "이러한 요소들을 종합적으로 관리하면 검색 노출과 방문율을 크게 향상시킬 수 있습니다."
             )
     
+    @timed("mock_rag_model.generate_diagnosis_report")
+    @profiled("generate_diagnosis_report")
     def generate_diagnosis_report(self, answers: Dict[str, str], diagnosis_result: Dict[str, Any]) -> Dict[str, Any]:
         """
         자가진단 결과를 바탕으로 진단 보고서를 생성합니다. (API 없이 테스트용)
@@ -0,0 +1,58 @@
+# utils/model_registry.py
+# 역할: RAG 모델, PDF 생성기 등 무거운 객체를 프로세스 단위로 한 번만 만들어 공유합니다.
+# Streamlit 앱, 백그라운드 작업 큐, HTTP API가 모두 같은 인스턴스(와 내부 캐시)를 사용합니다.
+import threading
+
+from config import RAG_BACKEND
+
+_instances = {}
+_lock = threading.RLock()  # RAGModel 생성 중 get_vector_store 호출 허용
+
+
+def _get_or_create(name, factory):
+    with _lock:
+        if name not in _instances:
+            _instances[name] = factory()
+        return _instances[name]
+
+
+def get_rag_model():
+    """
+    설정된 RAG 모델 인스턴스를 반환합니다.
+    RAG_BACKEND가 "openai"이면 utils.rag_model.RAGModel, 그 외에는 MockRAGModel을 사용합니다.
+    """
+    def factory():
+        if RAG_BACKEND == "openai":
+            from utils.rag_model import RAGModel
+            return RAGModel()
+        from utils.mock_rag_model import MockRAGModel
+        return MockRAGModel()
+    return _get_or_create("rag_model", factory)
+
+
+def get_pdf_generator():
+    """공유 PDF 생성기 인스턴스를 반환합니다. (폰트 등록/스타일 설정은 한 번만 수행)"""
+    def factory():
+        from utils.pdf_generator import PDFGenerator
+        return PDFGenerator()
+    return _get_or_create("pdf_generator", factory)
+
+
+def get_vector_store():
+    """
+    공유 벡터 스토어(검색 색인) 인스턴스를 반환합니다.
+    RAGModel과 RAGSystem이 같은 색인과 쿼리 임베딩 캐시를 사용합니다.
+    """
+    def factory():
+        from utils.vector_store import create_vector_store
+        return create_vector_store()
+    return _get_or_create("vector_store", factory)
+
+
+def register_instance(name, instance):
+    """
+    공유 인스턴스를 직접 지정합니다. (부하 테스트 등에서 오프라인 대체 모델 사용 - utils/load_test.py)
+    name: "rag_model", "pdf_generator", "vector_store"
+    """
+    with _lock:
+        _instances[name] = instance
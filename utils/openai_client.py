@@ -0,0 +1,337 @@
+# utils/openai_client.py
+# 역할: 모든 LLM/임베딩 호출이 공유하는 OpenAI HTTP 클라이언트 계층
+#
+# - 프로세스 전체가 하나의 httpx 연결 풀을 사용합니다. (keep-alive, h2 패키지가 있으면 HTTP/2)
+# - 동시 요청 수를 세마포어로 제한합니다.
+# - 429/5xx/연결 오류는 지터가 있는 지수 백오프로 재시도합니다. (Retry-After 헤더 우선)
+# - 연속 실패가 임계값을 넘으면 회로 차단기가 열려 일정 시간 동안 요청을 즉시 실패시킵니다.
+#   (재시도를 모두 마친 논리 요청 1건당 실패 1회로 셉니다. 408/409/429는 서버 장애가 아니므로 백오프만 적용)
+#
+# 재시도는 이 계층이 담당하므로 openai.OpenAI는 max_retries=0으로 생성합니다.
+# (langchain-openai 0.0.5는 http_client 하나로 동기/비동기 클라이언트를 모두 만들기 때문에
+#  동기 클라이언트를 client 인자로 직접 넘기고, 비동기 클라이언트는 SDK 기본 재시도를 사용합니다.)
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+from utils.metrics import incr, observe
+
+from config import (
+    LLM_MODEL, TEMPERATURE, OPENAI_BASE_URL, OPENAI_MAX_CONNECTIONS, OPENAI_MAX_CONCURRENCY,
+    OPENAI_TIMEOUT, OPENAI_MAX_RETRIES, OPENAI_BACKOFF_BASE, OPENAI_BACKOFF_MAX,
+    OPENAI_BREAKER_THRESHOLD, OPENAI_BREAKER_COOLDOWN
+)
+
+# 재시도할 HTTP 상태 코드
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+# 재시도는 하지만 회로 차단기 실패로 세지 않는 상태 코드 (시간 초과/충돌/요청 한도)
+BREAKER_EXEMPT_STATUS_CODES = {408, 409, 429}
+
+
+class CircuitOpenError(httpx.TransportError):
+    """회로 차단기가 열려 있어 요청을 보내지 않았을 때 발생하는 예외"""
+
+
+class CircuitBreaker:
+    """
+    연속 실패 횟수 기반 회로 차단기
+    closed(정상) -> open(차단, cooldown 동안) -> half_open(시험 요청 1건) -> closed/open
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        """초기화"""
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """요청을 보내도 되는지 확인합니다. half_open 상태에서는 시험 요청 1건만 허용합니다."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self):
+        """실패/성공 횟수를 바꾸지 않고 half_open 시험 요청 자리만 돌려줍니다."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            was_trial = self._trial_in_flight
+            self._trial_in_flight = False
+            if was_trial or self._failures >= self.threshold:
+                if self._opened_at is None or was_trial:
+                    incr("openai_circuit_open_total")
+                self._opened_at = time.monotonic()
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    재시도 대기 시간을 계산합니다. (full jitter 지수 백오프)
+    Retry-After 헤더(초)가 있으면 그 값을 우선합니다.
+    """
+    if retry_after:
+        try:
+            return min(float(retry_after), OPENAI_BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(OPENAI_BACKOFF_MAX, OPENAI_BACKOFF_BASE * (2 ** attempt)))
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """
+    동시 요청 제한, 재시도, 회로 차단을 적용하는 httpx 전송 계층
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, max_concurrency: int, max_retries: int,
+                 breaker: CircuitBreaker):
+        """초기화"""
+        self._transport = transport
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.breaker = breaker
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        # 회로 차단기는 논리 요청 단위로 확인합니다. (재시도 중인 half_open 시험 요청이 스스로 막히지 않도록)
+        if not self.breaker.allow():
+            incr("openai_requests_total", outcome="circuit_open")
+            raise CircuitOpenError("OpenAI API 회로 차단기가 열려 있습니다.", request=request)
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            with self._semaphore:
+                observe("openai_semaphore_wait_seconds", time.perf_counter() - start)
+                try:
+                    response = self._transport.handle_request(request)
+                    if response.status_code in RETRY_STATUS_CODES:
+                        # 재시도 여부와 관계없이 본문을 읽어 연결을 풀에 돌려줍니다.
+                        response.read()
+                except httpx.TransportError as e:
+                    response = None
+                    error = e
+
+            if response is not None and response.status_code not in RETRY_STATUS_CODES:
+                self.breaker.record_success()
+                incr("openai_requests_total", outcome=str(response.status_code))
+                return response
+
+            outcome = str(response.status_code) if response is not None else type(error).__name__
+            incr("openai_requests_total", outcome=outcome)
+            if attempt >= self.max_retries:
+                # 마지막 시도 결과로 한 번만 기록
+                if response is not None and response.status_code in BREAKER_EXEMPT_STATUS_CODES:
+                    self.breaker.release()
+                else:
+                    self.breaker.record_failure()
+                if response is not None:
+                    return response
+                raise error
+
+            retry_after = response.headers.get("retry-after") if response is not None else None
+            if response is not None:
+                response.close()
+            delay = backoff_delay(attempt, retry_after)
+            incr("openai_retries_total", outcome=outcome)
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self._transport.close()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+_openai_clients = {}
+breaker = CircuitBreaker(OPENAI_BREAKER_THRESHOLD, OPENAI_BREAKER_COOLDOWN)
+
+
+def get_http_client() -> httpx.Client:
+    """프로세스 공용 httpx 클라이언트를 반환합니다."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            limits = httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                keepalive_expiry=60.0
+            )
+            http2 = _http2_available()
+            transport = ResilientTransport(
+                httpx.HTTPTransport(limits=limits, http2=http2),
+                max_concurrency=OPENAI_MAX_CONCURRENCY,
+                max_retries=OPENAI_MAX_RETRIES,
+                breaker=breaker
+            )
+            _client = httpx.Client(transport=transport, timeout=OPENAI_TIMEOUT, http2=http2)
+        return _client
+
+
+def create_openai_client(api_key: str):
+    """공용 HTTP 클라이언트를 사용하는 openai.OpenAI 클라이언트를 반환합니다. (API 키별로 재사용)"""
+    import openai
+    with _client_lock:
+        client = _openai_clients.get((api_key, OPENAI_BASE_URL))
+    if client is None:
+        client = openai.OpenAI(
+            api_key=api_key,
+            base_url=OPENAI_BASE_URL,
+            max_retries=0,
+            http_client=get_http_client()
+        )
+        with _client_lock:
+            client = _openai_clients.setdefault((api_key, OPENAI_BASE_URL), client)
+    return client
+
+
+def create_chat_model(api_key: str, model_name: str = LLM_MODEL, temperature: float = TEMPERATURE):
+    """공용 HTTP 클라이언트를 사용하는 ChatOpenAI를 생성합니다."""
+    import openai
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        openai_api_key=api_key,
+        openai_api_base=OPENAI_BASE_URL,
+        model_name=model_name,
+        temperature=temperature,
+        client=create_openai_client(api_key).chat.completions,
+        async_client=openai.AsyncOpenAI(api_key=api_key, base_url=OPENAI_BASE_URL).chat.completions
+    )
+
+
+def create_embeddings(api_key: str, model: str = "text-embedding-ada-002"):
+    """공용 HTTP 클라이언트를 사용하는 OpenAIEmbeddings를 생성합니다."""
+    import openai
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(
+        openai_api_key=api_key,
+        openai_api_base=OPENAI_BASE_URL,
+        model=model,
+        client=create_openai_client(api_key).embeddings,
+        async_client=openai.AsyncOpenAI(api_key=api_key, base_url=OPENAI_BASE_URL).embeddings
+    )
+
+
+# 로컬 모의 서버로 재시도/회로 차단 동작 확인
+if __name__ == "__main__":
+    import json
+    import sys
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    state = {"calls": 0, "fail_first": 2, "always_fail": False, "status": 500}
+
+    class MockOpenAIHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, data, headers=None):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._reply(200, {"object": "list", "data": [{"id": LLM_MODEL, "object": "model", "created": 0, "owned_by": "mock"}]})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            state["calls"] += 1
+            if state["always_fail"]:
+                return self._reply(state["status"], {"error": {"message": "mock failure"}}, {"Retry-After": "0.01"})
+            if state["fail_first"] > 0:
+                state["fail_first"] -= 1
+                return self._reply(429, {"error": {"message": "rate limited"}}, {"Retry-After": "0.05"})
+            self._reply(200, {
+                "id": "mock", "object": "chat.completion", "created": 0, "model": LLM_MODEL,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "모의 응답"}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 5, "completion_tokens": 3, "total_tokens": 8}
+            })
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    OPENAI_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    llm = create_chat_model("sk-test")
+    print(f"HTTP/2 사용: {_http2_available()}")
+    print(f"429 두 번 후 응답: {llm.predict('hello')} (서버 호출 {state['calls']}회)")
+    assert state["calls"] == 3
+
+    create_openai_client("sk-test").models.list()
+    print("모델 목록 조회 성공 (같은 연결 풀 공유)")
+
+    # 429가 계속되어도 (재시도 소진) 회로 차단기는 열리지 않음
+    state.update(calls=0, always_fail=True, status=429)
+    for _ in range(OPENAI_BREAKER_THRESHOLD + 1):
+        try:
+            llm.predict("hello")
+        except Exception:
+            pass
+    assert breaker.state == "closed", "429는 회로 차단기 실패로 세지 않아야 합니다."
+    print(f"429 반복: 서버 호출 {state['calls']}회, 회로 상태 {breaker.state}")
+
+    # 5xx: 재시도를 모두 마친 요청 1건당 실패 1회
+    state.update(calls=0, status=500)
+    try:
+        llm.predict("hello")
+    except Exception:
+        pass
+    assert state["calls"] == OPENAI_MAX_RETRIES + 1
+    assert breaker.state == "closed", "요청 1건의 재시도는 실패 1회로 세야 합니다."
+    print(f"5xx 요청 1건: 서버 호출 {state['calls']}회, 회로 상태 {breaker.state}")
+    for _ in range(OPENAI_BREAKER_THRESHOLD):
+        try:
+            llm.predict("hello")
+        except Exception as e:
+            print(f"실패: {type(e).__name__} (회로 상태: {breaker.state})")
+    calls_when_open = state["calls"]
+    try:
+        llm.predict("hello")
+    except Exception:
+        pass
+    assert state["calls"] == calls_when_open, "회로가 열려 있으면 서버를 호출하지 않아야 합니다."
+    print(f"회로 차단 확인: 서버 호출 {calls_when_open}회 이후 추가 호출 없음")
+    server.shutdown()
+    sys.exit(0)
@@ -17,6 +17,11 @@ from reportlab.platypus import (
 
 # 설정 로드
 from config import REPORT_TITLE, COMPANY_NAME, LOGO_PATH
+from utils.metrics import span, timed
+from utils.cpu_profile import profiled
+from utils.report_text import parse_report_text
+from utils.report_flowables import to_flowables
+from utils.score_charts import score_chart_flowables
 
 class PDFGenerator:
     """
@@ -139,6 +144,8 @@ class PDFGenerator:
         """페이지 브레이크 요소 반환"""
         return PageBreak()
     
+    @timed("pdf_generator.generate_report")
+    @profiled("PDFGenerator.generate_report")
     def generate_report(self, 
                        diagnosis_result: Dict[str, Any], 
                        report_data: Dict[str, Any], 
@@ -166,9 +173,31 @@ class PDFGenerator:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{output_path}/place_optimization_report_{timestamp}.pdf"
         
-        # PDF 문서 생성
+        try:
+            self._build_document(filename, diagnosis_result, report_data)
+            print(f"PDF 보고서가 생성되었습니다: {filename}")
+            return filename
+        except Exception as e:
+            print(f"PDF 생성 중 오류 발생: {str(e)}")
+            return ""
+    
+    @timed("pdf_generator.render_bytes")
+    @profiled("PDFGenerator.render_bytes")
+    def render_bytes(self, diagnosis_result: Dict[str, Any], report_data: Dict[str, Any]) -> bytes:
+        """
+        PDF 보고서를 파일 없이 메모리에서 생성합니다. (다운로드 버튼/캐시용)
+        
+        Returns:
+            PDF 바이트 (실패 시 예외 발생)
+        """
+        buffer = BytesIO()
+        self._build_document(buffer, diagnosis_result, report_data)
+        return buffer.getvalue()
+    
+    def _build_document(self, target, diagnosis_result: Dict[str, Any], report_data: Dict[str, Any]):
+        """PDF 문서를 target(파일 경로 또는 파일 객체)에 생성합니다."""
         doc = SimpleDocTemplate(
-            filename,
+            target,
             pagesize=A4,
             rightMargin=2*cm,
             leftMargin=2*cm,
@@ -179,42 +208,36 @@ class PDFGenerator:
         # 요소 목록 초기화
         elements = []
         
-        try:
-            # 표지 추가
-            self._add_cover_page(elements, report_data)
-            elements.append(PageBreak())
-            
-            # 목차 추가
-            self._add_table_of_contents(elements)
-            elements.append(PageBreak())
-            
-            # 진단 개요 추가
-            self._add_overview_section(elements, diagnosis_result, report_data)
-            elements.append(PageBreak())
-            
-            # 점수 분석 추가
-            self._add_score_analysis(elements, diagnosis_result)
-            elements.append(PageBreak())
-            
-            # 강점 분석 추가
-            self._add_strengths_analysis(elements, report_data)
-            elements.append(PageBreak())
-            
-            # 개선점 분석 추가
-            self._add_improvements_analysis(elements, report_data)
-            elements.append(PageBreak())
-            
-            # 액션 플랜 추가
-            self._add_action_plan(elements, report_data)
-            
-            # PDF 생성
+        # 표지 추가
+        self._add_cover_page(elements, report_data)
+        elements.append(PageBreak())
+        
+        # 목차 추가
+        self._add_table_of_contents(elements)
+        elements.append(PageBreak())
+        
+        # 진단 개요 추가
+        self._add_overview_section(elements, diagnosis_result, report_data)
+        elements.append(PageBreak())
+        
+        # 점수 분석 추가
+        self._add_score_analysis(elements, diagnosis_result)
+        elements.append(PageBreak())
+        
+        # 강점 분석 추가
+        self._add_strengths_analysis(elements, report_data)
+        elements.append(PageBreak())
+        
+        # 개선점 분석 추가
+        self._add_improvements_analysis(elements, report_data)
+        elements.append(PageBreak())
+        
+        # 액션 플랜 추가
+        self._add_action_plan(elements, report_data)
+        
+        # PDF 생성
+        with span("pdf.build", flowables=len(elements)):
             doc.build(elements)
-            print(f"PDF 보고서가 생성되었습니다: {filename}")
-            
-            return filename
-        except Exception as e:
-            print(f"PDF 생성 중 오류 발생: {str(e)}")
-            return ""
     
     def _add_cover_page(self, elements: List, report_data: Dict[str, Any]):
         """표지 페이지 추가"""
@@ -287,11 +310,7 @@ class PDFGenerator:
         if not overview or overview.strip() == "":
             overview = "본 보고서는 네이버 스마트 플레이스 최적화 상태에 대한 종합적인 평가를 담고 있습니다."
             
-        paragraphs = overview.split('\n\n')
-        for p in paragraphs:
-            if p.strip():
-                elements.append(Paragraph(p, self.styles['CustomBody']))
-                elements.append(Spacer(1, 3*mm))
+        self._add_markdown(elements, overview)
         
         elements.append(Spacer(1, 5*mm))
         
@@ -363,6 +382,12 @@ class PDFGenerator:
                 score_table = Table(table_data, colWidths=[5*cm, 3*cm, 3*cm, 3*cm])
                 score_table.setStyle(self.table_style)
                 elements.append(score_table)
+                
+                # 영역별 점수 차트 (레이더 + 막대, 같은 점수 조합은 캐시된 차트 사용)
+                charts = score_chart_flowables(stage_scores, self.styles['CustomBody'].fontName)
+                if charts:
+                    elements.append(Spacer(1, 1*cm))
+                    elements.extend(charts)
             else:
                 elements.append(Paragraph("영역별 점수 정보가 없습니다.", self.styles['CustomBody']))
         else:
@@ -383,12 +408,7 @@ class PDFGenerator:
                 self.styles['CustomBody']
             ))
         else:
-            # 문단별로 처리
-            paragraphs = strengths_analysis.split('\n\n')
-            for p in paragraphs:
-                if p.strip():
-                    elements.append(Paragraph(p, self.styles['CustomBody']))
-                    elements.append(Spacer(1, 3*mm))
+            self._add_markdown(elements, strengths_analysis)
     
     def _add_improvements_analysis(self, elements: List, report_data: Dict[str, Any]):
         """개선점 분석 섹션 추가"""
@@ -405,12 +425,7 @@ class PDFGenerator:
                 self.styles['CustomBody']
             ))
         else:
-            # 문단별로 처리
-            paragraphs = improvements_analysis.split('\n\n')
-            for p in paragraphs:
-                if p.strip():
-                    elements.append(Paragraph(p, self.styles['CustomBody']))
-                    elements.append(Spacer(1, 3*mm))
+            self._add_markdown(elements, improvements_analysis)
     
     def _add_action_plan(self, elements: List, report_data: Dict[str, Any]):
         """액션 플랜 섹션 추가"""
@@ -426,64 +441,11 @@ class PDFGenerator:
                 self.styles['CustomBody']
             ))
         else:
-            # 문단별로 처리해서 목록 항목 식별
-            lines = action_plan.split('\n')
-            current_section = None
-            current_items = []
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # 새로운 섹션 시작 (영역명: 으로 시작하는 줄)
-                if ':' in line and len(line.split(':')[0].split()) <= 3:
-                    # 이전 섹션이 있으면 먼저 처리
-                    if current_section and current_items:
-                        self._add_action_section(elements, current_section, current_items)
-                        current_items = []
-                    
-                    current_section = line
-                    elements.append(Paragraph(line, self.styles['SubsectionTitle']))
-                
-                # 숫자나 글머리 기호로 시작하는 항목
-                elif line.startswith(('1.', '2.', '3.', '4.', '5.', '•', '-', '*')):
-                    current_items.append(line)
-                
-                # 일반 문단
-                else:
-                    elements.append(Paragraph(line, self.styles['CustomBody']))
-            
-            # 마지막 섹션 처리
-            if current_section and current_items:
-                self._add_action_section(elements, current_section, current_items)
+            # "영역명: ..." 줄은 소제목으로 표시
+            self._add_markdown(elements, action_plan, labels=True)
     
-    def _add_action_section(self, elements: List, section_title: str, items: List[str]):
-        """액션 플랜 섹션 내 항목들 추가"""
-        if not items:
-            return
-        
-        try:
-            # 목록 항목 생성
-            list_items = []
-            for item in items:
-                # 선행 기호나 숫자 제거 (필요 시)
-                if item.startswith(('1.', '2.', '3.', '4.', '5.')):
-                    cleaned_item = item[2:].strip()
-                elif item.startswith(('•', '-', '*')):
-                    cleaned_item = item[1:].strip()
-                else:
-                    cleaned_item = item
-
-                list_items.append(ListItem(Paragraph(cleaned_item, self.styles['CustomBody'])))
-            
-            # 목록 생성 및 추가
-            bullet_list = ListFlowable(list_items, bulletType='bullet')
-            elements.append(bullet_list)
-            elements.append(Spacer(1, 5*mm))
-        except Exception as e:
-            print(f"액션 플랜 섹션 처리 중 오류: {str(e)}")
-            # 오류 발생 시 일반 문단으로 추가
-            for item in items:
-                elements.append(Paragraph(item, self.styles['CustomBody']))
-                elements.append(Spacer(1, 2*mm)) 
\ No newline at end of file
+    def _add_markdown(self, elements: List, text: str, labels: bool = False):
+        """섹션 본문(마크다운)을 캐시된 구문 트리로 파싱해 제목/목록/문단 요소로 추가"""
+        elements.extend(to_flowables(
+            parse_report_text(text, labels=labels), self.styles['CustomBody'], self.styles['SubsectionTitle']
+        ))
\ No newline at end of file
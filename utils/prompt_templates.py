@@ -0,0 +1,362 @@
+# utils/prompt_templates.py
+# 역할: 보고서 프롬프트를 "공통 접두부(시스템 + 진단 컨텍스트) + 섹션별 지시문" 구조로 조립합니다.
+#
+# 모든 섹션 프롬프트가 동일한 접두부로 시작하므로 OpenAI 측 프롬프트 캐싱이 적용되고,
+# 로컬 응답 캐시는 (접두부 해시 + 지시문) 조합을 키로 사용할 수 있습니다.
+# 공유 접두부는 모든 영역의 참고 자료를 담아 섹션별 원본 입력 토큰이 늘어나므로(벤치마크 기준 +43%),
+# 프롬프트 캐싱이 적용될 때만 사용하고 그 외에는 섹션에 필요한 참고 자료만 넣습니다. (section_prefixes)
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional
+
+# 영역명 → 보고서 표시 제목
+TITLE_MAP = {
+    "인식하게 한다": "검색 노출 최적화",
+    "클릭하게 한다": "클릭율 높이는 전략",
+    "머물게 한다": "체류시간 늘리는 방법",
+    "연락오게 한다": "문의/예약 전환율 높이기",
+    "후속 피드백 받는다": "고객 재방문 유도 전략"
+}
+
+# 영역별 벡터 검색 쿼리 (고정 문자열 - 임베딩을 색인 생성 시 미리 계산해 함께 저장)
+AREA_QUERY_TEMPLATE = "네이버 스마트 플레이스 {area} 전략과 성공 사례"
+DIAGNOSIS_QUERY_TEMPLATE = "네이버 스마트 플레이스 {area} 최신 전략과 성공 사례"
+
+
+def area_query(area: str) -> str:
+    """보고서 생성 시 영역별 컨텍스트 검색 쿼리"""
+    return AREA_QUERY_TEMPLATE.format(area=area)
+
+
+def diagnosis_query(area: str) -> str:
+    """get_relevant_content_for_diagnosis의 영역별 검색 쿼리 (표시 제목 사용)"""
+    return DIAGNOSIS_QUERY_TEMPLATE.format(area=TITLE_MAP.get(area, area))
+
+
+def fixed_queries() -> List[str]:
+    """진단 경로에서 사용하는 모든 고정 검색 쿼리"""
+    return [query(area) for area in TITLE_MAP for query in (area_query, diagnosis_query)]
+
+
+SYSTEM_PROMPT = "당신은 네이버 스마트 플레이스 최적화 전문가입니다. 아래 진단 결과와 참고 자료를 바탕으로 요청된 섹션만 작성하세요."
+
+# RAGModel.generate_diagnosis_report 섹션별 지시문
+REPORT_SECTION_SUFFIXES = {
+    "overview": """# 📊 종합 진단
+800자 이내로 다음 내용을 포함하여 종합적인 진단 분석을 작성해주세요:
+- 현재 스마트 플레이스 운영의 전반적인 수준
+- 강점 영역에서의 우수한 점
+- 개선 영역에서의 주요 과제
+- 향후 발전 방향""",
+
+    "strengths_analysis": """# 💪 강점 분석
+800자 이내로 강점 영역에 대해 다음 내용을 포함하여 강점 분석을 작성해주세요:
+- 각 강점 영역별 세부 분석
+- 현재 잘 하고 있는 점
+- 강점을 더욱 강화할 수 있는 방안
+- 경쟁사 대비 우위 요소""",
+
+    "improvements_analysis": """# 🎯 개선점 분석
+800자 이내로 개선 영역에 대해 다음 내용을 포함하여 개선점 분석을 작성해주세요:
+- 각 개선 영역별 세부 분석
+- 현재 부족한 점
+- 개선이 필요한 이유
+- 개선 시 기대 효과""",
+
+    "action_plan": """# 📝 액션 플랜
+800자 이내로 개선 영역에 대해 다음 내용을 포함하여 구체적인 액션 플랜을 작성해주세요:
+- 단기 실행 계획 (1-2주)
+- 중기 실행 계획 (1-3개월)
+- 장기 실행 계획 (3-6개월)
+- 각 단계별 구체적인 실행 방안
+- 예상되는 결과와 효과""",
+
+    "upgrade_tips": """# 💡 고급 전략 팁
+800자 이내로 다음 내용을 포함하여 고급 전략 팁을 작성해주세요:
+- 경쟁사와의 차별화 전략
+- 최신 트렌드 활용 방안
+- 고객 경험 향상 팁
+- ROI를 높이는 실전 전략"""
+}
+
+# 보고서 생성 실패 시 모델이 반환하는 대체 보고서 표시 (캐시/색인/라이브러리에 저장하지 않음)
+REPORT_FAILURE_TEXT = "진단 결과 생성에 실패했습니다."
+REPORT_FAILED_KEY = "failed"
+
+
+def is_failed_report(report: Dict) -> bool:
+    """생성 실패 대체 보고서인지 확인합니다. (실패 표시 또는 섹션 본문이 실패 문구)"""
+    if report.get(REPORT_FAILED_KEY):
+        return True
+    return any(report.get(key) == REPORT_FAILURE_TEXT for key in REPORT_SECTION_SUFFIXES)
+
+
+# 단일 호출 모드: 모든 섹션을 하나의 JSON 객체로 요청하는 지시문
+REPORT_JSON_SUFFIX = """아래 각 섹션을 모두 작성하여 JSON 객체 하나로만 응답하세요.
+JSON 외의 설명이나 코드 블록 표시는 포함하지 마세요.
+키는 다음과 같으며 값은 각 섹션의 마크다운 본문 문자열입니다 (각 800자 이내):
+""" + "\n".join(f"- \"{key}\": {suffix}" for key, suffix in REPORT_SECTION_SUFFIXES.items())
+
+# DiagnosisReportGenerator 섹션별 지시문
+DIAGNOSIS_SECTION_SUFFIXES = {
+    "current_diagnosis": """위 개선 필요 영역에 대한 현재 상황 분석 보고서를 작성해 주세요.
+이 보고서는 점수나 단계가 아닌, 이북에서 추출한 실제 데이터와 사례를 바탕으로 한 인사이트를 제공해야 합니다.
+
+다음 요구사항에 따라 현재 상황 분석을 작성해 주세요:
+1. 제목은 "# 📊 현재 상황 분석"으로 시작합니다.
+2. 일반적인 진단이 아닌, 이북 데이터에서 추출한 실제 사례와 통계를 포함합니다.
+3. 산업 평균 대비 위치, 경쟁사와의 차별화 기회를 구체적으로 언급합니다.
+4. 각 영역별로 아래 구조로 작성합니다:
+   ## [영역 이름] 현황
+   * 🔍 **산업 평균 비교**: (산업 평균 대비 위치와 의미)
+   * 💼 **실제 사례 분석**: (성공/실패 사례를 통한 인사이트)
+   * 🏆 **경쟁 우위 기회**: (차별화 가능한 기회 포인트)
+
+5. 각 영역은 정확하고 구체적인 수치, 사례, 벤치마크를 포함해야 합니다.
+6. 마지막에는 '현재 상황이 비즈니스에 미치는 영향'에 대한 짧은 단락을 추가합니다.
+
+참고 사항:
+- 일반적이고 포괄적인 조언이 아닌, 구체적이고 적용 가능한 인사이트를 제공합니다.
+- 이북 데이터에서 추출한 실제 사례, 통계, 벤치마크를 활용합니다.
+- 전문적이지만 이해하기 쉬운 언어를 사용합니다.""",
+
+    "action_plan": """위 개선 필요 영역에 대한 구체적이고 실행 가능한 액션 플랜을 작성해 주세요.
+이 액션 플랜은 점수나 단계가 아닌, 이북에서 추출한 실제 데이터와 성공 사례를 바탕으로 한 단계별 실행 전략을 제공해야 합니다.
+
+다음 요구사항에 따라 액션 플랜을 작성해 주세요:
+1. 제목은 "# 🎯 실행 전략"으로 시작합니다.
+2. 일반적인 조언이 아닌, 이북 데이터에서 추출한 실제 성공 사례를 기반으로 한 구체적 실행 전략을 제시합니다.
+3. 각 영역별로 아래 구조로 작성합니다:
+   ## [영역 이름] 전략
+   * 📅 **Day 1-3**: (즉시 실행 가능한 액션 - 구체적인 방법과 도구)
+   * 📅 **Day 4-7**: (단기 실행 액션 - 구체적인 프로세스)
+   * 📅 **Day 8-14**: (중기 실행 액션 - 리소스와 방법론)
+
+   → *예상 성과: (구체적인 기대 효과와 수치)*
+
+4. 각 액션은 다음 요소를 포함해야 합니다:
+   - 정확히 무엇을 해야 하는지 (도구, 템플릿, 방법)
+   - 어떻게 실행해야 하는지 (단계별 프로세스)
+   - 성공 지표는 무엇인지 (측정 방법)
+
+5. 이북에서 발견한 성공 사례나 통계를 언급하여 신뢰성을 높입니다.
+6. 마지막에는 '실행 우선순위와 리소스 할당'에 대한 짧은 단락을 추가합니다.
+
+참고 사항:
+- 일반적이고 포괄적인 조언이 아닌, 구체적이고 즉시 실행 가능한 액션을 제공합니다.
+- 이북 데이터에서 추출한 실제 성공 사례와 방법론을 활용합니다.
+- 각 액션은 비용, 시간, 필요 리소스 측면에서 현실적이어야 합니다.""",
+
+    "upgrade_tips": """위 개선 필요 영역에 대한 차별화 전략과 고급 팁을 작성해 주세요.
+이 내용은 일반적으로 쉽게 찾을 수 없는 고급 전략과 실제 성공 사례를 바탕으로 한 차별화 방안을 제공해야 합니다.
+
+다음 요구사항에 따라 차별화 전략을 작성해 주세요:
+1. 제목은 "# 💡 차별화 전략"으로 시작합니다.
+2. 일반적으로 알려진 팁이 아닌, 이북 데이터에서 추출한 독특한 전략과 희소한 인사이트를 제공합니다.
+3. 각 영역별로 아래 구조로 작성합니다:
+   ## [영역 이름] 고급 전략
+   * 🚀 **상위 10% 전략**: (상위 10%의 비즈니스만 적용하는 고급 전략)
+   * 💎 **희소한 인사이트**: (일반적으로 알려지지 않은 특별한 팁)
+   * 📊 **성공 사례**: (실제 적용 사례와 결과)
+
+4. 각 전략은 다음 요소를 포함해야 합니다:
+   - 왜 이 방법이 효과적인지 (원리)
+   - 어떻게 구현할 수 있는지 (구체적 방법)
+   - 어떤 결과를 기대할 수 있는지 (효과)
+
+5. 실제 숫자, 통계, 사례 연구를 포함하여 신뢰성을 높입니다.
+6. 마지막에는 '경쟁 우위 확보를 위한 통합 전략'에 대한 짧은 단락을 추가합니다.
+
+참고 사항:
+- 일반적인 조언이 아닌, 독특하고 차별화된 전략을 제공합니다.
+- 이북 데이터에서 발견한 성공 비즈니스의 실제 사례를 활용합니다.
+- 고급스럽지만 현실적으로 적용 가능한 전략을 제시합니다."""
+}
+
+
+# 공유 접두부를 쓰지 않을 때 섹션별로 포함하는 참고 자료 (기존 섹션 프롬프트와 같은 조합)
+SECTION_CONTEXT_AREAS = {
+    "overview": ("weak", "strong"),
+    "strengths_analysis": ("strong",),
+    "improvements_analysis": ("weak",),
+    "action_plan": ("weak",),
+    "upgrade_tips": ("weak", "strong")
+}
+
+
+def build_context_prefix(level: Optional[str],
+                         strong_areas: List[str],
+                         weak_areas: List[str],
+                         area_contexts: Dict[str, str],
+                         context_groups=("weak", "strong")) -> str:
+    """
+    모든 섹션이 공유하는 프롬프트 접두부(시스템 + 진단 결과 + 참고 자료)를 생성합니다.
+    같은 진단 결과에 대해서는 항상 같은 문자열이 나오도록 순서를 고정합니다.
+
+    Args:
+        level: 진단 레벨 이름 (없으면 생략)
+        strong_areas: 강점 영역 목록
+        weak_areas: 개선 필요 영역 목록
+        area_contexts: 영역별 검색 컨텍스트
+        context_groups: 참고 자료를 넣을 영역 ("weak", "strong")
+
+    Returns:
+        공통 접두부 문자열
+    """
+    lines = [SYSTEM_PROMPT, "", "[진단 결과]"]
+    if level:
+        lines.append(f"- 진단 레벨: {level}")
+    if strong_areas:
+        lines.append(f"- 강점 영역: {', '.join(TITLE_MAP.get(area, area) for area in strong_areas[:2])}")
+    if weak_areas:
+        lines.append(f"- 개선 영역: {', '.join(TITLE_MAP.get(area, area) for area in weak_areas[:2])}")
+
+    lines.extend(["", "[참고 자료]"])
+    seen = set()
+    areas = (weak_areas[:2] if "weak" in context_groups else []) + (strong_areas[:2] if "strong" in context_groups else [])
+    for area in areas:
+        if area in seen:
+            continue
+        seen.add(area)
+        lines.append(f"## {TITLE_MAP.get(area, area)}")
+        lines.append(area_contexts.get(area, "").strip())
+        lines.append("")
+
+    return "\n".join(lines).rstrip() + "\n\n[작성 요청]\n"
+
+
+def section_prefixes(level: Optional[str], strong_areas: List[str], weak_areas: List[str],
+                     area_contexts: Dict[str, str], min_shared_tokens: Optional[int]) -> Dict[str, str]:
+    """
+    보고서 섹션별 접두부를 반환합니다.
+    공유 접두부가 min_shared_tokens 이상이면 (프로바이더 프롬프트 캐싱 적용 길이) 모든 섹션이 같은 접두부를 쓰고,
+    그보다 짧거나 min_shared_tokens가 None(캐싱 사용 안 함)이면 섹션에 필요한 참고 자료만 넣은 접두부를 씁니다.
+    """
+    shared = build_context_prefix(level, strong_areas, weak_areas, area_contexts)
+    if min_shared_tokens is not None and count_tokens(shared) >= min_shared_tokens:
+        return {key: shared for key in REPORT_SECTION_SUFFIXES}
+    return {
+        key: build_context_prefix(level, strong_areas, weak_areas, area_contexts, SECTION_CONTEXT_AREAS[key])
+        for key in REPORT_SECTION_SUFFIXES
+    }
+
+
+def build_prompt(prefix: str, suffix: str) -> str:
+    """공통 접두부 뒤에 섹션 지시문을 붙여 최종 프롬프트를 만듭니다."""
+    return prefix + suffix
+
+
+def prefix_hash(prefix: str) -> str:
+    """공통 접두부의 해시값을 반환합니다. (캐시 키, 로그 식별용)"""
+    return hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+
+
+def prompt_cache_key(prefix: str, suffix: str) -> str:
+    """접두부 해시와 지시문을 조합한 응답 캐시 키를 반환합니다."""
+    suffix_digest = hashlib.sha256(suffix.encode("utf-8")).hexdigest()[:16]
+    return f"{prefix_hash(prefix)}:{suffix_digest}"
+
+
+_JSON_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def parse_sections_json(text: str, keys) -> Dict[str, str]:
+    """
+    단일 호출 응답(JSON)을 섹션별 문자열로 파싱합니다.
+    비어 있거나 문자열이 아닌 값은 제외하므로, 누락된 키는 호출자가 개별 생성으로 보완합니다.
+
+    Args:
+        text: LLM 응답 문자열
+        keys: 기대하는 섹션 키 목록
+
+    Returns:
+        유효한 섹션만 담은 딕셔너리 (파싱 실패 시 빈 딕셔너리)
+    """
+    body = _JSON_FENCE.sub("", text.strip())
+    start, end = body.find("{"), body.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(body[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {
+        key: data[key].strip()
+        for key in keys
+        if isinstance(data.get(key), str) and data[key].strip()
+    }
+
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    입력 토큰 수를 계산합니다.
+    tiktoken 인코딩을 사용할 수 없는 환경(오프라인 등)에서는 글자 수 기반으로 추정합니다.
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    # 한글은 대략 1글자당 1토큰, 영문/공백은 4글자당 1토큰 수준
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii) // 4
+
+
+# 섹션별 입력 토큰 비교 벤치마크
+if __name__ == "__main__":
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from config import EBOOK_PATH
+
+    with open(EBOOK_PATH, encoding="utf-8") as f:
+        ebook = f.read()
+    # 영역당 검색 결과 2개(약 1000자씩)를 흉내낸 컨텍스트
+    chunks = [ebook[i:i + 1000] for i in range(0, 8000, 1000)]
+    weak = ["인식하게 한다", "클릭하게 한다"]
+    strong = ["후속 피드백 받는다", "머물게 한다"]
+    contexts = {area: "\n\n".join(chunks[i * 2:i * 2 + 2]) for i, area in enumerate(weak + strong)}
+    level = "발전 단계"
+
+    def titles(areas):
+        return ', '.join(TITLE_MAP.get(a, a) for a in areas[:2])
+
+    def ctx(areas):
+        return "\n".join(contexts.get(a, "") for a in areas)
+
+    # 기존 구조: 섹션마다 다른 컨텍스트 조합과 헤더를 가진 독립 프롬프트
+    header = "당신은 네이버 스마트 플레이스 최적화 전문가입니다. 아래 진단 결과를 바탕으로"
+    before = {
+        "overview": f"{header}\n1. 현재 상태: {level}\n2. 강점 영역: {titles(strong)}\n3. 개선 영역: {titles(weak)}\n{REPORT_SECTION_SUFFIXES['overview']}\n참고 자료:\n{ctx(weak + strong)}",
+        "strengths_analysis": f"{header}\n1. 강점 영역: {titles(strong)}\n2. 진단 레벨: {level}\n{REPORT_SECTION_SUFFIXES['strengths_analysis']}\n참고 자료:\n{ctx(strong)}",
+        "improvements_analysis": f"{header}\n1. 개선 영역: {titles(weak)}\n2. 진단 레벨: {level}\n{REPORT_SECTION_SUFFIXES['improvements_analysis']}\n참고 자료:\n{ctx(weak)}",
+        "action_plan": f"{header}\n1. 개선 영역: {titles(weak)}\n2. 진단 레벨: {level}\n{REPORT_SECTION_SUFFIXES['action_plan']}\n참고 자료:\n{ctx(weak)}",
+        "upgrade_tips": f"{header}\n1. 진단 레벨: {level}\n2. 강점 영역: {titles(strong)}\n3. 개선 영역: {titles(weak)}\n{REPORT_SECTION_SUFFIXES['upgrade_tips']}\n참고 자료:\n{ctx(weak + strong)}",
+    }
+
+    prefix = build_context_prefix(level, strong, weak, contexts)
+    prefix_tokens = count_tokens(prefix)
+    before_total = sum(count_tokens(p) for p in before.values())
+    after_total = sum(count_tokens(build_prompt(prefix, s)) for s in REPORT_SECTION_SUFFIXES.values())
+    # 첫 섹션 이후에는 접두부가 프로바이더 캐시에서 처리됨
+    cached = prefix_tokens * (len(REPORT_SECTION_SUFFIXES) - 1)
+
+    print(f"접두부 해시: {prefix_hash(prefix)} ({prefix_tokens} 토큰)")
+    print(f"기존 구조 입력 토큰 합계: {before_total}")
+    print(f"접두부 구조 입력 토큰 합계: {after_total}")
+    print(f"  - 캐시 적용 가능 토큰: {cached}")
+    print(f"  - 캐시 미적용 토큰: {after_total - cached}")
+    sections = section_prefixes(level, strong, weak, contexts, None)
+    print(f"캐싱 미사용 시 (섹션별 접두부) 입력 토큰 합계: "
+          f"{sum(count_tokens(build_prompt(sections[k], s)) for k, s in REPORT_SECTION_SUFFIXES.items())}")
+    print(f"단일 호출 모드 입력 토큰: {count_tokens(build_prompt(prefix, REPORT_JSON_SUFFIX))}")
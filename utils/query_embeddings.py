@@ -0,0 +1,110 @@
+# utils/query_embeddings.py
+# 역할: 검색 쿼리 임베딩 캐시
+#
+# - 진단 경로의 고정 쿼리(prompt_templates.fixed_queries)는 색인 생성 시 한 번 임베딩해
+#   색인 디렉토리에 함께 저장합니다. (요청 시 임베딩 API 호출 없음)
+# - 그 외 임의 쿼리는 크기가 제한된 LRU 캐시를 거쳐, 캐시에 없는 쿼리만 한 번에 묶어 임베딩합니다.
+import logging
+import os
+import threading
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from utils.metrics import incr, span
+from utils.response_cache import ResponseCache
+
+from config import QUERY_EMBEDDING_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# 색인 디렉토리에 저장되는 고정 쿼리 임베딩 파일
+QUERY_EMBEDDINGS_FILE = "query_embeddings.npz"
+
+
+def embedding_model_name(embeddings) -> str:
+    """임베딩 모델 식별자 (모델이 바뀌면 저장된 쿼리 임베딩을 다시 계산)"""
+    return str(getattr(embeddings, "model", None) or getattr(embeddings, "size", None) or type(embeddings).__name__)
+
+
+class QueryEmbeddingCache:
+    """
+    고정 쿼리(파일 저장) + 임의 쿼리(LRU) 임베딩 캐시 클래스
+    """
+
+    def __init__(self, embeddings, maxsize: int = QUERY_EMBEDDING_CACHE_SIZE):
+        """
+        초기화
+
+        Args:
+            embeddings: 임베딩 객체 (embed_documents 제공)
+            maxsize: 임의 쿼리 LRU 캐시 크기
+        """
+        self.embeddings = embeddings
+        self.model = embedding_model_name(embeddings)
+        self.fixed: Dict[str, np.ndarray] = {}
+        self.lru = ResponseCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def load_or_build(self, path: str, queries: Sequence[str]) -> int:
+        """
+        저장된 고정 쿼리 임베딩을 읽고, 없거나 모델/쿼리가 바뀐 항목만 임베딩해 다시 저장합니다.
+
+        Args:
+            path: 저장 파일 경로 (.npz)
+            queries: 고정 쿼리 목록
+
+        Returns:
+            새로 임베딩한 쿼리 수
+        """
+        fixed = {}
+        if os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    if str(data["model"]) == self.model:
+                        fixed = dict(zip(data["queries"].tolist(), data["vectors"]))
+            except Exception:
+                logger.exception(f"쿼리 임베딩 파일 로드 오류 ({path})")
+
+        missing = [q for q in dict.fromkeys(queries) if q not in fixed]
+        if missing:
+            with span("query_embeddings.precompute", n=len(missing)):
+                vectors = np.array(self.embeddings.embed_documents(missing), dtype=np.float32)
+            fixed.update(zip(missing, vectors))
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            names = list(fixed)
+            np.savez(path, model=np.array(self.model), queries=np.array(names),
+                     vectors=np.array([fixed[q] for q in names], dtype=np.float32))
+        with self._lock:
+            self.fixed = fixed
+        return len(missing)
+
+    def embed(self, queries: Sequence[str]) -> np.ndarray:
+        """
+        쿼리 임베딩 행렬을 반환합니다. 고정 쿼리와 캐시된 쿼리는 API를 호출하지 않고,
+        나머지는 한 번의 embed_documents 요청으로 임베딩합니다.
+        """
+        vectors: List = [None] * len(queries)
+        missing: Dict[str, List[int]] = {}
+        for i, query in enumerate(queries):
+            vector = self.fixed.get(query)
+            source = "precomputed"
+            if vector is None:
+                vector = self.lru.get(query)
+                source = "cache"
+            if vector is None:
+                missing.setdefault(query, []).append(i)
+                continue
+            incr("query_embedding_lookups_total", source=source)
+            vectors[i] = vector
+
+        if missing:
+            incr("query_embedding_lookups_total", len(missing), source="api")
+            with span("vector_store.embed_queries", n=len(missing)):
+                embedded = self.embeddings.embed_documents(list(missing))
+            for (query, positions), vector in zip(missing.items(), embedded):
+                vector = np.asarray(vector, dtype=np.float32)
+                self.lru.set(query, vector)
+                for i in positions:
+                    vectors[i] = vector
+        return np.array(vectors, dtype=np.float32).reshape(len(queries), -1)
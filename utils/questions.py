@@ -238,6 +238,33 @@ diagnosis_questions = {
     ]
 }
 
+# 질문 색인 - 화면 표시와 응답 처리에 필요한 값을 질문별로 미리 계산
+def build_question_index(questions=None):
+    """
+    질문 데이터를 질문 ID 기준 색인으로 변환합니다.
+    (Streamlit 앱은 st.cache_resource로 프로세스당 한 번만 만듭니다.)
+    
+    Args:
+        questions (dict): 단계별 질문 데이터 (기본값: diagnosis_questions)
+        
+    Returns:
+        dict: 단계 목록, 전체 질문 수, 질문 ID별 단계/라디오 라벨/선택지 값
+    """
+    questions = diagnosis_questions if questions is None else questions
+    index = {
+        "stages": list(questions.keys()),
+        "total_questions": sum(len(qs) for qs in questions.values()),
+        "questions": {}
+    }
+    for stage, stage_questions in questions.items():
+        for question in stage_questions:
+            index["questions"][question["id"]] = {
+                "stage": stage,
+                "labels": [f"{opt['value']}. {opt['text']}" for opt in question["options"]],
+                "values": [opt["value"] for opt in question["options"]]
+            }
+    return index
+
 # 평가 시스템 - 점수 계산 및 레벨 판정
 def calculate_score(answers):
     """
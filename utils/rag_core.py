@@ -4,13 +4,16 @@ import streamlit as st
 from typing import Dict, List, Any
 
 # 수정된 임포트 경로 사용
-from langchain_openai import ChatOpenAI
 
 # 자체 모듈 임포트
-from utils.vector_store import VectorStore
+from utils.model_registry import get_vector_store
 from utils.questions import suggest_improvements
 from utils.rag_generator import ResponseGenerator
 from utils.rag_diagnosis import DiagnosisReportGenerator
+from utils.metrics import timed
+from utils.cpu_profile import profiled
+from utils.prompt_templates import REPORT_FAILED_KEY
+from utils.openai_client import create_chat_model
 
 # 설정 로드
 from config import OPENAI_API_KEY, LLM_MODEL, TEMPERATURE
@@ -36,14 +39,14 @@ class RAGModel:
                 
             # 벡터 스토어 초기화 시도
             try:
-                self.vector_store = VectorStore()
+                self.vector_store = get_vector_store()
             except Exception as e:
                 st.warning(f"벡터 스토어 초기화 오류: {e}. 이북 데이터를 활용한 일부 기능이 제한될 수 있습니다.")
                 self.vector_store = None
                 
             # LLM 초기화 - 더 창의적인 응답을 위해 temperature 약간 상향
-            self.llm = ChatOpenAI(
-                openai_api_key=api_key,
+            self.llm = create_chat_model(
+                api_key,
                 model_name=LLM_MODEL,
                 temperature=0.7  # 기존보다 약간 높게 설정하여 더 다양한 인사이트 생성
             )
@@ -57,6 +60,7 @@ class RAGModel:
             self.llm = None
             self.vector_store = None
     
+    @timed("rag_core.generate_response")
     def generate_response(self, query: str, context: str = None, n_results: int = 3) -> str:
         """
         쿼리에 대한 응답을 생성합니다.
@@ -71,6 +75,8 @@ class RAGModel:
             st.error(f"응답 생성 중 오류: {e}")
             return "응답 생성 중 오류가 발생했습니다. 다시 시도해주세요."
     
+    @timed("rag_core.generate_diagnosis_report")
+    @profiled("generate_diagnosis_report")
     def generate_diagnosis_report(self, answers: Dict[str, str], diagnosis_result: Dict[str, Any]) -> Dict[str, Any]:
         """
         자가진단 결과를 바탕으로 실용적인 전략 가이드를 생성합니다.
@@ -91,7 +97,8 @@ class RAGModel:
                 "summary": "# 📑 네이버 스마트 플레이스 최적화 인사이트\n\n실용적인 최적화 전략과 차별화 방안이 필요합니다.",
                 "current_diagnosis": "# 📊 현재 상황 분석\n\n검색 노출, 클릭율, 전환율 개선이 필요한 상태입니다.",
                 "action_plan": "# 🎯 실행 전략\n\n핵심 키워드 최적화, 이미지 품질 향상, 리뷰 관리 시스템 구축을 단계적으로 실행하세요.",
-                "upgrade_tips": "# 💡 차별화 전략\n\n경쟁사와 차별화된 시각적 요소, 스토리텔링, 고객 경험 전략을 개발하세요."
+                "upgrade_tips": "# 💡 차별화 전략\n\n경쟁사와 차별화된 시각적 요소, 스토리텔링, 고객 경험 전략을 개발하세요.",
+                REPORT_FAILED_KEY: True
             }
 
     def search_ebook_content(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
@@ -2,6 +2,12 @@
 import streamlit as st
 from typing import Dict, List, Any
 
+from utils.prompt_templates import (
+    DIAGNOSIS_SECTION_SUFFIXES, area_query, build_context_prefix, build_prompt, prefix_hash
+)
+from utils.metrics import timed
+from utils.usage import call_llm
+
 class DiagnosisReportGenerator:
     """
     진단 보고서 생성 클래스 - 이북 데이터 기반 실용적 인사이트 제공
@@ -12,112 +18,88 @@ class DiagnosisReportGenerator:
         self.llm = llm
         self.vector_store = vector_store
     
-    # rag_diagnosis.py에서 확인
-def generate_report(self, answers, diagnosis_result):
-    """
-    자가진단 결과를 바탕으로 실용적인 전략 가이드를 생성합니다.
-    이북 데이터 기반의 실제 사례와 차별화된 전략을 제공합니다.
-    """
-    try:
-        # 기존 로직...
-        
-        # 테스트를 위한 로그 추가
-        st.write("새로운 진단 보고서 생성 로직 실행 중...")
-        
-        # 이북 데이터 기반 현재 상황 분석
-        current_diagnosis = self._generate_data_driven_diagnosis(
-            diagnosis_result, weak_areas, area_contexts
-        )
-        
-        # 실행 가능한 액션 플랜
-        action_plan = self._generate_actionable_plan(
-            diagnosis_result, weak_areas, area_contexts
-        )
-        
-        # 차별화 전략과 고급 팁
-        upgrade_tips = self._generate_advanced_tips(
-            diagnosis_result, weak_areas, area_contexts
-        )
-        
-        # 종합 보고서 반환
-        return {
-            "title": f"네이버 스마트 플레이스 최적화 전략 가이드 (V2)",  # 버전 표시 추가
-            "level": level,
-            "summary": summary,
-            "current_diagnosis": current_diagnosis,
-            "action_plan": action_plan, 
-            "upgrade_tips": upgrade_tips
-        }
-    except Exception as e:
-        st.error(f"진단 보고서 생성 중 오류: {e}")
-        return {
-            "title": "오류가 발생했습니다",
-            "level": "오류",
-            "summary": f"# 📑 오류 발생\n\n{str(e)}",
-            "current_diagnosis": "# 📊 현재 상황 분석\n\n오류로 인해 분석을 생성할 수 없습니다.",
-            "action_plan": "# 🎯 실행 전략\n\n오류로 인해 전략을 생성할 수 없습니다.",
-            "upgrade_tips": "# 💡 차별화 전략\n\n오류로 인해 전략을 생성할 수 없습니다."
-        }
+    @timed("diagnosis_generator.generate_report")
+    def generate_report(self, answers, diagnosis_result):
+        """
+        자가진단 결과를 바탕으로 실용적인 전략 가이드를 생성합니다.
+        이북 데이터 기반의 실제 사례와 차별화된 전략을 제공합니다.
+        """
+        try:
+            level = diagnosis_result.get("level", {}).get("name", "기본")
+            improvements = diagnosis_result.get("improvements", {})
+            weak_areas = [area['stage'] for area in improvements.get('weak_areas', [])]
+            
+            # 개선 필요 영역별 이북 컨텍스트 수집
+            area_contexts = {}
+            if self.vector_store:
+                queries = [area_query(area) for area in weak_areas[:2]]
+                area_contexts = dict(zip(weak_areas[:2], self.vector_store.get_relevant_contents(queries, n_results=2)))
+            
+            summary = (
+                "# 📑 네이버 스마트 플레이스 최적화 인사이트\n\n"
+                f"{improvements.get('overall_suggestion', '실용적인 최적화 전략과 차별화 방안이 필요합니다.')}"
+            )
+            
+            # 이북 데이터 기반 현재 상황 분석
+            current_diagnosis = self._generate_data_driven_diagnosis(
+                diagnosis_result, weak_areas, area_contexts
+            )
+            
+            # 실행 가능한 액션 플랜
+            action_plan = self._generate_actionable_plan(
+                diagnosis_result, weak_areas, area_contexts
+            )
+            
+            # 차별화 전략과 고급 팁
+            upgrade_tips = self._generate_advanced_tips(
+                diagnosis_result, weak_areas, area_contexts
+            )
+            
+            # 종합 보고서 반환
+            return {
+                "title": f"네이버 스마트 플레이스 최적화 전략 가이드 (V2)",  # 버전 표시 추가
+                "level": level,
+                "summary": summary,
+                "current_diagnosis": current_diagnosis,
+                "action_plan": action_plan, 
+                "upgrade_tips": upgrade_tips
+            }
+        except Exception as e:
+            st.error(f"진단 보고서 생성 중 오류: {e}")
+            return {
+                "title": "오류가 발생했습니다",
+                "level": "오류",
+                "summary": f"# 📑 오류 발생\n\n{str(e)}",
+                "current_diagnosis": "# 📊 현재 상황 분석\n\n오류로 인해 분석을 생성할 수 없습니다.",
+                "action_plan": "# 🎯 실행 전략\n\n오류로 인해 전략을 생성할 수 없습니다.",
+                "upgrade_tips": "# 💡 차별화 전략\n\n오류로 인해 전략을 생성할 수 없습니다."
+            }
+
+    def _predict(self, prompt: str, section: str) -> str:
+        """섹션 프롬프트로 LLM을 호출합니다. (토큰 수, 비용, 실행 시간 기록)"""
+        return call_llm(self.llm, prompt, section=f"diagnosis.{section}")
+
+    def build_prefix(self, weak_areas: List[str], area_contexts: Dict[str, str]) -> str:
+        """
+        세 섹션이 공유하는 프롬프트 접두부를 생성합니다.
+        레벨/점수가 아닌 이북 데이터 기반 분석이므로 개선 필요 영역과 참고 자료만 포함합니다.
+        """
+        return build_context_prefix(None, [], weak_areas, area_contexts)
+
+    def prefix_hash(self, weak_areas: List[str], area_contexts: Dict[str, str]) -> str:
+        """공통 접두부 해시를 반환합니다."""
+        return prefix_hash(self.build_prefix(weak_areas, area_contexts))
 
     def _generate_data_driven_diagnosis(self, diagnosis_result: Dict[str, Any], 
                                       weak_areas: List[str], 
                                       area_contexts: Dict[str, str]) -> str:
         """이북 데이터 기반 현재 상황 분석을 생성합니다."""
         try:
-            # 프롬프트 준비
-            weak_area_prompts = []
-            title_map = {
-                "인식하게 한다": "검색 노출 최적화",
-                "클릭하게 한다": "클릭율 높이는 전략",
-                "머물게 한다": "체류시간 늘리는 방법",
-                "연락오게 한다": "문의/예약 전환율 높이기",
-                "후속 피드백 받는다": "고객 재방문 유도 전략"
-            }
-            
-            for area in weak_areas[:2]:  # 상위 2개 영역에 집중
-                context = area_contexts.get(area, "")
-                title = title_map.get(area, area)
-                weak_area_prompts.append(f"""
-                영역: {title}
-                
-                참고 자료:
-                {context}
-                
-                이 영역의 현재 상황과 중요성, 경쟁사 대비 차별화 포인트:
-                """)
-            
-            combined_prompts = "\n\n".join(weak_area_prompts)
-            
-            # 종합 프롬프트 생성
-            prompt = f"""
-            네이버 스마트 플레이스 최적화 전문가로서, 다음 정보를 바탕으로 현재 상황 분석 보고서를 작성해 주세요.
-            이 보고서는 점수나 단계가 아닌, 이북에서 추출한 실제 데이터와 사례를 바탕으로 한 인사이트를 제공해야 합니다.
-            
-            다음 개선 필요 영역에 대한 분석을 수행해 주세요:
-            
-            {combined_prompts}
-            
-            다음 요구사항에 따라 현재 상황 분석을 작성해 주세요:
-            1. 제목은 "# 📊 현재 상황 분석"으로 시작합니다.
-            2. 일반적인 진단이 아닌, 이북 데이터에서 추출한 실제 사례와 통계를 포함합니다.
-            3. 산업 평균 대비 위치, 경쟁사와의 차별화 기회를 구체적으로 언급합니다.
-            4. 각 영역별로 아래 구조로 작성합니다:
-               ## [영역 이름] 현황
-               * 🔍 **산업 평균 비교**: (산업 평균 대비 위치와 의미)
-               * 💼 **실제 사례 분석**: (성공/실패 사례를 통한 인사이트)
-               * 🏆 **경쟁 우위 기회**: (차별화 가능한 기회 포인트)
-            
-            5. 각 영역은 정확하고 구체적인 수치, 사례, 벤치마크를 포함해야 합니다.
-            6. 마지막에는 '현재 상황이 비즈니스에 미치는 영향'에 대한 짧은 단락을 추가합니다.
-            
-            참고 사항:
-            - 일반적이고 포괄적인 조언이 아닌, 구체적이고 적용 가능한 인사이트를 제공합니다.
-            - 이북 데이터에서 추출한 실제 사례, 통계, 벤치마크를 활용합니다.
-            - 전문적이지만 이해하기 쉬운 언어를 사용합니다.
-            """
+            prefix = self.build_prefix(weak_areas, area_contexts)
+            prompt = build_prompt(prefix, DIAGNOSIS_SECTION_SUFFIXES["current_diagnosis"])
             
             # 실제 LLM을 통한 진단 생성
-            diagnosis = self.llm.predict(prompt)
+            diagnosis = self._predict(prompt, "current_diagnosis")
             return diagnosis
         except Exception as e:
             st.error(f"상황 분석 생성 중 오류: {e}")
@@ -142,66 +124,11 @@ def generate_report(self, answers, diagnosis_result):
                                  area_contexts: Dict[str, str]) -> str:
         """이북 데이터 기반 실행 가능한 액션 플랜을 생성합니다."""
         try:
-            # 프롬프트 준비
-            weak_area_prompts = []
-            title_map = {
-                "인식하게 한다": "검색 노출 최적화",
-                "클릭하게 한다": "클릭율 높이는 전략",
-                "머물게 한다": "체류시간 늘리는 방법",
-                "연락오게 한다": "문의/예약 전환율 높이기",
-                "후속 피드백 받는다": "고객 재방문 유도 전략"
-            }
-            
-            for area in weak_areas[:2]:  # 상위 2개 영역에 집중
-                context = area_contexts.get(area, "")
-                title = title_map.get(area, area)
-                weak_area_prompts.append(f"""
-                영역: {title}
-                
-                참고 자료:
-                {context}
-                
-                이 영역에 대한 실행 가능한 액션 플랜:
-                """)
-            
-            combined_prompts = "\n\n".join(weak_area_prompts)
-            
-            # 종합 프롬프트 생성
-            prompt = f"""
-            네이버 스마트 플레이스 최적화 전문가로서, 다음 정보를 바탕으로 구체적이고 실행 가능한 액션 플랜을 작성해 주세요.
-            이 액션 플랜은 점수나 단계가 아닌, 이북에서 추출한 실제 데이터와 성공 사례를 바탕으로 한 단계별 실행 전략을 제공해야 합니다.
-            
-            다음 개선 필요 영역에 대한 액션 플랜을 수립해 주세요:
-            
-            {combined_prompts}
-            
-            다음 요구사항에 따라 액션 플랜을 작성해 주세요:
-            1. 제목은 "# 🎯 실행 전략"으로 시작합니다.
-            2. 일반적인 조언이 아닌, 이북 데이터에서 추출한 실제 성공 사례를 기반으로 한 구체적 실행 전략을 제시합니다.
-            3. 각 영역별로 아래 구조로 작성합니다:
-               ## [영역 이름] 전략
-               * 📅 **Day 1-3**: (즉시 실행 가능한 액션 - 구체적인 방법과 도구)
-               * 📅 **Day 4-7**: (단기 실행 액션 - 구체적인 프로세스)
-               * 📅 **Day 8-14**: (중기 실행 액션 - 리소스와 방법론)
-               
-               → *예상 성과: (구체적인 기대 효과와 수치)*
-            
-            4. 각 액션은 다음 요소를 포함해야 합니다:
-               - 정확히 무엇을 해야 하는지 (도구, 템플릿, 방법)
-               - 어떻게 실행해야 하는지 (단계별 프로세스)
-               - 성공 지표는 무엇인지 (측정 방법)
-            
-            5. 이북에서 발견한 성공 사례나 통계를 언급하여 신뢰성을 높입니다.
-            6. 마지막에는 '실행 우선순위와 리소스 할당'에 대한 짧은 단락을 추가합니다.
-            
-            참고 사항:
-            - 일반적이고 포괄적인 조언이 아닌, 구체적이고 즉시 실행 가능한 액션을 제공합니다.
-            - 이북 데이터에서 추출한 실제 성공 사례와 방법론을 활용합니다.
-            - 각 액션은 비용, 시간, 필요 리소스 측면에서 현실적이어야 합니다.
-            """
+            prefix = self.build_prefix(weak_areas, area_contexts)
+            prompt = build_prompt(prefix, DIAGNOSIS_SECTION_SUFFIXES["action_plan"])
             
             # 실제 LLM을 통한 액션 플랜 생성
-            action_plan = self.llm.predict(prompt)
+            action_plan = self._predict(prompt, "action_plan")
             return action_plan
         except Exception as e:
             st.error(f"액션 플랜 생성 중 오류: {e}")
@@ -230,64 +157,11 @@ def generate_report(self, answers, diagnosis_result):
                               area_contexts: Dict[str, str]) -> str:
         """이북 데이터 기반 차별화 및 고급 전략을 생성합니다."""
         try:
-            # 프롬프트 준비
-            weak_area_prompts = []
-            title_map = {
-                "인식하게 한다": "검색 노출 최적화",
-                "클릭하게 한다": "클릭율 높이는 전략",
-                "머물게 한다": "체류시간 늘리는 방법",
-                "연락오게 한다": "문의/예약 전환율 높이기",
-                "후속 피드백 받는다": "고객 재방문 유도 전략"
-            }
-            
-            for area in weak_areas[:2]:  # 상위 2개 영역에 집중
-                context = area_contexts.get(area, "")
-                title = title_map.get(area, area)
-                weak_area_prompts.append(f"""
-                영역: {title}
-                
-                참고 자료:
-                {context}
-                
-                이 영역에 대한 차별화 및 고급 전략:
-                """)
-            
-            combined_prompts = "\n\n".join(weak_area_prompts)
-            
-            # 종합 프롬프트 생성
-            prompt = f"""
-            네이버 스마트 플레이스 최적화 전문가로서, 다음 정보를 바탕으로 차별화 전략과 고급 팁을 작성해 주세요.
-            이 내용은 일반적으로 쉽게 찾을 수 없는 고급 전략과 실제 성공 사례를 바탕으로 한 차별화 방안을 제공해야 합니다.
-            
-            다음 개선 필요 영역에 대한 차별화 전략을 제시해 주세요:
-            
-            {combined_prompts}
-            
-            다음 요구사항에 따라 차별화 전략을 작성해 주세요:
-            1. 제목은 "# 💡 차별화 전략"으로 시작합니다.
-            2. 일반적으로 알려진 팁이 아닌, 이북 데이터에서 추출한 독특한 전략과 희소한 인사이트를 제공합니다.
-            3. 각 영역별로 아래 구조로 작성합니다:
-               ## [영역 이름] 고급 전략
-               * 🚀 **상위 10% 전략**: (상위 10%의 비즈니스만 적용하는 고급 전략)
-               * 💎 **희소한 인사이트**: (일반적으로 알려지지 않은 특별한 팁)
-               * 📊 **성공 사례**: (실제 적용 사례와 결과)
-            
-            4. 각 전략은 다음 요소를 포함해야 합니다:
-               - 왜 이 방법이 효과적인지 (원리)
-               - 어떻게 구현할 수 있는지 (구체적 방법)
-               - 어떤 결과를 기대할 수 있는지 (효과)
-            
-            5. 실제 숫자, 통계, 사례 연구를 포함하여 신뢰성을 높입니다.
-            6. 마지막에는 '경쟁 우위 확보를 위한 통합 전략'에 대한 짧은 단락을 추가합니다.
-            
-            참고 사항:
-            - 일반적인 조언이 아닌, 독특하고 차별화된 전략을 제공합니다.
-            - 이북 데이터에서 발견한 성공 비즈니스의 실제 사례를 활용합니다.
-            - 고급스럽지만 현실적으로 적용 가능한 전략을 제시합니다.
-            """
+            prefix = self.build_prefix(weak_areas, area_contexts)
+            prompt = build_prompt(prefix, DIAGNOSIS_SECTION_SUFFIXES["upgrade_tips"])
             
             # 실제 LLM을 통한 차별화 전략 생성
-            upgrade_tips = self.llm.predict(prompt)
+            upgrade_tips = self._predict(prompt, "upgrade_tips")
             return upgrade_tips
         except Exception as e:
             st.error(f"차별화 전략 생성 중 오류: {e}")
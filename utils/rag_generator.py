@@ -2,6 +2,9 @@
 import streamlit as st
 from typing import Optional
 
+from utils.metrics import timed
+from utils.usage import call_llm
+
 class ResponseGenerator:
     """
     쿼리에 대한 응답을 생성하는 클래스
@@ -12,6 +15,7 @@ class ResponseGenerator:
         self.llm = llm
         self.vector_store = vector_store
     
+    @timed("response_generator.generate")
     def generate(self, query: str, context: str = None, n_results: int = 3) -> str:
         """
         쿼리에 대한 응답을 생성합니다.
@@ -53,7 +57,7 @@ class ResponseGenerator:
             """
             
             # 응답 생성
-            response = self.llm.predict(prompt_template)
+            response = call_llm(self.llm, prompt_template, section="response")
             return response
         except Exception as e:
             st.error(f"응답 생성 중 오류: {e}")
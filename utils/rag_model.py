@@ -3,130 +3,21 @@ import os
 import streamlit as st
 from typing import Dict, List, Any, Optional
 
-# 외부 라이브러리
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import TextLoader
-
 # 설정
-from config import OPENAI_API_KEY, LLM_MODEL, TEMPERATURE, DATA_DIR
-
-# ---------------------- 벡터스토어 ----------------------
-class VectorStore:
-    def __init__(self):
-        try:
-            api_key = st.secrets.get("OPENAI_API_KEY", OPENAI_API_KEY)
-            if not api_key:
-                st.error("OpenAI API 키가 설정되지 않았습니다.")
-                raise ValueError("API 키가 없습니다")
-            
-            # API 키 유효성 검사
-            try:
-                self.embeddings = OpenAIEmbeddings(
-                    openai_api_key=api_key,
-                    model="text-embedding-ada-002"
-                )
-                # 간단한 임베딩 테스트
-                self.embeddings.embed_query("test")
-            except Exception as e:
-                st.error(f"OpenAI API 키 유효성 검사 실패: {e}")
-                raise ValueError("API 키가 유효하지 않습니다")
-            
-            self.data_dir = DATA_DIR
-            vectorstore_path = os.path.join(self.data_dir, "vectorstore")
-            
-            # 벡터스토어 디렉토리 확인
-            if not os.path.exists(self.data_dir):
-                os.makedirs(self.data_dir, exist_ok=True)
-                st.warning(f"데이터 디렉토리가 생성되었습니다: {self.data_dir}")
-            
-            if os.path.exists(vectorstore_path):
-                try:
-                    self.vectorstore = FAISS.load_local(vectorstore_path, self.embeddings)
-                    st.success("벡터스토어를 성공적으로 로드했습니다.")
-                except Exception as e:
-                    st.warning(f"기존 벡터스토어 로드 실패, 새로 생성합니다: {e}")
-                    self._create_vectorstore()
-            else:
-                st.info("벡터스토어를 새로 생성합니다...")
-                self._create_vectorstore()
-                
-        except Exception as e:
-            st.error(f"벡터 스토어 초기화 오류: {e}")
-            raise
-
-    def _create_vectorstore(self):
-        try:
-            content_dir = os.path.join(self.data_dir, "content")
-            if not os.path.exists(content_dir):
-                os.makedirs(content_dir, exist_ok=True)
-                st.info(f"콘텐츠 디렉토리가 생성되었습니다: {content_dir}")
-            
-            text_files = [os.path.join(root, file)
-                         for root, _, files in os.walk(content_dir)
-                         for file in files if file.endswith(".txt")]
-            
-            ebook_file = os.path.join(self.data_dir, "ebook_content.txt")
-            if os.path.exists(ebook_file):
-                text_files.append(ebook_file)
-            
-            if not text_files:
-                default_file = os.path.join(content_dir, "default_content.txt")
-                with open(default_file, "w", encoding="utf-8") as f:
-                    f.write("""
-                    네이버 스마트 플레이스 최적화를 위한 기본 가이드:
-                    1. 정확한 기본 정보 입력하기
-                    2. 매력적인 이미지 사용하기
-                    3. 키워드 최적화하기
-                    4. 고객 리뷰 관리하기
-                    5. 정기적인 업데이트하기
-                    """)
-                text_files.append(default_file)
-                st.info("기본 콘텐츠 파일이 생성되었습니다.")
-            
-            documents = []
-            for file_path in text_files:
-                try:
-                    loader = TextLoader(file_path, encoding="utf-8")
-                    documents.extend(loader.load())
-                    st.success(f"파일 로드 성공: {os.path.basename(file_path)}")
-                except Exception as e:
-                    st.warning(f"파일 로드 오류 ({file_path}): {e}")
-            
-            if not documents:
-                raise ValueError("로드할 수 있는 문서가 없습니다.")
-            
-            text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-            split_documents = text_splitter.split_documents(documents)
-            
-            self.vectorstore = FAISS.from_documents(split_documents, self.embeddings)
-            vectorstore_path = os.path.join(self.data_dir, "vectorstore")
-            self.vectorstore.save_local(vectorstore_path)
-            st.success("벡터스토어가 성공적으로 생성되었습니다.")
-            
-        except Exception as e:
-            st.error(f"벡터스토어 생성 중 오류: {e}")
-            raise
-
-    def get_relevant_content(self, query: str, n_results: int = 3) -> str:
-        try:
-            docs = self.vectorstore.similarity_search(query, k=n_results)
-            context = "\n\n".join([doc.page_content for doc in docs])
-            return context
-        except Exception as e:
-            st.error(f"콘텐츠 검색 오류: {e}")
-            return "콘텐츠 검색 중 오류가 발생했습니다."
-
-    def raw_similarity_search(self, query: str, k: int = 5):
-        try:
-            if not query:
-                return []
-            docs = self.vectorstore.similarity_search(query, k=k)
-            return docs
-        except Exception as e:
-            st.error(f"유사 문서 검색 오류: {e}")
-            return []
+from config import (
+    OPENAI_API_KEY, LLM_MODEL, TEMPERATURE, RESPONSE_CACHE_SIZE, REPORT_SINGLE_CALL,
+    PROMPT_CACHING, PROMPT_CACHE_MIN_TOKENS
+)
+from utils.prompt_templates import (
+    REPORT_SECTION_SUFFIXES, REPORT_JSON_SUFFIX, REPORT_FAILURE_TEXT, REPORT_FAILED_KEY,
+    build_context_prefix, section_prefixes, build_prompt, prompt_cache_key, parse_sections_json, area_query
+)
+from utils.response_cache import ResponseCache
+from utils.metrics import timed, incr
+from utils.cpu_profile import profiled
+from utils.usage import call_llm
+from utils.openai_client import create_chat_model
+from utils.model_registry import get_vector_store
 
 # ---------------------- 질문/진단 유틸리티 (간략화) ----------------------
 # 실제 서비스에서는 questions.py에서 import 하거나, 아래처럼 필요한 함수만 포함
@@ -138,6 +29,7 @@ def suggest_improvements(result):
 # ---------------------- RAG 모델 통합 ----------------------
 class RAGModel:
     def __init__(self):
+        self.response_cache = ResponseCache(maxsize=RESPONSE_CACHE_SIZE)
         try:
             api_key = st.secrets.get("OPENAI_API_KEY", OPENAI_API_KEY)
             if not api_key:
@@ -146,11 +38,7 @@ class RAGModel:
             
             # API 키 유효성 검사
             try:
-                self.llm = ChatOpenAI(
-                    openai_api_key=api_key,
-                    model_name=LLM_MODEL,
-                    temperature=TEMPERATURE
-                )
+                self.llm = create_chat_model(api_key, model_name=LLM_MODEL, temperature=TEMPERATURE)
                 # 간단한 테스트 쿼리
                 self.llm.predict("test")
             except Exception as e:
@@ -159,7 +47,8 @@ class RAGModel:
             
             # 벡터스토어 초기화
             try:
-                self.vector_store = VectorStore()
+                # 벡터 검색 백엔드는 config.VECTOR_STORE_BACKEND로 선택 (프로세스 공용 색인)
+                self.vector_store = get_vector_store()
                 st.success("RAG 모델이 성공적으로 초기화되었습니다.")
             except Exception as e:
                 st.error(f"벡터스토어 초기화 실패: {e}")
@@ -202,16 +91,23 @@ class RAGModel:
 
             답변:
             """
-            response = self.llm.predict(prompt)
+            response = call_llm(self.llm, prompt, section="response")
             return response[:1000]  # 1000자 이내로 제한
         except Exception as e:
             st.error(f"응답 생성 중 오류: {e}")
             return "응답 생성 중 오류가 발생했습니다. 다시 시도해주세요."
 
-    def generate_diagnosis_report(self, answers: Dict[str, str], diagnosis_result: Dict[str, Any]) -> Dict[str, Any]:
+    @timed("rag_model.generate_diagnosis_report")
+    @profiled("generate_diagnosis_report")
+    def generate_diagnosis_report(self, answers: Dict[str, str], diagnosis_result: Dict[str, Any],
+                                  single_call: Optional[bool] = None) -> Dict[str, Any]:
         """
         자가진단 결과를 바탕으로 각 소제목별로 전문적 분석을 생성합니다.
+        single_call이 참이면 모든 섹션을 JSON 한 번의 호출로 요청하고, 누락된 섹션만 개별 호출로 보완합니다.
+        (None이면 config.REPORT_SINGLE_CALL 사용)
         """
+        if single_call is None:
+            single_call = REPORT_SINGLE_CALL
         try:
             level = diagnosis_result.get("level", {}).get("name", "기본")
             improvements = diagnosis_result.get("improvements", {})
@@ -220,103 +116,22 @@ class RAGModel:
             area_contexts = {}
             
             if self.vector_store:
-                # 약점 영역과 강점 영역 모두에 대한 컨텍스트 수집
-                for area in set(weak_areas + strong_areas):
-                    query = f"네이버 스마트 플레이스 {area} 전략과 성공 사례"
-                    area_contexts[area] = self.vector_store.get_relevant_content(query, n_results=2)
+                # 약점 영역과 강점 영역 모두에 대한 컨텍스트를 한 번의 임베딩 요청으로 수집
+                areas = list(dict.fromkeys(weak_areas + strong_areas))
+                queries = [area_query(area) for area in areas]
+                area_contexts = dict(zip(areas, self.vector_store.get_relevant_contents(queries, n_results=2)))
             
-            title_map = {
-                "인식하게 한다": "검색 노출 최적화",
-                "클릭하게 한다": "클릭율 높이는 전략",
-                "머물게 한다": "체류시간 늘리는 방법",
-                "연락오게 한다": "문의/예약 전환율 높이기",
-                "후속 피드백 받는다": "고객 재방문 유도 전략"
-            }
-
-            # 각 소제목별로 따로 프롬프트 생성
-            prompts = {
-                "overview": f"""
-                당신은 네이버 스마트 플레이스 최적화 전문가입니다. 아래 진단 결과를 바탕으로\n# 📊 종합 진단\n
-                1. 현재 상태: {level} 레벨로 진단되었습니다.
-                2. 강점 영역: {', '.join([title_map.get(area, area) for area in strong_areas[:2]])}
-                3. 개선 영역: {', '.join([title_map.get(area, area) for area in weak_areas[:2]])}
-                
-                800자 이내로 다음 내용을 포함하여 종합적인 진단 분석을 작성해주세요:
-                - 현재 스마트 플레이스 운영의 전반적인 수준
-                - 강점 영역에서의 우수한 점
-                - 개선 영역에서의 주요 과제
-                - 향후 발전 방향
-                
-                참고 자료:
-                {'\\n'.join([area_contexts.get(area, '') for area in weak_areas[:2] + strong_areas[:2]])}
-                """,
-                
-                "strengths_analysis": f"""
-                당신은 네이버 스마트 플레이스 최적화 전문가입니다. 아래 진단 결과를 바탕으로\n# 💪 강점 분석\n
-                1. 강점 영역: {', '.join([title_map.get(area, area) for area in strong_areas[:2]])}
-                2. 진단 레벨: {level}
-                
-                800자 이내로 다음 내용을 포함하여 강점 분석을 작성해주세요:
-                - 각 강점 영역별 세부 분석
-                - 현재 잘 하고 있는 점
-                - 강점을 더욱 강화할 수 있는 방안
-                - 경쟁사 대비 우위 요소
-                
-                참고 자료:
-                {'\\n'.join([area_contexts.get(area, '') for area in strong_areas[:2]])}
-                """,
-                
-                "improvements_analysis": f"""
-                당신은 네이버 스마트 플레이스 최적화 전문가입니다. 아래 진단 결과를 바탕으로\n# 🎯 개선점 분석\n
-                1. 개선 영역: {', '.join([title_map.get(area, area) for area in weak_areas[:2]])}
-                2. 진단 레벨: {level}
-                
-                800자 이내로 다음 내용을 포함하여 개선점 분석을 작성해주세요:
-                - 각 개선 영역별 세부 분석
-                - 현재 부족한 점
-                - 개선이 필요한 이유
-                - 개선 시 기대 효과
-                
-                참고 자료:
-                {'\\n'.join([area_contexts.get(area, '') for area in weak_areas[:2]])}
-                """,
-                
-                "action_plan": f"""
-                당신은 네이버 스마트 플레이스 최적화 전문가입니다. 아래 진단 결과를 바탕으로\n# 📝 액션 플랜\n
-                1. 개선 영역: {', '.join([title_map.get(area, area) for area in weak_areas[:2]])}
-                2. 진단 레벨: {level}
-                
-                800자 이내로 다음 내용을 포함하여 구체적인 액션 플랜을 작성해주세요:
-                - 단기 실행 계획 (1-2주)
-                - 중기 실행 계획 (1-3개월)
-                - 장기 실행 계획 (3-6개월)
-                - 각 단계별 구체적인 실행 방안
-                - 예상되는 결과와 효과
-                
-                참고 자료:
-                {'\\n'.join([area_contexts.get(area, '') for area in weak_areas[:2]])}
-                """,
-                
-                "upgrade_tips": f"""
-                당신은 네이버 스마트 플레이스 최적화 전문가입니다. 아래 진단 결과를 바탕으로\n# 💡 고급 전략 팁\n
-                1. 진단 레벨: {level}
-                2. 강점 영역: {', '.join([title_map.get(area, area) for area in strong_areas[:2]])}
-                3. 개선 영역: {', '.join([title_map.get(area, area) for area in weak_areas[:2]])}
-                
-                800자 이내로 다음 내용을 포함하여 고급 전략 팁을 작성해주세요:
-                - 경쟁사와의 차별화 전략
-                - 최신 트렌드 활용 방안
-                - 고객 경험 향상 팁
-                - ROI를 높이는 실전 전략
-                
-                참고 자료:
-                {'\\n'.join([area_contexts.get(area, '') for area in weak_areas[:2] + strong_areas[:2]])}
-                """
-            }
+            # 섹션별 접두부 + 지시문 (프롬프트 캐싱이 적용될 때만 모든 섹션이 같은 접두부 공유)
+            prefixes = section_prefixes(level, strong_areas, weak_areas, area_contexts,
+                                        PROMPT_CACHE_MIN_TOKENS if PROMPT_CACHING else None)
             
             results = {}
-            for key, prompt in prompts.items():
-                results[key] = self.llm.predict(prompt)[:800]
+            if single_call:
+                prefix = build_context_prefix(level, strong_areas, weak_areas, area_contexts)
+                results = self._generate_sections_single_call(prefix, prefixes)
+            for key in REPORT_SECTION_SUFFIXES:
+                if key not in results:
+                    results[key] = self._generate_section(prefixes[key], key)
             
             return {
                 "title": "네이버 스마트 플레이스 최적화 전략 가이드",
@@ -332,13 +147,42 @@ class RAGModel:
             return {
                 "title": "네이버 스마트 플레이스 최적화 전략 가이드",
                 "level": diagnosis_result.get("level", {}).get("name", "기본"),
-                "overview": "진단 결과 생성에 실패했습니다.",
-                "strengths_analysis": "진단 결과 생성에 실패했습니다.",
-                "improvements_analysis": "진단 결과 생성에 실패했습니다.",
-                "action_plan": "진단 결과 생성에 실패했습니다.",
-                "upgrade_tips": "진단 결과 생성에 실패했습니다."
+                "overview": REPORT_FAILURE_TEXT,
+                "strengths_analysis": REPORT_FAILURE_TEXT,
+                "improvements_analysis": REPORT_FAILURE_TEXT,
+                "action_plan": REPORT_FAILURE_TEXT,
+                "upgrade_tips": REPORT_FAILURE_TEXT,
+                REPORT_FAILED_KEY: True
             }
 
+    def _generate_section(self, prefix: str, section: str) -> str:
+        """섹션 하나를 생성합니다. (접두부 + 지시문 기준 응답 캐시 사용)"""
+        suffix = REPORT_SECTION_SUFFIXES[section]
+        cache_key = prompt_cache_key(prefix, suffix)
+        response = self.response_cache.get(cache_key)
+        if response is not None:
+            incr("response_cache_hits_total", section=section)
+            return response
+        incr("response_cache_misses_total", section=section)
+        response = call_llm(self.llm, build_prompt(prefix, suffix), section=section)[:800]
+        self.response_cache.set(cache_key, response)
+        return response
+
+    def _generate_sections_single_call(self, prefix: str, prefixes: Dict[str, str]) -> Dict[str, str]:
+        """모든 섹션을 JSON 한 번의 호출로 생성합니다. 유효한 섹션만 반환합니다. (prefixes: 섹션별 캐시 키 접두부)"""
+        try:
+            response = call_llm(self.llm, build_prompt(prefix, REPORT_JSON_SUFFIX), section="single_call")
+            sections = parse_sections_json(response, REPORT_SECTION_SUFFIXES.keys())
+        except Exception as e:
+            st.warning(f"단일 호출 보고서 생성 실패, 섹션별 생성으로 전환합니다: {e}")
+            return {}
+        results = {}
+        for key, text in sections.items():
+            results[key] = text[:800]
+            # 이후 같은 섹션을 개별 호출할 때도 재사용되도록 캐시에 저장
+            self.response_cache.set(prompt_cache_key(prefixes[key], REPORT_SECTION_SUFFIXES[key]), results[key])
+        return results
+
     def search_ebook_content(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
         try:
             if self.vector_store is None:
@@ -0,0 +1,126 @@
+# utils/report_flowables.py
+# 역할: 보고서 본문 구문 트리(utils/report_text.py) -> ReportLab 플로어블 변환
+#
+# 섹션 본문은 parse_report_text로 한 번만 파싱되어 캐시되고(화면 마크다운과 공유), 여기서는 트리를
+# 한 번 순회하며 Paragraph/ListFlowable을 만듭니다. 플로어블은 레이아웃 중에 상태가 바뀌므로
+# 캐시하지 않고 PDF마다 새로 만듭니다.
+#
+# 벤치마크: python -m utils.report_flowables --size-kb 64
+from typing import List, Tuple
+from xml.sax.saxutils import escape
+
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, Spacer, ListFlowable, ListItem
+
+from utils.report_text import Inline, Node, HEADING, LABEL, LIST, RULE, BOLD, ITALIC
+
+LIST_INDENT = 18  # 목록 항목 왼쪽 여백 (pt)
+
+
+def inline_markup(inline: Tuple[Inline, ...]) -> str:
+    """인라인 구간 -> ReportLab Paragraph 마크업 (텍스트는 XML 이스케이프)"""
+    parts = []
+    for span in inline:
+        text = escape(span.text)
+        if span.style == BOLD:
+            parts.append(f"<b>{text}</b>")
+        elif span.style == ITALIC:
+            parts.append(f"<i>{text}</i>")
+        else:
+            parts.append(text)
+    return "".join(parts)
+
+
+def _list_flowable(node: Node, body_style: ParagraphStyle) -> ListFlowable:
+    items = []
+    for entry in node.items:
+        flowables = [Paragraph(inline_markup(entry.inline), body_style)]
+        flowables.extend(_list_flowable(child, body_style) for child in entry.children)
+        # 번호 목록은 본문의 번호를 그대로 사용
+        items.append(ListItem(flowables, leftIndent=LIST_INDENT, **({"value": entry.number} if node.ordered else {})))
+    return ListFlowable(items, bulletType='1' if node.ordered else 'bullet')
+
+
+def to_flowables(nodes: Tuple[Node, ...], body_style: ParagraphStyle, heading_style: ParagraphStyle) -> List:
+    """
+    구문 트리를 플로어블 목록으로 변환합니다.
+
+    Args:
+        nodes: parse_report_text 결과
+        body_style: 문단/목록 스타일
+        heading_style: 제목/라벨 스타일
+
+    Returns:
+        플로어블 목록
+    """
+    elements = []
+    for node in nodes:
+        if node.kind in (HEADING, LABEL):
+            elements.append(Paragraph(inline_markup(node.inline), heading_style))
+        elif node.kind == LIST:
+            elements.append(_list_flowable(node, body_style))
+            elements.append(Spacer(1, 5*mm))
+        elif node.kind == RULE:
+            elements.append(Spacer(1, 5*mm))
+        else:
+            elements.append(Paragraph(inline_markup(node.inline), body_style))
+            elements.append(Spacer(1, 3*mm))
+    return elements
+
+
+if __name__ == "__main__":
+    # 벤치마크: 큰 보고서 본문의 파싱(처음/캐시 적중), 플로어블 변환, 레이아웃(doc.build) 시간
+    # 한글 폰트 없이 기본 폰트로 레이아웃하므로 절대값보다 단계별 비율을 봅니다.
+    import argparse
+    import time
+    from io import BytesIO
+
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate
+
+    from utils.report_text import parse_report_text, _cache
+
+    parser = argparse.ArgumentParser(description="보고서 본문 -> PDF 플로어블 변환 벤치마크")
+    parser.add_argument("--size-kb", type=int, default=64, help="본문 크기 (KB)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sample = (
+        "## Search visibility\n\n"
+        "Keywords and the  description are **missing**, so the place ranks low.\n"
+        "Use *local* and category keywords together.\n\n"
+        "[Basic information]\n"
+        "1. Keep opening hours & contacts up to date.\n"
+        "2. Take **professional** photos <storefront, menu>.\n"
+        "   - exterior, interior and signature dishes\n\n"
+        "Reviews: answer every review within 24 hours.\n"
+        "- Explain concrete fixes for negative reviews.\n"
+        "- Offer regulars a revisit benefit.\n\n"
+    )
+    text = sample * max(1, args.size_kb * 1024 // len(sample))
+    styles = getSampleStyleSheet()
+
+    def measure(func):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = func()
+        return (time.perf_counter() - start) / args.repeat * 1000, result
+
+    def cold_parse():
+        _cache.clear()
+        return parse_report_text(text, labels=True)
+
+    def build(elements):
+        SimpleDocTemplate(BytesIO(), pagesize=A4).build(list(elements))
+
+    parse_ms, nodes = measure(cold_parse)
+    cached_ms, _ = measure(lambda: parse_report_text(text, labels=True))
+    convert_ms, elements = measure(lambda: to_flowables(nodes, styles["Normal"], styles["Heading2"]))
+    build_ms, _ = measure(lambda: build(to_flowables(nodes, styles["Normal"], styles["Heading2"])))
+    print(f"본문 {len(text) / 1024:.0f}KB, 노드 {len(nodes)}개, 플로어블 {len(elements)}개 (반복 {args.repeat}회 평균)")
+    print(f"  파싱 (처음)          {parse_ms:9.2f}ms")
+    print(f"  파싱 (캐시 적중)     {cached_ms:9.2f}ms")
+    print(f"  플로어블 변환        {convert_ms:9.2f}ms")
+    print(f"  변환 + 레이아웃      {build_ms:9.2f}ms")
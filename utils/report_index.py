@@ -0,0 +1,326 @@
+# utils/report_index.py
+# 역할: 이전에 생성된 보고서를 점수 프로필(5개 영역 평균 점수 벡터 + 레벨)로 색인하고,
+#       가까운 진단에 대해 LLM 호출 없이 저장된 보고서를 재사용합니다.
+#
+# 각 항목에는 보고서를 만든 모델 키(모델 클래스, LLM_MODEL, 벡터 색인 버전)가 기록되고 같은 모델 키의
+# 항목만 재사용합니다. (설정이 바뀌어도 DB 파일은 남으므로 모의 모델/다른 모델 보고서를 내보내지 않도록)
+# 항목 수는 REPORT_NN_MAX_ENTRIES로 제한하며 초과하면 오래된 항목부터 삭제합니다.
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.questions import diagnosis_questions
+from utils.metrics import incr
+
+from config import (
+    REPORT_INDEX_DB_PATH, REPORT_NN_METRIC, REPORT_NN_MAX_DISTANCE, REPORT_NN_SAME_WEAK_AREAS,
+    REPORT_NN_MAX_ENTRIES
+)
+
+STAGES = list(diagnosis_questions.keys())
+
+
+def score_vector(diagnosis_result: Dict[str, Any]) -> np.ndarray:
+    """진단 결과를 영역 순서대로 정렬한 5차원 평균 점수 벡터로 변환합니다."""
+    stage_scores = diagnosis_result["stage_scores"]
+    return np.array([stage_scores[stage]["avg_score"] for stage in STAGES], dtype=np.float32)
+
+
+def weak_areas_of(diagnosis_result: Dict[str, Any]) -> Tuple[str, ...]:
+    """suggest_improvements와 같은 기준의 취약 영역 3개 (정렬된 튜플)"""
+    sorted_stages = sorted(diagnosis_result["stage_scores"].items(), key=lambda x: x[1]["avg_score"])
+    return tuple(sorted(stage for stage, _ in sorted_stages[:3]))
+
+
+def distances(vectors: np.ndarray, query: np.ndarray, metric: str = REPORT_NN_METRIC) -> np.ndarray:
+    """
+    저장된 벡터들과 질의 벡터 사이의 거리
+
+    metric:
+        euclidean - 유클리드 거리
+        manhattan - 영역별 점수 차이의 합
+        chebyshev - 영역별 점수 차이 중 최댓값 (어느 한 영역도 크게 다르지 않아야 할 때)
+    """
+    diff = np.abs(vectors - query)
+    if metric == "manhattan":
+        return diff.sum(axis=1)
+    if metric == "chebyshev":
+        return diff.max(axis=1)
+    return np.sqrt((diff ** 2).sum(axis=1))
+
+
+def retemplate(report: Dict[str, Any], stored_result: Dict[str, Any], diagnosis_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    저장된 보고서의 점수 표기를 새 진단 결과에 맞게 바꿉니다.
+    (레벨과 취약 영역이 같은 보고서만 재사용하므로 본문 내용은 그대로 둡니다.)
+
+    "영역명 ... N점"은 그 영역의 점수로, "전체 평균 ... N점"은 전체 평균으로만 바꿉니다.
+    모든 치환을 원문에 대해 한 번에 적용하므로 같은 점수가 여러 곳에 있거나
+    바꾼 값이 다른 항목의 이전 값과 같아도 서로 덮어쓰지 않습니다.
+    """
+    report = dict(report)
+    patterns = []
+    values = {}
+    for i, stage in enumerate(STAGES):
+        old = stored_result["stage_scores"][stage]["avg_score"]
+        new = diagnosis_result["stage_scores"][stage]["avg_score"]
+        if old != new:
+            patterns.append(rf"(?P<s{i}>{re.escape(stage)}[^\n]{{0,30}}?){re.escape(f'{old}점')}")
+            values[f"s{i}"] = f"{new}점"
+    old_avg, new_avg = stored_result.get("avg_score"), diagnosis_result.get("avg_score")
+    if old_avg is not None and old_avg != new_avg:
+        patterns.append(rf"(?P<avg>전체 평균[^\n]{{0,20}}?){re.escape(f'{old_avg}점')}")
+        values["avg"] = f"{new_avg}점"
+
+    if patterns:
+        pattern = re.compile("|".join(patterns))
+
+        def substitute(match):
+            return match.group(match.lastgroup) + values[match.lastgroup]
+
+        for key, value in report.items():
+            if isinstance(value, str):
+                report[key] = pattern.sub(substitute, value)
+    report["level"] = diagnosis_result["level"]["name"]
+    return report
+
+
+class ReportIndex:
+    """
+    점수 프로필 기반 보고서 재사용 색인 (SQLite 저장 + 메모리 벡터 검색)
+    """
+
+    def __init__(self, db_path: str = REPORT_INDEX_DB_PATH, metric: str = REPORT_NN_METRIC,
+                 max_distance: float = REPORT_NN_MAX_DISTANCE, same_weak_areas: bool = REPORT_NN_SAME_WEAK_AREAS,
+                 max_entries: int = REPORT_NN_MAX_ENTRIES):
+        """
+        초기화
+
+        Args:
+            db_path: 색인 DB 파일 경로
+            metric: 거리 함수 (euclidean, manhattan, chebyshev)
+            max_distance: 재사용할 최대 거리 (작을수록 품질↑, 적중률↓)
+            same_weak_areas: 취약 영역 3개가 같은 보고서만 재사용할지 여부
+            max_entries: 유지할 최대 항목 수
+        """
+        self.db_path = db_path
+        self.metric = metric
+        self.max_distance = max_distance
+        self.same_weak_areas = same_weak_areas
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS report_index (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    model_key TEXT NOT NULL DEFAULT '',
+                    level TEXT NOT NULL,
+                    weak_areas TEXT NOT NULL,
+                    vector TEXT NOT NULL,
+                    diagnosis_result TEXT NOT NULL,
+                    report TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(report_index)")]
+            if "model_key" not in columns:
+                # 모델 키가 없던 이전 항목은 어떤 모델과도 일치하지 않아 재사용되지 않고 삭제 순서를 기다립니다.
+                conn.execute("ALTER TABLE report_index ADD COLUMN model_key TEXT NOT NULL DEFAULT ''")
+        self._load()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _load(self):
+        """저장된 항목을 메모리 색인으로 읽어옵니다."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, model_key, level, weak_areas, vector FROM report_index ORDER BY id DESC LIMIT ?",
+                (self.max_entries,)
+            ).fetchall()
+        rows.reverse()
+        self._ids = [row[0] for row in rows]
+        self._models = np.array([row[1] for row in rows], dtype=object)
+        self._levels = np.array([row[2] for row in rows], dtype=object)
+        self._weak = np.array([row[3] for row in rows], dtype=object)
+        self._vectors = (np.array([json.loads(row[4]) for row in rows], dtype=np.float32)
+                         if rows else np.empty((0, len(STAGES)), dtype=np.float32))
+
+    def _evict(self, conn):
+        """최근 max_entries개만 남기고 오래된 항목을 삭제합니다. (다른 프로세스가 추가한 항목 포함)"""
+        deleted = conn.execute(
+            "DELETE FROM report_index WHERE id NOT IN (SELECT id FROM report_index ORDER BY id DESC LIMIT ?)",
+            (self.max_entries,)
+        ).rowcount
+        if deleted:
+            incr("report_index_evictions_total", value=deleted)
+        drop = len(self._ids) - self.max_entries
+        if drop > 0:
+            self._ids = self._ids[drop:]
+            self._models = self._models[drop:]
+            self._levels = self._levels[drop:]
+            self._weak = self._weak[drop:]
+            self._vectors = self._vectors[drop:]
+
+    def add(self, diagnosis_result: Dict[str, Any], report: Dict[str, Any], model_key: str = ""):
+        """
+        생성된 보고서를 색인에 추가합니다.
+
+        Args:
+            diagnosis_result: 진단 결과
+            report: 생성된 보고서
+            model_key: 보고서를 만든 모델 키 (같은 키로 조회할 때만 재사용)
+        """
+        vector = score_vector(diagnosis_result)
+        level = diagnosis_result["level"]["name"]
+        weak = "|".join(weak_areas_of(diagnosis_result))
+        stored = {k: v for k, v in diagnosis_result.items() if k in ("avg_score", "level", "stage_scores")}
+        with self._lock:
+            with self._connect() as conn:
+                row_id = conn.execute(
+                    "INSERT INTO report_index (model_key, level, weak_areas, vector, diagnosis_result, report, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (model_key, level, weak, json.dumps(vector.tolist()), json.dumps(stored, ensure_ascii=False),
+                     json.dumps(report, ensure_ascii=False), time.time())
+                ).lastrowid
+                self._ids.append(row_id)
+                self._models = np.append(self._models, np.array([model_key], dtype=object))
+                self._levels = np.append(self._levels, np.array([level], dtype=object))
+                self._weak = np.append(self._weak, np.array([weak], dtype=object))
+                self._vectors = np.vstack([self._vectors, vector[None, :]])
+                self._evict(conn)
+
+    def nearest(self, diagnosis_result: Dict[str, Any], max_distance: Optional[float] = None,
+                model_key: str = "") -> Optional[Tuple[int, float]]:
+        """
+        같은 모델 키와 레벨(과 취약 영역) 중 가장 가까운 항목을 찾습니다.
+
+        Returns:
+            (항목 ID, 거리) 또는 None
+        """
+        max_distance = self.max_distance if max_distance is None else max_distance
+        with self._lock:
+            if not self._ids:
+                return None
+            mask = (self._models == model_key) & (self._levels == diagnosis_result["level"]["name"])
+            if self.same_weak_areas:
+                mask &= self._weak == "|".join(weak_areas_of(diagnosis_result))
+            if not mask.any():
+                return None
+            candidates = np.flatnonzero(mask)
+            dist = distances(self._vectors[candidates], score_vector(diagnosis_result), self.metric)
+            best = int(np.argmin(dist))
+            if dist[best] > max_distance:
+                return None
+            return self._ids[candidates[best]], float(dist[best])
+
+    def lookup(self, diagnosis_result: Dict[str, Any], max_distance: Optional[float] = None,
+               model_key: str = "") -> Optional[Dict[str, Any]]:
+        """
+        같은 모델 키의 가까운 보고서를 찾아 새 진단 결과에 맞게 재구성합니다. 없으면 None
+        보고서의 "reused_distance" 키에 거리가 기록됩니다.
+        """
+        found = self.nearest(diagnosis_result, max_distance, model_key)
+        row = None
+        if found is not None:
+            row_id, distance = found
+            with self._connect() as conn:
+                row = conn.execute("SELECT diagnosis_result, report FROM report_index WHERE id = ?", (row_id,)).fetchone()
+        if row is None:
+            # 다른 프로세스가 삭제한 항목도 미적중으로 처리
+            self.misses += 1
+            incr("report_index_lookups_total", result="miss")
+            return None
+        self.hits += 1
+        incr("report_index_lookups_total", result="hit")
+        report = retemplate(json.loads(row[1]), json.loads(row[0]), diagnosis_result)
+        report["reused_distance"] = round(distance, 3)
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        """색인 크기와 적중률"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._ids),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "metric": self.metric,
+            "max_distance": self.max_distance
+        }
+
+    def __len__(self):
+        return len(self._ids)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_report_index() -> ReportIndex:
+    """프로세스 공용 보고서 색인을 반환합니다."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ReportIndex()
+        return _index
+
+
+# 거리 임계값별 적중률 확인 (임의 응답 시뮬레이션)
+if __name__ == "__main__":
+    import random
+    import tempfile
+    from utils.questions import calculate_score
+
+    random.seed(0)
+    question_ids = [q["id"] for questions in diagnosis_questions.values() for q in questions]
+
+    def random_result():
+        # 실제 사용자처럼 한 사람의 응답은 비슷한 수준에 모여 있다고 가정
+        center = random.randint(0, 4)
+        answers = {q: "ABCDE"[min(4, max(0, center + random.randint(-1, 1)))] for q in question_ids}
+        return calculate_score(answers)
+
+    history = [random_result() for _ in range(500)]
+    queries = [random_result() for _ in range(500)]
+    for metric in ("euclidean", "chebyshev"):
+        for max_distance in (0.3, 0.5, 1.0):
+            with tempfile.TemporaryDirectory() as tmp:
+                index = ReportIndex(os.path.join(tmp, "index.sqlite3"), metric=metric, max_distance=max_distance)
+                for result in history:
+                    index.add(result, {"overview": f"평균 {result['avg_score']}점"}, model_key="model-a")
+                for result in queries:
+                    index.lookup(result, model_key="model-a")
+                print(f"{metric:9s} 거리 ≤ {max_distance}: 적중률 {index.stats()['hit_rate']:.1%}")
+
+    # 다른 모델 키의 보고서는 재사용하지 않고, 항목 수는 max_entries로 제한
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ReportIndex(os.path.join(tmp, "index.sqlite3"), max_distance=1.0, max_entries=100)
+        for result in history:
+            index.add(result, {"overview": "모의 보고서"}, model_key="MockRAGModel")
+        assert len(index) == 100 and len(ReportIndex(index.db_path, max_entries=100)) == 100
+        assert index.lookup(history[-1], model_key="RAGModel") is None
+        assert index.lookup(history[-1], model_key="MockRAGModel") is not None
+        print(f"모델 키 필터/항목 수 제한 확인 (항목 {len(index)}개)")
+
+    # 전체 평균과 같은 영역 점수가 있어도 각 줄은 자기 점수로 바뀌어야 함
+    stored = {"avg_score": 3.0, "level": {"name": "중급"},
+              "stage_scores": {stage: {"avg_score": 3.0} for stage in STAGES}}
+    result = {"avg_score": 3.2, "level": {"name": "중급"},
+              "stage_scores": {stage: {"avg_score": 4.0 if i == 0 else 3.0} for i, stage in enumerate(STAGES)}}
+    text = "전체 평균 점수는 3.0점(5점 만점)입니다.\n" + "\n".join(f"- {stage}: 평균 3.0점" for stage in STAGES)
+    lines = retemplate({"overview": text}, stored, result)["overview"].split("\n")
+    assert lines[0] == "전체 평균 점수는 3.2점(5점 만점)입니다.", lines[0]
+    assert lines[1] == f"- {STAGES[0]}: 평균 4.0점", lines[1]
+    assert all(line.endswith("평균 3.0점") for line in lines[2:]), lines
+    print("점수 재구성 확인 (평균과 영역 점수가 겹치는 경우)")
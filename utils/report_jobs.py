@@ -0,0 +1,65 @@
+# utils/report_jobs.py
+# 역할: 진단 보고서 + PDF 생성 작업 정의와 프로세스 공용 작업 큐
+import logging
+import threading
+from typing import Any, Callable, Dict
+
+from utils.job_queue import JobQueue
+from utils.model_registry import get_rag_model
+from utils.report_policy import generate_report_tiered
+from utils.report_store import get_report_store
+from utils.report_pdf import pdf_key, render_pdf
+from utils.metrics import start_trace
+from utils.cpu_profile import profile_request
+
+from config import JOB_DB_PATH, JOB_WORKERS, JOB_LEASE_SECONDS, JOB_RETENTION_HOURS
+
+logger = logging.getLogger(__name__)
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def run_report_job(job_id: str, payload: Dict[str, Any], report_progress: Callable) -> Dict[str, Any]:
+    """
+    보고서 섹션과 PDF를 생성하는 작업 처리 함수
+
+    Args:
+        job_id: 작업 ID
+        payload: {"answers": ..., "diagnosis_result": ..., "profile": CPU 프로파일 요청 여부 (선택)}
+        report_progress: 진행률 기록 함수 report_progress(progress, message)
+
+    Returns:
+        {"report_data": 보고서 데이터, "pdf_path": PDF 경로 (실패 시 빈 문자열), "tier": 응답 단계}
+    """
+    answers = payload["answers"]
+    diagnosis_result = payload["diagnosis_result"]
+
+    # 작업 ID를 진단 ID로 하는 트레이스에 단계별 실행 시간을 기록 (요청 시 CPU 프로파일도 같은 ID로 기록)
+    with start_trace(job_id), profile_request(job_id, enabled=bool(payload.get("profile"))):
+        report_progress(10, "보고서를 생성하고 있습니다...")
+        # 마감 시간 안에 끝나지 않으면 캐시/템플릿 보고서로 대체 (report_data["tier"]에 기록)
+        report_data = generate_report_tiered(get_rag_model(), answers=answers, diagnosis_result=diagnosis_result)
+
+        report_progress(70, "PDF 보고서를 생성하고 있습니다...")
+        pdf_path = ""
+        try:
+            # 서버 측 저장소 ID로 PDF 캐시에 저장 (결과 페이지 다운로드 버튼이 같은 파일을 바로 제공)
+            store = get_report_store()
+            key = pdf_key(store.put(diagnosis_result), store.put(report_data))
+            pdf_path = render_pdf(diagnosis_result, report_data, key)
+        except Exception:
+            # PDF 실패는 보고서 결과에 영향을 주지 않음
+            logger.exception(f"PDF 생성 작업 오류 ({job_id})")
+
+    return {"report_data": report_data, "pdf_path": pdf_path, "tier": report_data.get("tier")}
+
+
+def get_job_queue() -> JobQueue:
+    """프로세스 전체가 공유하는 보고서 작업 큐를 반환합니다."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(JOB_DB_PATH, run_report_job, workers=JOB_WORKERS, lease_seconds=JOB_LEASE_SECONDS,
+                              retention_seconds=JOB_RETENTION_HOURS * 3600)
+        return _queue
@@ -0,0 +1,341 @@
+# utils/report_library.py
+# 역할: (레벨, 취약 영역 순서, 점수 구간, 강점 영역) 프로필별 보고서를 미리 생성해 두는 보고서 라이브러리
+#
+# suggest_improvements는 가장 낮은 3개 영역을, get_action_items는 점수 구간(low/medium/high)별
+# 고정 항목을 사용하므로 보고서 내용을 결정하는 프로필의 수는 많지 않습니다.
+# 모델은 평균 4.0점 이상인 영역을 강점 영역으로 개요/강점 분석에 적으므로 강점 영역 집합도 프로필에 포함합니다.
+# 오프라인 배치로 모든 프로필의 보고서를 생성해 압축 파일 하나에 저장하고,
+# 온라인 요청은 프로필 조회 + 점수 표기 재구성만 수행합니다.
+#
+# 생성 방법:
+#   python -m utils.report_library build --workers 4 --rate 1.0
+#   (RAG_BACKEND=openai로 실행하면 RAGModel, 기본값이면 MockRAGModel로 생성)
+#
+# 생성에 실패한 대체 보고서는 저장하지 않습니다. 라이브러리를 만든 모델이 현재 모델과 다르면
+# 라이브러리를 사용하지 않습니다. (다른 모델로 다시 생성 필요)
+# 프로필 형식이 바뀌면 LIBRARY_VERSION을 올리며, 이전 버전 파일은 사용하지 않습니다. (다시 생성 필요)
+import argparse
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.questions import diagnosis_questions, calculate_score, suggest_improvements
+from utils.report_index import retemplate
+from utils.prompt_templates import is_failed_report
+from utils.metrics import incr
+
+from config import REPORT_LIBRARY_PATH
+
+logger = logging.getLogger(__name__)
+
+STAGES = list(diagnosis_questions.keys())
+# get_action_items와 같은 점수 구간 경계
+TIER_BOUNDS = (2.5, 4.0)
+# determine_level과 같은 레벨 경계
+LEVEL_BOUNDS = (1.5, 2.5, 3.5, 4.5)
+# 라이브러리 파일 형식 버전 (2: 프로필에 강점 영역 추가)
+LIBRARY_VERSION = 2
+
+Profile = Tuple[str, Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]
+
+
+def score_tier(score: float) -> str:
+    """get_action_items의 점수 구간"""
+    if score < TIER_BOUNDS[0]:
+        return "low"
+    if score < TIER_BOUNDS[1]:
+        return "medium"
+    return "high"
+
+
+def profile_of(diagnosis_result: Dict[str, Any]) -> Profile:
+    """진단 결과의 프로필 (레벨, 취약 영역 순서, 취약 영역별 점수 구간, 강점 영역)"""
+    stage_scores = diagnosis_result["stage_scores"]
+    weak = sorted(stage_scores.items(), key=lambda x: x[1]["avg_score"])[:3]
+    return (
+        diagnosis_result["level"]["name"],
+        tuple(stage for stage, _ in weak),
+        tuple(score_tier(info["avg_score"]) for _, info in weak),
+        tuple(stage for stage in STAGES if stage_scores[stage]["avg_score"] >= TIER_BOUNDS[1])
+    )
+
+
+def profile_id(profile: Profile) -> str:
+    level, weak, tiers, strong = profile
+    return "|".join([level, ",".join(weak), ",".join(tiers), ",".join(strong)])
+
+
+def answers_for_stage_sums(stage_sums: List[int]) -> Dict[str, str]:
+    """영역별 점수 합계가 stage_sums가 되도록 문항별 응답을 고릅니다."""
+    answers = {}
+    for stage, total in zip(STAGES, stage_sums):
+        questions = diagnosis_questions[stage]
+        base, extra = divmod(int(total), len(questions))
+        for i, question in enumerate(questions):
+            target = base + (1 if i < extra else 0)
+            option = min(question["options"], key=lambda o: abs(o["score"] - target))
+            answers[question["id"]] = option["value"]
+    return answers
+
+
+def enumerate_profiles() -> Dict[str, Dict[str, Any]]:
+    """
+    가능한 모든 영역별 점수 조합을 벡터 연산으로 훑어 프로필과 대표 응답 집합을 만듭니다.
+    대표 응답은 프로필에 속한 점수 조합의 중심에 가장 가까운 조합입니다.
+
+    Returns:
+        {프로필 ID: {"profile": 프로필, "answers": 대표 응답, "count": 점수 조합 수}}
+    """
+    sizes = [len(diagnosis_questions[stage]) for stage in STAGES]
+    ranges = [np.arange(n * 1, n * 5 + 1) for n in sizes]
+    grid = np.array(np.meshgrid(*ranges, indexing="ij")).reshape(len(STAGES), -1).T
+    # calculate_score와 같은 반올림 결과가 나오도록 파이썬 round로 만든 조회표 사용
+    avg = np.stack([
+        np.array([round(s / n, 1) for s in range(n * 5 + 1)])[grid[:, i]] for i, n in enumerate(sizes)
+    ], axis=1)
+    total_table = np.array([round(s / sum(sizes), 1) for s in range(sum(sizes) * 5 + 1)])
+    total_avg = total_table[grid.sum(axis=1)]
+
+    order = np.argsort(avg, axis=1, kind="stable")[:, :3]
+    tiers = np.digitize(np.take_along_axis(avg, order, axis=1), TIER_BOUNDS)
+    levels = np.digitize(total_avg, LEVEL_BOUNDS)
+    # 강점 영역(평균 4.0점 이상) 집합은 영역별 비트로 표현
+    strong = ((avg >= TIER_BOUNDS[1]) * (1 << np.arange(len(STAGES)))).sum(axis=1)
+    codes = ((levels * 1000 + order[:, 0] * 100 + order[:, 1] * 10 + order[:, 2]) * 100
+             + tiers[:, 0] * 9 + tiers[:, 1] * 3 + tiers[:, 2]) * (1 << len(STAGES)) + strong
+
+    uniq, inverse, counts = np.unique(codes, return_inverse=True, return_counts=True)
+    centroids = np.zeros((len(uniq), len(STAGES)))
+    np.add.at(centroids, inverse, avg)
+    centroids /= counts[:, None]
+    dist = np.linalg.norm(avg - centroids[inverse], axis=1)
+    # 그룹별 중심에 가장 가까운 행
+    best = np.lexsort((dist, inverse))
+    first = np.searchsorted(inverse[best], np.arange(len(uniq)))
+
+    profiles = {}
+    for group, row in enumerate(best[first]):
+        answers = answers_for_stage_sums(grid[row].tolist())
+        # 실제 calculate_score 결과로 프로필을 다시 계산 (반올림 차이 방지)
+        profile = profile_of(calculate_score(answers))
+        entry = profiles.setdefault(profile_id(profile), {"profile": profile, "answers": answers, "count": 0})
+        entry["count"] += int(counts[group])
+    return profiles
+
+
+class RateLimiter:
+    """
+    초당 요청 수 제한 (토큰 버킷)
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """초기화"""
+        self.rate = rate
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰이 생길 때까지 기다립니다."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def library_model_name(rag_model) -> str:
+    """라이브러리에 기록하는 모델 이름 (LLM 모델명, 없으면 모델 클래스 이름)"""
+    return getattr(getattr(rag_model, "llm", None), "model_name", None) or type(rag_model).__name__
+
+
+def save_library(path: str, entries: Dict[str, Dict[str, Any]], model_name: str):
+    """
+    라이브러리를 gzip JSON으로 저장합니다.
+    섹션 문자열은 중복 제거된 문자열 표에 한 번만 저장하고 프로필은 인덱스로 참조합니다.
+    """
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    profiles = {}
+    for pid, entry in entries.items():
+        profiles[pid] = {
+            "diagnosis_result": entry["diagnosis_result"],
+            "sections": {k: intern(v) for k, v in entry["report"].items() if isinstance(v, str)}
+        }
+    data = {"version": LIBRARY_VERSION, "model": model_name, "created_at": time.time(), "strings": strings, "profiles": profiles}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class ReportLibrary:
+    """
+    미리 생성된 프로필별 보고서 조회 클래스
+    """
+
+    def __init__(self, path: str = REPORT_LIBRARY_PATH, model_name: Optional[str] = None):
+        """
+        초기화 - 파일이 없으면 빈 라이브러리
+
+        Args:
+            path: 라이브러리 파일 경로
+            model_name: 현재 모델 이름 (지정하면 라이브러리를 만든 모델과 다를 때 빈 라이브러리로 사용)
+        """
+        self.path = path
+        self.model = None
+        self._strings: List[str] = []
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(path):
+            return
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != LIBRARY_VERSION:
+            logger.warning(f"보고서 라이브러리 형식(버전 {data.get('version')})이 현재 형식(버전 {LIBRARY_VERSION})과 달라 사용하지 않습니다.")
+            return
+        self.model = data.get("model")
+        if model_name is not None and self.model != model_name:
+            logger.warning(f"보고서 라이브러리 모델({self.model})이 현재 모델({model_name})과 달라 사용하지 않습니다.")
+            return
+        self._strings = data["strings"]
+        # 이전에 저장된 실패 대체 보고서 제외
+        self._profiles = {pid: entry for pid, entry in data["profiles"].items()
+                          if not is_failed_report(self._report(entry))}
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """저장용 형식({프로필 ID: {"diagnosis_result", "report"}})으로 모든 항목을 반환합니다."""
+        return {pid: {"diagnosis_result": entry["diagnosis_result"], "report": self._report(entry)}
+                for pid, entry in self._profiles.items()}
+
+    def _report(self, entry: Dict[str, Any]) -> Dict[str, str]:
+        return {k: self._strings[i] for k, i in entry["sections"].items()}
+
+    def lookup(self, diagnosis_result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        진단 결과의 프로필에 해당하는 보고서를 점수 표기만 바꿔 반환합니다. 없으면 None
+        """
+        entry = self._profiles.get(profile_id(profile_of(diagnosis_result)))
+        if entry is None:
+            incr("report_library_lookups_total", result="miss")
+            return None
+        incr("report_library_lookups_total", result="hit")
+        return retemplate(self._report(entry), entry["diagnosis_result"], diagnosis_result)
+
+    def __len__(self):
+        return len(self._profiles)
+
+
+_libraries: Dict[str, ReportLibrary] = {}
+_library_lock = threading.Lock()
+
+
+def get_report_library(model_name: str) -> ReportLibrary:
+    """모델별 프로세스 공용 보고서 라이브러리를 반환합니다. (최초 호출 시 파일 로드)"""
+    with _library_lock:
+        if model_name not in _libraries:
+            _libraries[model_name] = ReportLibrary(model_name=model_name)
+        return _libraries[model_name]
+
+
+def build_library(rag_model, path: str = REPORT_LIBRARY_PATH, workers: int = 4, rate: float = 1.0,
+                  limit: Optional[int] = None, save_every: int = 50) -> int:
+    """
+    모든 프로필의 보고서를 병렬로 생성해 저장합니다. 이미 저장된 프로필은 건너뜁니다. (중단 후 재개 가능)
+
+    Args:
+        rag_model: 보고서 생성 모델
+        path: 저장 경로
+        workers: 동시 생성 수
+        rate: 초당 보고서 생성 시작 수
+        limit: 생성할 최대 프로필 수 (시험용)
+        save_every: 중간 저장 주기
+
+    Returns:
+        새로 생성한 보고서 수
+    """
+    profiles = enumerate_profiles()
+    existing = ReportLibrary(path)
+    entries = existing.entries()
+    todo = [(pid, p) for pid, p in sorted(profiles.items(), key=lambda x: -x[1]["count"]) if pid not in entries]
+    if limit is not None:
+        todo = todo[:limit]
+    print(f"프로필 {len(profiles)}개 중 {len(entries)}개 저장됨, {len(todo)}개 생성 예정")
+
+    limiter = RateLimiter(rate)
+    lock = threading.Lock()
+    model_name = library_model_name(rag_model)
+    if entries and existing.model != model_name:
+        raise ValueError(f"{path}는 다른 모델({existing.model})로 생성되었습니다. 다른 경로를 지정하세요.")
+
+    def generate(pid, profile):
+        limiter.acquire()
+        diagnosis_result = calculate_score(profile["answers"])
+        diagnosis_result["improvements"] = suggest_improvements(diagnosis_result)
+        report = rag_model.generate_diagnosis_report(answers=profile["answers"], diagnosis_result=diagnosis_result)
+        if is_failed_report(report):
+            raise ValueError(f"{pid} 실패 대체 보고서는 저장하지 않습니다.")
+        stored = {k: diagnosis_result[k] for k in ("avg_score", "level", "stage_scores")}
+        return pid, {"diagnosis_result": stored, "report": report}
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(generate, pid, profile) for pid, profile in todo]
+        for future in as_completed(futures):
+            try:
+                pid, entry = future.result()
+            except Exception:
+                logger.exception("보고서 생성 실패")
+                continue
+            with lock:
+                entries[pid] = entry
+                done += 1
+                if done % save_every == 0:
+                    save_library(path, entries, model_name)
+                    print(f"{done}/{len(todo)} 저장")
+    save_library(path, entries, model_name)
+    return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="프로필별 보고서 라이브러리 생성")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="보고서 사전 생성")
+    build.add_argument("--workers", type=int, default=4)
+    build.add_argument("--rate", type=float, default=1.0, help="초당 보고서 생성 시작 수")
+    build.add_argument("--limit", type=int, default=None)
+    build.add_argument("--path", default=REPORT_LIBRARY_PATH)
+    subparsers.add_parser("profiles", help="프로필 목록 통계")
+    args = parser.parse_args()
+
+    if args.command == "profiles":
+        start = time.perf_counter()
+        profiles = enumerate_profiles()
+        print(f"프로필 {len(profiles)}개 ({time.perf_counter() - start:.2f}초)")
+        for pid, entry in sorted(profiles.items(), key=lambda x: -x[1]["count"])[:10]:
+            print(f"  {entry['count']:7d}  {pid}")
+    else:
+        from utils.model_registry import get_rag_model
+        count = build_library(get_rag_model(), args.path, args.workers, args.rate, args.limit)
+        library = ReportLibrary(args.path)
+        print(f"{count}개 생성, 라이브러리 {len(library)}개 프로필, {os.path.getsize(args.path) / 1024:.1f}KB")
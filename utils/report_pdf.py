@@ -0,0 +1,151 @@
+# utils/report_pdf.py
+# 역할: 보고서별 PDF 사전 생성과 바이트 캐시
+#
+# 보고서가 준비되는 즉시 백그라운드에서 PDF를 만들어 두고, 결과 페이지의 다운로드 버튼은
+# 캐시된 바이트를 바로 제공합니다. (클릭 후 ReportLab 생성을 기다리지 않음)
+#
+# PDF 키는 서버 측 저장소(utils/report_store.py)의 진단 결과 ID + 보고서 ID입니다.
+# 내용이 같으면 키도 같으므로 같은 PDF를 한 번만 만들고, 파일(PDF_CACHE_DIR)과
+# 메모리(LRU) 두 단계로 보관합니다.
+# 생성에 실패한 PDF는 PDF_FAILURE_RETRY_SECONDS 동안만 실패로 표시하고, 그 뒤 start_pdf에서 다시 생성합니다.
+# PDF_CACHE_DIR의 파일은 PDF_CACHE_MAX_FILES개까지만 유지합니다. (삭제된 PDF는 다음 start_pdf에서 다시 생성)
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from utils.response_cache import ResponseCache
+from utils.report_store import get_report_store
+from utils.model_registry import get_pdf_generator
+from utils.metrics import incr
+from utils.file_retention import prune_oldest_files
+
+from config import PDF_CACHE_DIR, PDF_WORKERS, PDF_CACHE_SIZE, PDF_FAILURE_RETRY_SECONDS, PDF_CACHE_MAX_FILES
+
+logger = logging.getLogger(__name__)
+
+STATUS_READY = "ready"
+STATUS_PENDING = "pending"
+STATUS_FAILED = "failed"
+STATUS_MISSING = "missing"
+
+_bytes_cache = ResponseCache(maxsize=PDF_CACHE_SIZE)
+_pending: Dict[str, Future] = {}
+_failed: Dict[str, float] = {}  # PDF 키 -> 실패 시각 (time.monotonic)
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def pdf_key(diagnosis_id: str, report_id: str) -> str:
+    return f"{report_id}-{diagnosis_id}"
+
+
+def pdf_cache_path(key: str) -> str:
+    return os.path.join(PDF_CACHE_DIR, f"{key}.pdf")
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PDF_WORKERS, thread_name_prefix="pdf-render")
+        return _executor
+
+
+def render_pdf(diagnosis_result: Dict[str, Any], report_data: Dict[str, Any], key: str) -> str:
+    """
+    PDF를 생성해 캐시(파일 + 메모리)에 저장하고 파일 경로를 반환합니다. 이미 있으면 다시 만들지 않습니다.
+    실패하면 예외가 발생합니다.
+    """
+    path = pdf_cache_path(key)
+    if os.path.exists(path):
+        return path
+    data = get_pdf_generator().render_bytes(diagnosis_result, report_data)
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    # 다른 프로세스가 읽는 중에 덜 쓴 파일이 보이지 않도록 임시 파일에 쓴 뒤 교체
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    _bytes_cache.set(key, data)
+    incr("pdf_renders_total")
+    prune_oldest_files(PDF_CACHE_DIR, ".pdf", PDF_CACHE_MAX_FILES)
+    return path
+
+
+def _render_stored(diagnosis_id: str, report_id: str, key: str):
+    store = get_report_store()
+    diagnosis_result, report_data = store.get(diagnosis_id), store.get(report_id)
+    if diagnosis_result is None or report_data is None:
+        raise KeyError(f"저장소에 없는 진단/보고서 ID: {diagnosis_id}, {report_id}")
+    render_pdf(diagnosis_result, report_data, key)
+
+
+def _on_done(key: str, future: Future):
+    with _lock:
+        _pending.pop(key, None)
+        error = future.exception()
+        if error is None:
+            _failed.pop(key, None)
+        else:
+            _failed[key] = time.monotonic()
+    if error is not None:
+        logger.error(f"PDF 사전 생성 실패 ({key}): {error}", exc_info=error)
+
+
+def start_pdf(diagnosis_id: Optional[str], report_id: Optional[str]) -> str:
+    """
+    저장소의 진단 결과/보고서로 PDF 생성을 백그라운드에서 시작합니다.
+    이미 준비되었거나 생성 중이면 아무것도 하지 않습니다.
+
+    Returns:
+        PDF 상태 (ready, pending, failed, missing)
+    """
+    if not diagnosis_id or not report_id:
+        return STATUS_MISSING
+    key = pdf_key(diagnosis_id, report_id)
+    status = pdf_status(diagnosis_id, report_id)
+    if status != STATUS_MISSING:
+        return status
+    executor = _get_executor()
+    with _lock:
+        if key in _pending:
+            return STATUS_PENDING
+        future = executor.submit(_render_stored, diagnosis_id, report_id, key)
+        _pending[key] = future
+    future.add_done_callback(lambda f: _on_done(key, f))
+    return STATUS_PENDING
+
+
+def pdf_status(diagnosis_id: str, report_id: str) -> str:
+    """PDF 상태 (ready, pending, failed, missing)"""
+    key = pdf_key(diagnosis_id, report_id)
+    if _bytes_cache.get(key) is not None or os.path.exists(pdf_cache_path(key)):
+        return STATUS_READY
+    with _lock:
+        if key in _pending:
+            return STATUS_PENDING
+        failed_at = _failed.get(key)
+        if failed_at is not None:
+            if time.monotonic() - failed_at < PDF_FAILURE_RETRY_SECONDS:
+                return STATUS_FAILED
+            # 일시적인 실패일 수 있으므로 유지 시간이 지나면 다시 생성
+            del _failed[key]
+    return STATUS_MISSING
+
+
+def get_pdf_bytes(diagnosis_id: str, report_id: str) -> Optional[bytes]:
+    """캐시된 PDF 바이트를 반환합니다. 아직 없으면 None"""
+    key = pdf_key(diagnosis_id, report_id)
+    data = _bytes_cache.get(key)
+    if data is not None:
+        return data
+    path = pdf_cache_path(key)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    _bytes_cache.set(key, data)
+    return data
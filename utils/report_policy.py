@@ -0,0 +1,291 @@
+# utils/report_policy.py
+# 역할: 요청별 마감 시간 안에서 가능한 가장 좋은 단계(tier)의 보고서를 반환하는 생성 정책
+#
+# 단계:
+#   cached   - 이전에 생성된 보고서 재사용 (같은 응답 집합)
+#   library  - 프로필별 사전 생성 보고서 (utils/report_library.py, LLM 호출 없음)
+#   nearest  - 점수 프로필이 가까운 보고서 재사용 (utils/report_index.py, LLM 호출 없음)
+#   full     - RAG 모델 전체 보고서 (LLM 호출)
+#   nearest  - 마감 시간 초과 시 더 넓은 거리(REPORT_NN_FALLBACK_DISTANCE)로 다시 찾은 보고서
+#   template - get_action_items/get_overall_suggestion 기반 템플릿 보고서 (즉시 생성)
+#
+# 마감 시간 안에 full 보고서가 끝나지 않으면 하위 단계로 응답하고, full 생성은 백그라운드에서
+# 계속 진행되어 완료되면 캐시에 저장됩니다. (다음 같은 요청은 cached 단계로 응답)
+# 실패 대체 보고서는 저장하지 않고, 밀린 full 생성이 REPORT_FULL_MAX_PENDING 이상이면 새 생성을 접수하지 않습니다.
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Optional
+
+from utils.questions import get_action_items, get_overall_suggestion
+from utils.prompt_templates import is_failed_report
+from utils.response_cache import ResponseCache
+from utils.single_flight import diagnosis_key, generate_report_coalesced
+from utils.report_index import get_report_index
+from utils.report_library import get_report_library, library_model_name
+from utils.metrics import incr, observe, span
+
+from config import (
+    REPORT_DEADLINE_SECONDS, REPORT_FULL_WORKERS, REPORT_FULL_MAX_PENDING, RESPONSE_CACHE_SIZE,
+    REPORT_NN_ENABLED, REPORT_NN_FALLBACK_DISTANCE, LLM_MODEL
+)
+
+logger = logging.getLogger(__name__)
+
+TIER_FULL = "full"
+TIER_CACHED = "cached"
+TIER_LIBRARY = "library"
+TIER_NEAREST = "nearest"
+TIER_TEMPLATE = "template"
+
+# 전체 보고서 캐시 (진단 키 -> 보고서)
+report_cache = ResponseCache(maxsize=RESPONSE_CACHE_SIZE)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_pending = 0  # 접수되었지만 끝나지 않은 full 생성 수 (실행 중 포함)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REPORT_FULL_WORKERS, thread_name_prefix="report-full")
+        return _executor
+
+
+def _submit_full(func) -> Optional[Future]:
+    """
+    full 생성을 실행기에 접수합니다. 밀린 생성이 REPORT_FULL_MAX_PENDING 이상이면 접수하지 않고 None을 반환합니다.
+    (마감 시간을 넘긴 요청의 생성도 끝까지 실행되므로 대기열이 끝없이 쌓이지 않도록 제한)
+    """
+    global _pending
+    with _executor_lock:
+        if _pending >= REPORT_FULL_MAX_PENDING:
+            return None
+        _pending += 1
+
+    def release(_):
+        global _pending
+        with _executor_lock:
+            _pending -= 1
+
+    # 트레이스/CPU 프로파일 요청 컨텍스트를 생성 스레드로 전달
+    future = _get_executor().submit(contextvars.copy_context().run, func)
+    future.add_done_callback(release)
+    return future
+
+
+def template_report(diagnosis_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    LLM 없이 진단 결과와 액션 아이템으로 보고서를 만듭니다. (MockRAGModel과 같은 형식)
+
+    Args:
+        diagnosis_result: calculate_score 결과 (improvements 포함 가능)
+
+    Returns:
+        보고서 데이터
+    """
+    level = diagnosis_result["level"]["name"]
+    stage_scores = diagnosis_result.get("stage_scores", {})
+    sorted_stages = sorted(stage_scores.items(), key=lambda x: x[1]["avg_score"])
+    weak_areas = [stage for stage, _ in sorted_stages[:3]]
+    strong_areas = [stage for stage, info in stage_scores.items() if info["avg_score"] >= 4.0]
+
+    overview = (
+        f"현재 네이버 스마트 플레이스 마케팅은 '{level}'로 진단됩니다. "
+        f"전체 평균 점수는 {diagnosis_result.get('avg_score', 0)}점(5점 만점)입니다.\n\n"
+        f"{diagnosis_result['level'].get('description', '')}\n\n"
+        f"{get_overall_suggestion(level)}"
+    )
+
+    if strong_areas:
+        strengths_analysis = "\n".join(
+            f"- {stage}: 평균 {stage_scores[stage]['avg_score']}점으로 잘 관리되고 있습니다. 현재 수준을 유지하면서 다른 영역의 모범 사례로 활용하세요."
+            for stage in strong_areas
+        )
+    else:
+        strengths_analysis = "아직 4점 이상의 강점 영역이 없습니다. 개선 필요 영역부터 단계적으로 보완해 나가세요."
+
+    improvements_analysis = "\n".join(
+        f"- {stage}: 평균 {stage_scores[stage]['avg_score']}점으로 개선이 필요합니다."
+        for stage in weak_areas
+    )
+
+    action_plan = ""
+    for stage in weak_areas:
+        action_plan += f"[{stage}]\n"
+        for i, item in enumerate(get_action_items(stage, stage_scores[stage]["avg_score"]), 1):
+            action_plan += f"{i}. {item}\n"
+        action_plan += "\n"
+
+    return {
+        "title": "네이버 스마트 플레이스 최적화 진단 보고서",
+        "level": level,
+        "overview": overview,
+        "strengths_analysis": strengths_analysis,
+        "improvements_analysis": improvements_analysis,
+        "action_plan": action_plan.strip(),
+        "upgrade_tips": diagnosis_result["level"].get("next_step", "")
+    }
+
+
+def _lookup_library(rag_model, diagnosis_result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """현재 모델로 만든 사전 생성 라이브러리에서 같은 프로필의 보고서를 찾습니다. 없으면 None"""
+    if "stage_scores" not in diagnosis_result:
+        return None
+    try:
+        return get_report_library(library_model_name(rag_model)).lookup(diagnosis_result)
+    except Exception:
+        logger.exception("보고서 라이브러리 조회 중 오류")
+        return None
+
+
+def _model_key(rag_model) -> str:
+    """보고서 색인 항목을 구분하는 모델 키 (모델 클래스, LLM 모델, 벡터 색인 버전)"""
+    vector_store = getattr(rag_model, "vector_store", None)
+    index_version = getattr(vector_store, "index_version", "") if vector_store else ""
+    return f"{type(rag_model).__name__}|{LLM_MODEL}|{index_version}"
+
+
+def _lookup_nearest(diagnosis_result: Dict[str, Any], model_key: str,
+                    max_distance: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """같은 모델 키에서 점수 프로필이 가까운 보고서를 찾습니다. 없거나 비활성화되어 있으면 None"""
+    if not REPORT_NN_ENABLED or "stage_scores" not in diagnosis_result:
+        return None
+    try:
+        return get_report_index().lookup(diagnosis_result, max_distance, model_key)
+    except Exception:
+        logger.exception("보고서 색인 조회 중 오류")
+        return None
+
+
+def _index_report(diagnosis_result: Dict[str, Any], report: Dict[str, Any], model_key: str):
+    """새로 생성된 전체 보고서를 색인에 추가합니다."""
+    if not REPORT_NN_ENABLED or "stage_scores" not in diagnosis_result:
+        return
+    try:
+        get_report_index().add(diagnosis_result, report, model_key)
+    except Exception:
+        logger.exception("보고서 색인 저장 중 오류")
+
+
+def _report_key(rag_model, answers: Dict[str, str]) -> str:
+    vector_store = getattr(rag_model, "vector_store", None)
+    index_version = getattr(vector_store, "index_version", "") if vector_store else ""
+    return diagnosis_key(answers, index_version, type(rag_model).__name__)
+
+
+def generate_report_tiered(rag_model, answers: Dict[str, str], diagnosis_result: Dict[str, Any],
+                           deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    마감 시간 안에서 가능한 가장 좋은 단계의 보고서를 반환합니다.
+    보고서의 "tier" 키에 응답한 단계가 기록됩니다.
+
+    Args:
+        rag_model: 보고서 생성 모델
+        answers: 사용자 응답
+        diagnosis_result: 진단 결과
+        deadline: 마감 시간(초), None이면 REPORT_DEADLINE_SECONDS
+
+    Returns:
+        보고서 데이터
+    """
+    deadline = REPORT_DEADLINE_SECONDS if deadline is None else deadline
+    start = time.perf_counter()
+    key = _report_key(rag_model, answers)
+    model_key = _model_key(rag_model)
+
+    report = None
+    tier = TIER_FULL
+    cached = report_cache.get(key)
+    library = None if cached is not None else _lookup_library(rag_model, diagnosis_result)
+    nearest = None if cached is not None or library is not None else _lookup_nearest(diagnosis_result, model_key)
+    if cached is not None:
+        report, tier = cached, TIER_CACHED
+    elif library is not None:
+        report, tier = library, TIER_LIBRARY
+    elif nearest is not None:
+        report, tier = nearest, TIER_NEAREST
+    else:
+        def generate_full():
+            result = generate_report_coalesced(rag_model, answers=answers, diagnosis_result=diagnosis_result)
+            if is_failed_report(result):
+                incr("report_full_failed_total")
+                return None
+            report_cache.set(key, result)
+            _index_report(diagnosis_result, result, model_key)
+            return result
+
+        future = _submit_full(generate_full)
+        if future is None:
+            incr("report_full_rejected_total")
+        else:
+            try:
+                with span("report_policy.full"):
+                    report = future.result(timeout=deadline)
+            except FutureTimeoutError:
+                incr("report_deadline_exceeded_total")
+            except Exception:
+                logger.exception("전체 보고서 생성 실패, 하위 단계로 대체합니다")
+
+        if report is None:
+            report = report_cache.get(key)
+            tier = TIER_CACHED
+        if report is None:
+            report = _lookup_nearest(diagnosis_result, model_key, REPORT_NN_FALLBACK_DISTANCE)
+            tier = TIER_NEAREST
+        if report is None:
+            with span("report_policy.template"):
+                report = template_report(diagnosis_result)
+            tier = TIER_TEMPLATE
+
+    report = dict(report, tier=tier)
+    incr("report_tier_total", tier=tier)
+    observe("report_policy_seconds", time.perf_counter() - start, tier=tier)
+    return report
+
+
+# 마감 시간별 응답 단계 확인
+if __name__ == "__main__":
+    from utils.questions import calculate_score, suggest_improvements
+
+    class SlowModel:
+        def __init__(self, delay):
+            self.delay = delay
+
+        def generate_diagnosis_report(self, answers, diagnosis_result):
+            time.sleep(self.delay)
+            return {"title": "전체 보고서", "overview": "LLM 보고서"}
+
+    answers = {"keywords_status": "C", "description_status": "B", "review_management": "D"}
+    result = calculate_score(answers)
+    result["improvements"] = suggest_improvements(result)
+
+    for delay, deadline in [(0.1, 1.0), (2.0, 0.5)]:
+        report_cache.clear()
+        t = time.perf_counter()
+        report = generate_report_tiered(SlowModel(delay), answers, result, deadline=deadline)
+        print(f"생성 {delay}초 / 마감 {deadline}초 -> {report['tier']} ({time.perf_counter() - t:.2f}초)")
+
+    time.sleep(2.0)
+    report = generate_report_tiered(SlowModel(2.0), answers, result, deadline=0.5)
+    print(f"백그라운드 완료 후 재요청 -> {report['tier']}")
+
+    class FailingModel(SlowModel):
+        def generate_diagnosis_report(self, answers, diagnosis_result):
+            return {"title": "전체 보고서", "overview": "진단 결과 생성에 실패했습니다.", "failed": True}
+
+    report_cache.clear()
+    report = generate_report_tiered(FailingModel(0), answers, result, deadline=1.0)
+    assert report["tier"] != TIER_FULL and report_cache.get(_report_key(FailingModel(0), answers)) is None
+    print(f"생성 실패 -> {report['tier']} (캐시에 저장하지 않음)")
+
+    # 밀린 생성이 한도에 닿으면 새 생성을 접수하지 않고 바로 하위 단계로 응답
+    no_profile = {key: value for key, value in result.items() if key != "stage_scores"}
+    for i in range(REPORT_FULL_MAX_PENDING + 2):
+        report = generate_report_tiered(SlowModel(1.0), dict(answers, backlog=str(i)), no_profile, deadline=0)
+    print(f"대기 {_pending}건 (한도 {REPORT_FULL_MAX_PENDING}) -> {report['tier']}")
+    assert _pending <= REPORT_FULL_MAX_PENDING
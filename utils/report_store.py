@@ -0,0 +1,145 @@
+# utils/report_store.py
+# 역할: 보고서/진단 결과를 내용 해시 ID로 한 번만 저장하는 서버 측 저장소
+#
+# Streamlit 세션 상태에는 ID만 보관하고, 화면/복사/다운로드에서 필요할 때 ID로 읽습니다.
+# 같은 내용(라이브러리/템플릿 보고서 등)은 세션이 몇 개든 한 벌만 저장되고,
+# 최근 문서는 프로세스 메모리(LRU)에서 바로 반환됩니다.
+# 반환된 딕셔너리는 세션 간에 공유되므로 수정하지 말고 복사해서 사용해야 합니다.
+# 마지막 저장/조회(DB 기준) 후 REPORT_STORE_TTL_HOURS가 지난 문서는 새 문서를 저장할 때 주기적으로 삭제합니다.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from utils.response_cache import ResponseCache
+from utils.metrics import incr
+
+from config import REPORT_STORE_DB_PATH, REPORT_STORE_CACHE_SIZE, REPORT_STORE_TTL_HOURS, REPORT_STORE_PURGE_INTERVAL
+
+
+def content_id(document: Dict[str, Any]) -> str:
+    """문서 내용(정렬된 JSON)의 해시 ID"""
+    body = json.dumps(document, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()[:24]
+
+
+class ReportStore:
+    """
+    내용 주소 기반(content-addressed) 문서 저장소 클래스 (SQLite + LRU)
+    """
+
+    def __init__(self, db_path: str = REPORT_STORE_DB_PATH, cache_size: int = REPORT_STORE_CACHE_SIZE,
+                 ttl_seconds: float = REPORT_STORE_TTL_HOURS * 3600,
+                 purge_interval: float = REPORT_STORE_PURGE_INTERVAL):
+        """
+        초기화
+
+        Args:
+            db_path: 저장소 DB 파일 경로
+            cache_size: 메모리에 유지할 최근 문서 수
+            ttl_seconds: 마지막 저장/조회 후 문서를 보관하는 기간
+            purge_interval: 만료 문서 삭제 주기 (초)
+        """
+        self.db_path = db_path
+        self.cache = ResponseCache(maxsize=cache_size)
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        # 문서 ID -> 마지막으로 DB의 accessed_at을 갱신한 시각 (메모리에서 반환한 문서도 주기적으로 갱신)
+        self._touched = ResponseCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    id TEXT PRIMARY KEY,
+                    body TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL DEFAULT 0
+                )
+            """)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(documents)")]
+            if "accessed_at" not in columns:
+                conn.execute("ALTER TABLE documents ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+                conn.execute("UPDATE documents SET accessed_at = created_at")
+            conn.execute("CREATE INDEX IF NOT EXISTS documents_accessed_at ON documents (accessed_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def put(self, document: Dict[str, Any]) -> str:
+        """
+        문서를 저장하고 ID를 반환합니다. 같은 내용이 이미 있으면 저장하지 않습니다.
+        """
+        doc_id = content_id(document)
+        now = time.time()
+        if self.cache.get(doc_id) is not None and now - (self._touched.get(doc_id) or 0.0) < self.purge_interval:
+            return doc_id
+        # 메모리에 있더라도 주기적으로 DB에 다시 기록 (다른 프로세스가 만료 삭제했을 수 있음)
+        body = json.dumps(document, ensure_ascii=False)
+        with self._lock, self._connect() as conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO documents (id, body, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (doc_id, body, now, now)
+            ).rowcount
+            if not inserted:
+                # 같은 내용을 다시 저장하면 보관 기간을 연장
+                conn.execute("UPDATE documents SET accessed_at = ? WHERE id = ?", (now, doc_id))
+            self._touched.set(doc_id, now)
+            if now - self._last_purge >= self.purge_interval:
+                self._purge(conn, now)
+        incr("report_store_puts_total", result="new" if inserted else "duplicate")
+        # 저장된 JSON을 다시 읽은 것과 같은 객체를 캐시 (호출자의 원본과 분리)
+        self.cache.set(doc_id, json.loads(body))
+        return doc_id
+
+    def get(self, doc_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """ID로 문서를 읽습니다. 없으면 None"""
+        if not doc_id:
+            return None
+        document = self.cache.get(doc_id)
+        if document is not None:
+            self._touch(doc_id)
+            return document
+        with self._connect() as conn:
+            row = conn.execute("SELECT body FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return None
+        self._touch(doc_id)
+        document = json.loads(row[0])
+        self.cache.set(doc_id, document)
+        return document
+
+    def _touch(self, doc_id: str):
+        """사용 중인 문서의 accessed_at을 갱신합니다. (같은 문서는 purge_interval마다 한 번만 DB에 기록)"""
+        now = time.time()
+        if now - (self._touched.get(doc_id) or 0.0) < self.purge_interval:
+            return
+        self._touched.set(doc_id, now)
+        with self._connect() as conn:
+            conn.execute("UPDATE documents SET accessed_at = ? WHERE id = ?", (now, doc_id))
+
+    def _purge(self, conn, now: float) -> int:
+        """보관 기간이 지난 문서를 삭제하고 삭제한 수를 반환합니다. (self._lock을 잡은 상태에서 호출)"""
+        self._last_purge = now
+        deleted = conn.execute("DELETE FROM documents WHERE accessed_at < ?", (now - self.ttl_seconds,)).rowcount
+        if deleted:
+            incr("report_store_purged_total", value=deleted)
+        return deleted
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_report_store() -> ReportStore:
+    """프로세스 공용 보고서 저장소를 반환합니다."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ReportStore()
+        return _store
@@ -0,0 +1,306 @@
+# utils/report_text.py
+# 역할: 보고서 본문(마크다운) 파서 - 섹션 본문을 한 번만 파싱해 캐시된 구문 트리로 만들고 화면과 PDF가 공유
+#
+# LLM/템플릿 보고서 본문은 마크다운에 가까운 자유 형식 텍스트입니다. (## 제목, - 목록, 1. 번호 목록, **굵게**, [영역명], 영역명: ...)
+#   1. 줄 단위 정규식 하나(미리 컴파일)로 본문 전체를 한 번 스캔하면서 공백 정리와 블록 분류 (_scan)
+#   2. 블록을 구문 트리로 조립 - 들여쓰기로 중첩된 목록, 굵게/기울임 인라인 구간 (_build)
+# 트리(변경 불가능한 튜플)는 본문별로 캐시합니다. (parse_report_text)
+# 처음 파싱은 기존 re.sub 정리 방식보다 약간 느리고(256KB 본문 기준 중앙값 약 17ms 대 13ms),
+# 이득은 두 번째 소비자와 이후 렌더링의 캐시 적중(약 0.01ms)에서 나옵니다.
+#   - 화면: to_markdown으로 정리된 마크다운을 만들어 st.markdown 한 번으로 표시 (utils/app_cache.py)
+#   - PDF: utils/report_flowables.py의 to_flowables가 한 번의 순회로 Paragraph/ListFlowable 생성
+#
+# 벤치마크: python -m utils.report_text --size-kb 256
+import re
+from typing import List, NamedTuple, Tuple
+
+from utils.response_cache import ResponseCache
+
+from config import REPORT_TEXT_CACHE_SIZE
+
+# 블록/노드 종류
+HEADING = "heading"      # "## 제목" (level: 1~6)
+LABEL = "label"          # "[영역명]" 또는 (labels=True일 때) "영역명: ..." 줄
+BULLET = "bullet"        # "- 항목", "* 항목", "• 항목" (level: 들여쓰기 깊이)
+NUMBERED = "numbered"    # "1. 항목", "1) 항목" (level: 들여쓰기 깊이, number: 번호)
+RULE = "rule"            # "---" 구분선
+PARAGRAPH = "paragraph"  # 빈 줄로 구분되는 일반 문단 (여러 줄이면 줄바꿈으로 연결)
+LIST = "list"            # 연속된 목록 항목 (구문 트리 노드, BULLET/NUMBERED 블록으로 조립)
+
+# 인라인 구간 스타일
+PLAIN = ""
+BOLD = "bold"            # **굵게**, __굵게__
+ITALIC = "italic"        # *기울임*
+
+
+class Inline(NamedTuple):
+    """인라인 구간"""
+    style: str
+    text: str
+
+
+class ListEntry(NamedTuple):
+    """목록 항목 (number: 번호 목록의 본문 번호, children: 하위 목록 노드)"""
+    inline: Tuple[Inline, ...]
+    number: int = 0
+    children: Tuple["Node", ...] = ()
+
+
+class Node(NamedTuple):
+    """구문 트리 노드 (HEADING, LABEL, PARAGRAPH, RULE, LIST)"""
+    kind: str
+    inline: Tuple[Inline, ...] = ()
+    level: int = 0
+    items: Tuple[ListEntry, ...] = ()
+    ordered: bool = False
+
+
+# 한 줄 = 한 매치 (줄 앞 들여쓰기, 줄 종류 표시, 내용)
+_LINE = re.compile(
+    r"^(?P<indent>[ \t]*)"
+    r"(?:(?P<rule>(?:[-*_][ \t]*){3,}(?=\r?$))"
+    r"|(?P<hashes>#{1,6})[ \t]+"
+    r"|(?P<bullet>[-*•·])[ \t]+"
+    r"|(?P<number>\d{1,3})[.)][ \t]+"
+    r"|\[(?P<bracket>[^\]\n]{1,40})\][ \t]*(?=\r?$))?"
+    r"(?P<text>[^\n]*)",
+    re.M
+)
+
+# 굵게(**, __) / 기울임(*) - 한 줄 안에서만
+_INLINE = re.compile(r"\*\*(?P<bold>[^\n]+?)\*\*|__(?P<underscore>[^\n]+?)__|\*(?P<italic>[^\s*][^*\n]*?)\*")
+
+_LIST_KINDS = (BULLET, NUMBERED)
+
+_cache = ResponseCache(maxsize=REPORT_TEXT_CACHE_SIZE)
+
+# 노드/인라인 구간은 수천 개씩 만들어지므로 NamedTuple.__new__(파이썬 함수) 대신 tuple.__new__로 바로 생성
+_new = tuple.__new__
+
+
+def _is_label(text: str) -> bool:
+    """액션 플랜의 "영역명: ..." 줄 (콜론 앞이 세 단어 이하)"""
+    head, sep, _ = text.partition(":")
+    return bool(sep) and 0 < len(head.split()) <= 3
+
+
+def _scan(text: str, labels: bool) -> List[Tuple[str, str, int, int]]:
+    """본문 -> 블록 목록 [(종류, 정리된 텍스트, 수준/깊이, 번호), ...]"""
+    blocks = []
+    append = blocks.append
+    paragraph: List[str] = []
+
+    for indent, rule, hashes, bullet, number, bracket, body in _LINE.findall(text):
+        # 줄 안의 연속 공백/탭/CR을 공백 하나로 (대부분의 줄은 양끝 공백만 정리하면 됨)
+        body = body.strip()
+        if "  " in body or "\t" in body or "\r" in body:
+            body = " ".join(body.split())
+        if not (body or rule or bracket):
+            if paragraph:
+                append((PARAGRAPH, "\n".join(paragraph), 0, 0))
+                paragraph.clear()
+            continue
+        if not (rule or bracket or hashes or bullet or number or labels and _is_label(body)):
+            paragraph.append(body)
+            continue
+        if paragraph:
+            append((PARAGRAPH, "\n".join(paragraph), 0, 0))
+            paragraph.clear()
+        if rule:
+            append((RULE, "", 0, 0))
+        elif bracket:
+            append((LABEL, " ".join(bracket.split()), 0, 0))
+        elif hashes:
+            append((HEADING, body, len(hashes), 0))
+        elif bullet:
+            append((BULLET, body, len(indent.expandtabs(4)) // 2, 0))
+        elif number:
+            append((NUMBERED, body, len(indent.expandtabs(4)) // 2, int(number)))
+        else:
+            append((LABEL, body, 0, 0))
+    if paragraph:
+        append((PARAGRAPH, "\n".join(paragraph), 0, 0))
+    return blocks
+
+
+def _inline(text: str) -> Tuple[Inline, ...]:
+    """텍스트를 인라인 구간으로 나눕니다."""
+    if "*" not in text and "_" not in text:
+        return (_new(Inline, (PLAIN, text)),)
+    spans = []
+    position = 0
+    for match in _INLINE.finditer(text):
+        if match.start() > position:
+            spans.append(_new(Inline, (PLAIN, text[position:match.start()])))
+        bold = match.group("bold") or match.group("underscore")
+        spans.append(_new(Inline, (BOLD, bold) if bold else (ITALIC, match.group("italic"))))
+        position = match.end()
+    if position < len(text):
+        spans.append(_new(Inline, (PLAIN, text[position:])))
+    return tuple(spans)
+
+
+def _build_list(blocks: List[Tuple[str, str, int, int]], index: int) -> Tuple[Node, int]:
+    """index부터 같은 종류/깊이의 목록 항목을 하나의 LIST 노드로 조립합니다. (더 깊은 항목은 하위 목록)"""
+    first_kind, _, first_level, _ = blocks[index]
+    ordered = first_kind == NUMBERED
+    items: List[ListEntry] = []
+    while index < len(blocks):
+        kind, text, level, number = blocks[index]
+        if kind not in _LIST_KINDS or level < first_level:
+            break
+        if level > first_level:
+            child, index = _build_list(blocks, index)
+            inline, number, children = items.pop() if items else ((), 0, ())
+            items.append(_new(ListEntry, (inline, number, children + (child,))))
+            continue
+        if (kind == NUMBERED) != ordered:
+            break
+        items.append(_new(ListEntry, (_inline(text), number, ())))
+        index += 1
+    return _new(Node, (LIST, (), first_level, tuple(items), ordered)), index
+
+
+def _build(blocks: List[Tuple[str, str, int, int]]) -> Tuple[Node, ...]:
+    nodes: List[Node] = []
+    index = 0
+    while index < len(blocks):
+        kind, text, level, _ = blocks[index]
+        if kind in _LIST_KINDS:
+            node, index = _build_list(blocks, index)
+            nodes.append(node)
+            continue
+        nodes.append(_new(Node, (kind, _inline(text) if text else (), level, (), False)))
+        index += 1
+    return tuple(nodes)
+
+
+def parse_report_text(text: str, labels: bool = False) -> Tuple[Node, ...]:
+    """
+    보고서 본문을 구문 트리로 파싱합니다. (같은 본문은 캐시된 트리 반환 - 화면과 PDF가 공유)
+
+    Args:
+        text: 보고서 섹션 본문
+        labels: "영역명: ..." 줄을 라벨로 분류할지 여부 (액션 플랜)
+
+    Returns:
+        노드 튜플 (빈 본문이면 빈 튜플)
+    """
+    if not text or not text.strip():
+        return ()
+    key = (labels, text)
+    nodes = _cache.get(key)
+    if nodes is None:
+        nodes = _build(_scan(text, labels))
+        _cache.set(key, nodes)
+    return nodes
+
+
+def plain_text(inline: Tuple[Inline, ...]) -> str:
+    """인라인 구간의 텍스트만 이어 붙입니다."""
+    return "".join(span.text for span in inline)
+
+
+def inline_markdown(inline: Tuple[Inline, ...]) -> str:
+    """인라인 구간 -> 마크다운"""
+    parts = []
+    for span in inline:
+        if span.style == BOLD:
+            parts.append(f"**{span.text}**")
+        elif span.style == ITALIC:
+            parts.append(f"*{span.text}*")
+        else:
+            parts.append(span.text)
+    return "".join(parts)
+
+
+def _list_markdown(node: Node, indent: str) -> List[str]:
+    lines = []
+    for item in node.items:
+        marker = f"{item.number}. " if node.ordered else "- "
+        lines.append(f"{indent}{marker}{inline_markdown(item.inline)}")
+        for child in item.children:
+            # 하위 목록은 상위 항목 본문 시작 위치만큼 들여쓰기
+            lines.extend(_list_markdown(child, indent + " " * len(marker)))
+    return lines
+
+
+def to_markdown(nodes: Tuple[Node, ...]) -> str:
+    """구문 트리를 정리된 마크다운으로 변환합니다. (노드는 빈 줄, 목록 항목은 줄바꿈으로 구분)"""
+    parts = []
+    for node in nodes:
+        if node.kind == HEADING:
+            parts.append(f"{'#' * node.level} {inline_markdown(node.inline)}")
+        elif node.kind == LABEL:
+            parts.append(f"**{plain_text(node.inline)}**")
+        elif node.kind == LIST:
+            parts.append("\n".join(_list_markdown(node, "")))
+        elif node.kind == RULE:
+            parts.append("---")
+        else:
+            parts.append(inline_markdown(node.inline))
+    return "\n\n".join(parts)
+
+
+if __name__ == "__main__":
+    # 벤치마크: 큰 보고서 본문에서 기존 방식(clean_text/clean_pdf_text의 re.sub 4회 + PDF 섹션의
+    # split/startswith 재스캔)과 파싱(+ 캐시 적중), 마크다운 변환 시간 비교
+    # (PDF 플로어블 변환/레이아웃: python -m utils.report_flowables)
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="보고서 본문 정규화 벤치마크")
+    parser.add_argument("--size-kb", type=int, default=256, help="본문 크기 (KB)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    sample = (
+        "## 검색 노출 최적화\n\n"
+        "현재  대표 키워드와 상세 설명이   부족해 검색 결과 상위 노출이 어렵습니다.\n"
+        "지역명과 업종 키워드를 함께 사용하세요.\n\n"
+        "[기본 정보 관리]\n"
+        "1. 영업시간, 휴무일, 연락처를 최신 상태로 유지하세요.\n"
+        "2. **대표 사진**을 전문적으로 촬영해 첫인상을 강화하세요.\n"
+        "   - 외관, 내부, 대표 메뉴 사진을 각각 준비합니다.\n\n"
+        "리뷰 관리: 모든 리뷰에 24시간 안에 답변하세요.\n"
+        "- 부정적인 리뷰에는 개선 내용을 구체적으로 안내합니다.\n"
+        "- 단골 고객에게 재방문 혜택을 제공합니다.\n\n\n"
+        "---\n"
+    )
+    text = sample * max(1, args.size_kb * 1024 // len(sample.encode("utf-8")))
+
+    def legacy(text):
+        # streamlit_app.clean_text / clean_pdf_text
+        re.sub(r'["*]', '', text)
+        cleaned = re.sub(r'\n+', '\n', text)
+        cleaned = re.sub(r'[ \t]+', ' ', cleaned)
+        cleaned = re.sub(r'\n\s*\n', '\n', cleaned).strip()
+        # PDFGenerator._add_* 섹션: 문단 분리 후 액션 플랜 줄 단위 재스캔
+        count = sum(1 for p in text.split('\n\n') if p.strip())
+        for line in text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            if ':' in line and len(line.split(':')[0].split()) <= 3:
+                count += 1
+            elif line.startswith(('1.', '2.', '3.', '4.', '5.', '•', '-', '*')):
+                count += 1
+        return count
+
+    def measure(func):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            func()
+        return (time.perf_counter() - start) / args.repeat * 1000
+
+    def cold():
+        _cache.clear()
+        parse_report_text(text, labels=True)
+
+    nodes = parse_report_text(text, labels=True)
+    print(f"본문 {len(text.encode('utf-8')) / 1024:.0f}KB, {text.count(chr(10))}줄, "
+          f"노드 {len(nodes)}개 (반복 {args.repeat}회 평균)")
+    print(f"  기존 re.sub 4회 + 섹션 재스캔  {measure(lambda: legacy(text)):8.2f}ms")
+    print(f"  파싱 (스캔 + 트리 조립)        {measure(cold):8.2f}ms")
+    print(f"  파싱 캐시 적중                 {measure(lambda: parse_report_text(text, labels=True)):8.2f}ms")
+    print(f"  마크다운 변환                  {measure(lambda: to_markdown(nodes)):8.2f}ms")
@@ -0,0 +1,45 @@
+# utils/response_cache.py
+# 역할: LLM 응답을 프롬프트 키(접두부 해시 + 지시문) 기준으로 보관하는 로컬 LRU 캐시
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class ResponseCache:
+    """
+    스레드 안전한 LRU 응답 캐시 클래스
+    """
+
+    def __init__(self, maxsize: int = 256):
+        """초기화"""
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """캐시된 응답을 반환합니다. 없으면 None"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str):
+        """응답을 저장하고 용량을 초과하면 가장 오래된 항목을 제거합니다."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """모든 항목을 제거합니다."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
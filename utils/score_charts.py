@@ -0,0 +1,258 @@
+# utils/score_charts.py
+# 역할: PDF 점수 분석 차트 (영역별 레이더 + 막대) 생성과 점수 조합별 캐시
+#
+# - reportlab (기본): ReportLab 그래픽 기본 도형(Path/Polygon/String)으로 그린 벡터 차트.
+#   차트 위젯(SpiderChart/HorizontalBarChart)은 PDF마다 레이아웃과 라벨 위젯을 다시 펼쳐 느리므로
+#   좌표를 한 번 계산해 두고, 눈금/막대는 경로 하나로 묶어 그릴 도형 수를 줄입니다.
+# - matplotlib: PNG 이미지 차트 (SCORE_CHART_BACKEND=matplotlib 이거나 ReportLab 차트 생성이 실패한 경우)
+#
+# 영역별 점수는 0.25 단위라 조합 수가 적으므로 (폰트, 영역, 점수) 튜플로 캐시합니다.
+# 캐시된 Drawing은 읽기만 하고 PDF마다 얕은 복사본을 넘깁니다. (레이아웃 중 설정되는 속성을 스레드 간에 공유하지 않음)
+#
+# 벤치마크: python -m utils.score_charts
+import copy
+import logging
+import math
+import os
+from io import BytesIO
+from typing import Any, Dict, List, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.units import cm
+from reportlab.graphics.shapes import Drawing, Line, Path, Polygon, String
+from reportlab.platypus import Image, Table, TableStyle
+
+from utils.response_cache import ResponseCache
+from utils.metrics import span
+
+from config import PROJECT_ROOT, SCORE_CHART_BACKEND, SCORE_CHART_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+MAX_SCORE = 5
+# 두 차트를 본문 폭(17cm = 482pt)에 나란히 배치 (pt)
+RADAR_WIDTH = 260
+BAR_WIDTH = 220
+CHART_HEIGHT = 190
+RADAR_RADIUS = 60
+FILL_COLOR = colors.Color(0.2, 0.4, 0.8, alpha=0.35)
+LINE_COLOR = colors.darkblue
+GRID_COLOR = colors.lightgrey
+
+_cache = ResponseCache(maxsize=SCORE_CHART_CACHE_SIZE)
+
+ScoreKey = Tuple[Tuple[str, float], ...]
+
+
+def score_key(stage_scores: Dict[str, Any]) -> ScoreKey:
+    """stage_scores -> ((영역, 평균 점수), ...) 캐시 키"""
+    return tuple(
+        (stage, float(info.get("avg_score", 0)))
+        for stage, info in stage_scores.items() if isinstance(info, dict)
+    )
+
+
+def _radar_drawing(key: ScoreKey, font_name: str) -> Drawing:
+    """레이더 차트 (1~5점 눈금, 첫 영역이 위쪽, 시계 방향)"""
+    drawing = Drawing(RADAR_WIDTH, CHART_HEIGHT)
+    cx, cy = RADAR_WIDTH / 2, CHART_HEIGHT / 2
+    radius = RADAR_RADIUS
+    count = len(key)
+    angles = [math.pi / 2 - 2 * math.pi * i / count for i in range(count)]
+
+    def point(angle, value):
+        return cx + radius * value / MAX_SCORE * math.cos(angle), cy + radius * value / MAX_SCORE * math.sin(angle)
+
+    # 눈금 다각형과 축을 경로 하나로 (그릴 도형 수가 PDF 렌더링 시간을 좌우)
+    grid = Path(fillColor=None, strokeColor=GRID_COLOR, strokeWidth=0.5)
+    for level in range(1, MAX_SCORE + 1):
+        grid.moveTo(*point(angles[0], level))
+        for angle in angles[1:]:
+            grid.lineTo(*point(angle, level))
+        grid.closePath()
+    for angle in angles:
+        grid.moveTo(cx, cy)
+        grid.lineTo(*point(angle, MAX_SCORE))
+    drawing.add(grid)
+    if count >= 3:
+        shape = [coordinate for (_, score), angle in zip(key, angles) for coordinate in point(angle, score)]
+        drawing.add(Polygon(shape, fillColor=FILL_COLOR, strokeColor=LINE_COLOR, strokeWidth=1))
+    # 영역명 (점수는 막대 차트와 표에 표시)
+    for (stage, _), angle in zip(key, angles):
+        x, y = point(angle, MAX_SCORE + 0.6)
+        cos = math.cos(angle)
+        anchor = "middle" if abs(cos) < 0.3 else ("start" if cos > 0 else "end")
+        drawing.add(String(x, y - 2.5, stage, fontName=font_name, fontSize=7, textAnchor=anchor))
+    return drawing
+
+
+def _bar_drawing(key: ScoreKey, font_name: str) -> Drawing:
+    """영역별 가로 막대 차트 (0~5점, 첫 영역이 위쪽)"""
+    drawing = Drawing(BAR_WIDTH, CHART_HEIGHT)
+    left, bottom = 75, 20
+    width, height = BAR_WIDTH - left - 20, CHART_HEIGHT - bottom - 10
+    step = height / len(key)
+
+    def x_of(score):
+        return left + width * score / MAX_SCORE
+
+    grid = Path(fillColor=None, strokeColor=GRID_COLOR, strokeWidth=0.5)
+    for tick in range(MAX_SCORE + 1):
+        grid.moveTo(x_of(tick), bottom)
+        grid.lineTo(x_of(tick), bottom + height)
+        drawing.add(String(x_of(tick), bottom - 10, str(tick), fontName=font_name, fontSize=7, textAnchor="middle"))
+    drawing.add(grid)
+    bars = Path(fillColor=FILL_COLOR, strokeColor=LINE_COLOR, strokeWidth=0.5)
+    for index, (stage, score) in enumerate(key):
+        top = bottom + height - step * index
+        bars.moveTo(left, top - step * 0.2)
+        bars.lineTo(x_of(score), top - step * 0.2)
+        bars.lineTo(x_of(score), top - step * 0.8)
+        bars.lineTo(left, top - step * 0.8)
+        bars.closePath()
+        middle = top - step * 0.5 - 2.5
+        drawing.add(String(left - 3, middle, stage, fontName=font_name, fontSize=7, textAnchor="end"))
+        drawing.add(String(x_of(score) + 3, middle, f"{score:g}", fontName=font_name, fontSize=7))
+    drawing.add(bars)
+    drawing.add(Line(left, bottom, left, bottom + height, strokeColor=LINE_COLOR, strokeWidth=0.5))
+    return drawing
+
+
+def _matplotlib_png(key: ScoreKey) -> bytes:
+    """matplotlib 레이더 + 막대 차트 PNG (pyplot 전역 상태 없이 Figure 직접 사용)"""
+    from matplotlib.figure import Figure
+    from matplotlib.font_manager import FontProperties
+
+    font_path = os.path.join(PROJECT_ROOT, "assets", "fonts", "malgun.ttf")
+    font = FontProperties(fname=font_path, size=7) if os.path.exists(font_path) else FontProperties(size=7)
+    stages = [stage for stage, _ in key]
+    scores = [score for _, score in key]
+
+    figure = Figure(figsize=(6.7, 2.6), dpi=150)
+    radar = figure.add_subplot(1, 2, 1, projection="polar")
+    angles = [math.pi / 2 - 2 * math.pi * i / len(key) for i in range(len(key))]
+    radar.fill(angles + angles[:1], scores + scores[:1], color="#3366cc", alpha=0.35)
+    radar.plot(angles + angles[:1], scores + scores[:1], color="navy", linewidth=1)
+    radar.set_ylim(0, MAX_SCORE)
+    radar.set_xticks(angles)
+    radar.set_xticklabels([f"{stage} ({score:g})" for stage, score in key], fontproperties=font)
+    radar.set_yticklabels([])
+
+    bars = figure.add_subplot(1, 2, 2)
+    bars.barh(range(len(key)), scores, color="#3366cc", alpha=0.6, edgecolor="navy")
+    bars.set_yticks(range(len(key)))
+    bars.set_yticklabels(stages, fontproperties=font)
+    bars.invert_yaxis()
+    bars.set_xlim(0, MAX_SCORE)
+    for index, score in enumerate(scores):
+        bars.text(score + 0.05, index, f"{score:g}", va="center", fontproperties=font)
+    figure.tight_layout()
+
+    buffer = BytesIO()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def _chart_flowables(cached) -> List:
+    """캐시 항목 -> 새 플로어블 (Drawing은 얕은 복사, PNG는 새 Image)"""
+    if isinstance(cached, bytes):
+        width = 17 * cm
+        return [Image(BytesIO(cached), width=width, height=width * 2.6 / 6.7)]
+    table = Table([[copy.copy(drawing) for drawing in cached]], colWidths=[drawing.width for drawing in cached])
+    table.setStyle(TableStyle([
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+    ]))
+    return [table]
+
+
+def score_chart_flowables(stage_scores: Dict[str, Any], font_name: str) -> List:
+    """
+    영역별 점수 차트(레이더 + 막대) 플로어블을 반환합니다. 같은 점수 조합은 캐시된 차트를 사용합니다.
+
+    Args:
+        stage_scores: calculate_score 결과의 stage_scores
+        font_name: 차트 글자 폰트 (ReportLab 등록 이름)
+
+    Returns:
+        플로어블 목록 (영역 점수가 없거나 차트 생성에 실패하면 빈 목록)
+    """
+    key = score_key(stage_scores)
+    if not key:
+        return []
+    backend = SCORE_CHART_BACKEND
+    cached = _cache.get((backend, font_name, key))
+    if cached is None:
+        with span("score_charts.draw", backend=backend):
+            try:
+                if backend == "matplotlib":
+                    cached = _matplotlib_png(key)
+                else:
+                    cached = (_radar_drawing(key, font_name), _bar_drawing(key, font_name))
+            except Exception as e:
+                logger.exception(f"점수 차트 생성 중 오류 ({backend})")
+                if backend == "matplotlib":
+                    return []
+                try:
+                    cached = _matplotlib_png(key)
+                except Exception:
+                    logger.exception("점수 차트 생성 중 오류 (matplotlib)")
+                    return []
+        _cache.set((backend, font_name, key), cached)
+    return _chart_flowables(cached)
+
+
+if __name__ == "__main__":
+    # 벤치마크: 차트 생성(캐시 없음)과 캐시 적중 시간, 차트를 넣었을 때 PDF 생성 시간 증가량
+    # 한글 폰트 없이 Helvetica로 측정합니다.
+    import argparse
+    import random
+    import time
+
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph
+
+    from utils.questions import diagnosis_questions
+
+    parser = argparse.ArgumentParser(description="점수 차트 벤치마크")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+
+    def random_scores():
+        return {stage: {"avg_score": rng.randint(4, 20) / 4} for stage in diagnosis_questions}
+
+    def measure(func):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            func()
+        return (time.perf_counter() - start) / args.repeat * 1000
+
+    def cold(backend):
+        global SCORE_CHART_BACKEND
+        SCORE_CHART_BACKEND = backend
+        _cache.clear()
+        score_chart_flowables(random_scores(), "Helvetica")
+
+    styles = getSampleStyleSheet()
+    scores = random_scores()
+
+    def build(with_charts):
+        elements = [Paragraph("Score analysis " * 40, styles["Normal"]) for _ in range(20)]
+        if with_charts:
+            elements += score_chart_flowables(scores, "Helvetica")
+        SimpleDocTemplate(BytesIO(), pagesize=A4).build(elements)
+
+    print(f"반복 {args.repeat}회 평균")
+    print(f"  ReportLab 차트 생성        {measure(lambda: cold('reportlab')):8.2f}ms")
+    SCORE_CHART_BACKEND = "reportlab"
+    score_chart_flowables(scores, "Helvetica")
+    print(f"  캐시 적중                  {measure(lambda: score_chart_flowables(scores, 'Helvetica')):8.2f}ms")
+    base = measure(lambda: build(False))
+    charts = measure(lambda: build(True))
+    print(f"  PDF 생성 (차트 없음)       {base:8.2f}ms")
+    print(f"  PDF 생성 (캐시된 차트)     {charts:8.2f}ms  (+{charts - base:.2f}ms)")
+    args.repeat = max(1, args.repeat // 10)
+    print(f"  matplotlib 차트 생성       {measure(lambda: cold('matplotlib')):8.2f}ms  (반복 {args.repeat}회)")
@@ -0,0 +1,100 @@
+# utils/single_flight.py
+# 역할: 동일한 진단 요청이 동시에 들어올 때 보고서 생성을 한 번만 수행하고 결과를 공유합니다.
+import copy
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+from utils.metrics import incr
+
+
+class SingleFlight:
+    """
+    키별 단일 실행(single-flight) 클래스
+    같은 키로 진행 중인 작업이 있으면 새로 실행하지 않고 그 작업의 Future를 기다립니다.
+    """
+
+    def __init__(self):
+        """초기화"""
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        키에 해당하는 작업을 실행하거나, 이미 진행 중이면 그 결과를 기다려 반환합니다.
+
+        Args:
+            key: 요청 식별 키
+            fn: 실제 작업 함수 (인자 없음)
+
+        Returns:
+            작업 결과 (예외는 대기 중인 모든 호출자에게 전달됨)
+        """
+        with self._lock:
+            self.calls += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+                incr("single_flight_coalesced_total")
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+        return future.result()
+
+    def stats(self) -> Dict[str, int]:
+        """요청/실행/병합 횟수를 반환합니다."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight)
+            }
+
+
+def diagnosis_key(answers: Dict[str, str], index_version: str = "", model_name: str = "") -> str:
+    """
+    응답 집합을 정규화하여 진단 요청 키를 만듭니다.
+    응답 순서와 무관하게 같은 답변이면 같은 키가 나오며, 인덱스 버전이 바뀌면 키도 바뀝니다.
+    """
+    canonical = json.dumps(answers, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    digest = hashlib.sha256(f"{model_name}|{index_version}|{canonical}".encode("utf-8")).hexdigest()
+    return digest[:32]
+
+
+# 프로세스 전체(모든 세션)가 공유하는 보고서 생성 single-flight
+report_flight = SingleFlight()
+
+
+def generate_report_coalesced(rag_model, answers: Dict[str, str], diagnosis_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    동일한 응답 집합에 대한 동시 보고서 생성 요청을 하나로 합쳐 실행합니다.
+    호출자마다 결과를 독립적으로 수정할 수 있도록 사본을 반환합니다.
+    """
+    vector_store = getattr(rag_model, "vector_store", None)
+    index_version = getattr(vector_store, "index_version", "") if vector_store else ""
+    key = diagnosis_key(answers, index_version, type(rag_model).__name__)
+    report = report_flight.do(
+        key,
+        lambda: rag_model.generate_diagnosis_report(answers=answers, diagnosis_result=diagnosis_result)
+    )
+    return copy.deepcopy(report)
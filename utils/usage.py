@@ -0,0 +1,164 @@
+# utils/usage.py
+# 역할: LLM 호출별 토큰 사용량, 모델, 지연 시간, 예상 비용을 기록하고 진단/섹션/일자 단위로 집계합니다.
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.metrics import span, incr, observe, current_diagnosis_id
+from utils.prompt_templates import count_tokens
+
+from config import LLM_MODEL, LLM_PRICING, USAGE_DB_PATH, SECTION_TOKEN_BUDGETS
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """모델 단가표(1M 토큰당 USD)로 예상 비용을 계산합니다. 단가를 모르면 0"""
+    input_price, output_price = LLM_PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+class UsageStore:
+    """
+    LLM 사용량 기록 저장소 (SQLite)
+    """
+
+    def __init__(self, db_path: str):
+        """초기화"""
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_usage (
+                    ts REAL NOT NULL,
+                    day TEXT NOT NULL,
+                    diagnosis_id TEXT,
+                    section TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_tokens INTEGER NOT NULL,
+                    completion_tokens INTEGER NOT NULL,
+                    latency REAL NOT NULL,
+                    cost REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_diagnosis ON llm_usage (diagnosis_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_usage_day ON llm_usage (day)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def record(self, diagnosis_id: Optional[str], section: str, model: str,
+               prompt_tokens: int, completion_tokens: int, latency: float, cost: float):
+        """호출 한 건을 기록합니다."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO llm_usage VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (now, datetime.fromtimestamp(now).strftime("%Y-%m-%d"), diagnosis_id, section, model,
+                 prompt_tokens, completion_tokens, latency, cost)
+            )
+
+    def _aggregate(self, group_by: str, where: str = "", params: tuple = ()) -> List[Dict[str, Any]]:
+        query = f"""
+            SELECT {group_by}, COUNT(*) AS calls,
+                   SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens,
+                   AVG(latency) AS avg_latency, MAX(latency) AS max_latency, SUM(cost) AS cost
+            FROM llm_usage {where}
+            GROUP BY {group_by} ORDER BY cost DESC
+        """
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    def by_diagnosis(self, diagnosis_id: str) -> List[Dict[str, Any]]:
+        """진단 한 건의 섹션별 사용량"""
+        return self._aggregate("section", "WHERE diagnosis_id = ?", (diagnosis_id,))
+
+    def by_section(self, day: Optional[str] = None) -> List[Dict[str, Any]]:
+        """섹션별 사용량 (day 지정 시 해당 일자만, 형식: YYYY-MM-DD)"""
+        if day:
+            return self._aggregate("section", "WHERE day = ?", (day,))
+        return self._aggregate("section")
+
+    def by_day(self) -> List[Dict[str, Any]]:
+        """일자별 사용량"""
+        return self._aggregate("day")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_usage_store() -> UsageStore:
+    """프로세스 공용 사용량 저장소를 반환합니다."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = UsageStore(USAGE_DB_PATH)
+        return _store
+
+
+def call_llm(llm, prompt: str, section: str) -> str:
+    """
+    LLM을 호출하고 사용량을 기록합니다. llm.predict 대신 사용합니다.
+    응답의 token_usage를 우선 사용하고, 없으면 토큰 수를 추정합니다.
+
+    Args:
+        llm: LangChain 채팅 모델
+        prompt: 프롬프트
+        section: 사용량 집계용 섹션 이름
+
+    Returns:
+        생성된 텍스트
+    """
+    model = getattr(llm, "model_name", None) or LLM_MODEL
+    token_usage = {}
+    start = time.perf_counter()
+    with span("llm.predict", section=section):
+        if hasattr(llm, "generate"):
+            from langchain_core.messages import HumanMessage
+            result = llm.generate([[HumanMessage(content=prompt)]])
+            text = result.generations[0][0].text
+            llm_output = result.llm_output or {}
+            token_usage = llm_output.get("token_usage") or {}
+            model = llm_output.get("model_name") or model
+        else:
+            text = llm.predict(prompt)
+    latency = time.perf_counter() - start
+
+    prompt_tokens = token_usage.get("prompt_tokens") or count_tokens(prompt)
+    completion_tokens = token_usage.get("completion_tokens") or count_tokens(text)
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+
+    incr("llm_prompt_tokens_total", prompt_tokens, section=section)
+    incr("llm_completion_tokens_total", completion_tokens, section=section)
+    incr("llm_cost_usd_total", cost, section=section)
+    observe("llm_latency_seconds", latency, section=section)
+    budget = SECTION_TOKEN_BUDGETS.get(section)
+    if budget and prompt_tokens + completion_tokens > budget:
+        incr("llm_budget_exceeded_total", section=section)
+
+    try:
+        get_usage_store().record(current_diagnosis_id(), section, model,
+                                 prompt_tokens, completion_tokens, latency, cost)
+    except sqlite3.Error:
+        logger.exception("LLM 사용량 기록 중 오류")
+    return text
+
+
+# 사용량 요약 출력
+if __name__ == "__main__":
+    store = get_usage_store()
+    print("=== 일자별 사용량 ===")
+    for row in store.by_day():
+        print(f"{row['day']}: 호출 {row['calls']}회, 입력 {row['prompt_tokens']} / 출력 {row['completion_tokens']} 토큰, ${row['cost']:.4f}")
+    print("\n=== 섹션별 사용량 ===")
+    for row in store.by_section():
+        print(f"{row['section']}: 호출 {row['calls']}회, 입력 {row['prompt_tokens']} / 출력 {row['completion_tokens']} 토큰, "
+              f"평균 {row['avg_latency']:.2f}초, ${row['cost']:.4f}")
@@ -0,0 +1,287 @@
+# utils/vector_backends.py
+# 역할: 벡터 검색 백엔드 공통 인터페이스와 구현 (NumPy 전수 검색, FAISS Flat/HNSW/IVF, Chroma)
+#
+# 백엔드는 임베딩 행렬(float32, N x D)만 다루고, 문서 텍스트/메타데이터는 VectorStore가 관리합니다.
+#   build(vectors)             색인 생성
+#   search(queries, k)         (거리 행렬, 인덱스 행렬) 반환 - 질의 행렬 한 번에 검색, 결과 없으면 인덱스 -1
+#   save(path) / load(path)    색인 파일 저장/로드 (저장할 것이 없는 백엔드는 아무것도 하지 않음)
+#   memory_bytes()             색인이 차지하는 대략적인 메모리
+import os
+from typing import Dict, Tuple, Type
+
+import numpy as np
+
+from config import VECTOR_HNSW_M, VECTOR_HNSW_EF_SEARCH, VECTOR_IVF_NPROBE
+
+
+class VectorBackend:
+    """
+    벡터 검색 백엔드 기본 클래스 (L2 거리)
+    """
+
+    name = "base"
+
+    def build(self, vectors: np.ndarray):
+        raise NotImplementedError
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+    def save(self, path: str):
+        """색인을 파일로 저장합니다. (기본: 저장하지 않고 임베딩 행렬로 다시 생성)"""
+
+    def load(self, path: str, vectors: np.ndarray) -> bool:
+        """
+        저장된 색인을 로드합니다. 저장된 색인이 없으면 vectors로 새로 만들고 False를 반환합니다.
+        """
+        self.build(vectors)
+        return False
+
+    def memory_bytes(self) -> int:
+        return 0
+
+    def __len__(self):
+        return 0
+
+
+class NumpyBackend(VectorBackend):
+    """
+    NumPy 전수(brute-force) 검색 - 정확한 결과 (벤치마크의 recall 기준)
+    """
+
+    name = "numpy"
+
+    def __init__(self):
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+
+    def build(self, vectors: np.ndarray):
+        self._vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._norms = (self._vectors ** 2).sum(axis=1)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.asarray(queries, dtype=np.float32)
+        k = min(k, len(self._vectors))
+        # ||q - v||^2 = ||q||^2 - 2 q·v + ||v||^2
+        dist = (queries ** 2).sum(axis=1)[:, None] - 2 * queries @ self._vectors.T + self._norms[None, :]
+        idx = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        part = np.take_along_axis(dist, idx, axis=1)
+        order = np.argsort(part, axis=1)
+        return np.take_along_axis(part, order, axis=1), np.take_along_axis(idx, order, axis=1)
+
+    def memory_bytes(self) -> int:
+        return self._vectors.nbytes + self._norms.nbytes
+
+    def __len__(self):
+        return len(self._vectors)
+
+
+class FaissBackend(VectorBackend):
+    """
+    FAISS 색인 공통 구현 (하위 클래스가 _create_index로 색인 종류를 정함)
+    """
+
+    name = "faiss_flat"
+    index_file = "index_flat.faiss"
+
+    def __init__(self):
+        self.index = None
+
+    def _create_index(self, dim: int, n: int):
+        import faiss
+        return faiss.IndexFlatL2(dim)
+
+    def _configure(self):
+        """검색 파라미터 설정 (로드 후에도 적용)"""
+
+    def build(self, vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.index = self._create_index(vectors.shape[1], len(vectors))
+        if not self.index.is_trained:
+            self.index.train(vectors)
+        self.index.add(vectors)
+        self._configure()
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.index.search(np.ascontiguousarray(queries, dtype=np.float32), k)
+
+    def save(self, path: str):
+        import faiss
+        faiss.write_index(self.index, os.path.join(path, self.index_file))
+
+    def load(self, path: str, vectors: np.ndarray) -> bool:
+        import faiss
+        index_path = os.path.join(path, self.index_file)
+        if os.path.exists(index_path):
+            self.index = faiss.read_index(index_path)
+            if self.index.ntotal == len(vectors):
+                self._configure()
+                return True
+        self.build(vectors)
+        return False
+
+    def memory_bytes(self) -> int:
+        import faiss
+        # 직렬화 크기로 메모리 사용량을 근사
+        return int(faiss.serialize_index(self.index).nbytes) if self.index is not None else 0
+
+    def __len__(self):
+        return self.index.ntotal if self.index is not None else 0
+
+
+class FaissHNSWBackend(FaissBackend):
+    """FAISS HNSW 근사 검색 (M, efSearch 설정)"""
+
+    name = "faiss_hnsw"
+    index_file = "index_hnsw.faiss"
+
+    def _create_index(self, dim: int, n: int):
+        import faiss
+        index = faiss.IndexHNSWFlat(dim, VECTOR_HNSW_M)
+        index.hnsw.efConstruction = max(40, VECTOR_HNSW_EF_SEARCH)
+        return index
+
+    def _configure(self):
+        self.index.hnsw.efSearch = VECTOR_HNSW_EF_SEARCH
+
+
+class FaissIVFBackend(FaissBackend):
+    """FAISS IVF 근사 검색 (군집 수는 sqrt(N), nprobe 설정)"""
+
+    name = "faiss_ivf"
+    index_file = "index_ivf.faiss"
+
+    def _create_index(self, dim: int, n: int):
+        import faiss
+        nlist = max(1, int(np.sqrt(n)))
+        return faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+
+    def _configure(self):
+        self.index.nprobe = min(VECTOR_IVF_NPROBE, self.index.nlist)
+
+
+class ChromaBackend(VectorBackend):
+    """
+    Chroma HNSW 검색 (메모리 내 컬렉션)
+    문서 저장/메타데이터 필터/영구 저장이 필요하면 utils.chroma_store.ChromaVectorStore를 사용합니다.
+    """
+
+    name = "chroma"
+
+    def __init__(self):
+        self.collection = None
+        self._count = 0
+
+    def build(self, vectors: np.ndarray):
+        import uuid
+        import chromadb
+        from config import CHROMA_HNSW
+
+        client = chromadb.EphemeralClient(settings=chromadb.Settings(anonymized_telemetry=False))
+        self.collection = client.create_collection(
+            f"backend-{uuid.uuid4().hex}",
+            configuration={"hnsw": dict(CHROMA_HNSW, space="l2")},
+            embedding_function=None
+        )
+        vectors = np.asarray(vectors, dtype=np.float32)
+        batch = 5000
+        for start in range(0, len(vectors), batch):
+            chunk = vectors[start:start + batch]
+            self.collection.add(ids=[str(i) for i in range(start, start + len(chunk))], embeddings=chunk.tolist())
+        self._count = len(vectors)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, self._count)
+        result = self.collection.query(query_embeddings=np.asarray(queries, dtype=np.float32).tolist(),
+                                       n_results=k, include=["distances"])
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (ids, dist) in enumerate(zip(result["ids"], result["distances"])):
+            indices[row, :len(ids)] = [int(i) for i in ids]
+            distances[row, :len(dist)] = dist
+        return distances, indices
+
+    def __len__(self):
+        return self._count
+
+
+BACKENDS: Dict[str, Type[VectorBackend]] = {
+    "numpy": NumpyBackend,
+    "faiss_flat": FaissBackend,
+    "faiss": FaissBackend,
+    "faiss_hnsw": FaissHNSWBackend,
+    "faiss_ivf": FaissIVFBackend,
+    "chroma": ChromaBackend,
+}
+
+
+def create_backend(name: str) -> VectorBackend:
+    """이름으로 백엔드를 생성합니다."""
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 벡터 백엔드: {name} (사용 가능: {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+# 백엔드별 생성 시간, 검색 p95, recall@k(NumPy 전수 검색 기준), 메모리 비교
+#   python -m utils.vector_backends                    (코퍼스 청크, 가짜 임베딩)
+#   python -m utils.vector_backends --synthetic 20000  (군집형 무작위 벡터 2만 개)
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="벡터 백엔드 벤치마크")
+    parser.add_argument("--synthetic", type=int, default=0, help="무작위 벡터 수 (0이면 코퍼스 사용)")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--backends", default="numpy,faiss_flat,faiss_hnsw,faiss_ivf,chroma")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.synthetic:
+        centers = rng.normal(size=(64, args.dim)).astype(np.float32)
+        vectors = centers[rng.integers(0, 64, args.synthetic)] + 0.3 * rng.normal(size=(args.synthetic, args.dim)).astype(np.float32)
+    else:
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        from utils.vector_store import load_corpus_documents
+        from config import DATA_DIR
+        texts = [doc.page_content for doc in load_corpus_documents(DATA_DIR)]
+        vectors = np.array(DeterministicFakeEmbedding(size=args.dim).embed_documents(texts), dtype=np.float32)
+    queries = vectors[rng.integers(0, len(vectors), args.queries)] + 0.05 * rng.normal(size=(args.queries, vectors.shape[1])).astype(np.float32)
+    k = min(args.k, len(vectors))
+    print(f"벡터 {len(vectors)}개 x {vectors.shape[1]}차원, 쿼리 {len(queries)}개, k={k}")
+
+    def rss_mb():
+        # 네이티브 메모리까지 포함한 RSS (Linux)
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+        except (OSError, ValueError):
+            return 0.0
+
+    exact = NumpyBackend()
+    exact.build(vectors)
+    _, truth = exact.search(queries, k)
+
+    for name in args.backends.split(","):
+        backend = create_backend(name)
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        backend.build(vectors)
+        build_time = time.perf_counter() - start
+        rss_delta = rss_mb() - rss_before
+
+        latencies = []
+        found = np.empty((len(queries), k), dtype=np.int64)
+        for i, query in enumerate(queries):
+            start = time.perf_counter()
+            _, idx = backend.search(query[None, :], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found[i] = idx[0]
+        start = time.perf_counter()
+        backend.search(queries, k)
+        batch_time = (time.perf_counter() - start) * 1000
+
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+        print(f"{name:10s} 생성 {build_time * 1000:8.1f}ms | 검색 p95 {np.percentile(latencies, 95):7.3f}ms "
+              f"(일괄 {batch_time:7.1f}ms) | recall@{k} {recall:.3f} | 색인 {backend.memory_bytes() / 1024 / 1024:6.1f}MB, RSS 증가 {rss_delta:6.1f}MB")
@@ -1,114 +1,235 @@
 # utils/vector_store.py
+import logging
 import os
+import json
+import hashlib
+import numpy as np
 import streamlit as st
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
 # 임포트 경로 수정
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.document_loaders import TextLoader
+from langchain_core.documents import Document
 
-from config import OPENAI_API_KEY
+from config import OPENAI_API_KEY, DATA_DIR, VECTOR_STORE_BACKEND, VECTOR_INDEX_DIR
+from utils.metrics import span
+from utils.openai_client import create_embeddings
+from utils.vector_backends import create_backend
+from utils.query_embeddings import QueryEmbeddingCache, QUERY_EMBEDDINGS_FILE
+from utils.prompt_templates import TITLE_MAP, diagnosis_query, fixed_queries
+
+logger = logging.getLogger(__name__)
+
+# 색인 디렉토리 파일
+CHUNKS_FILE = "chunks.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+
+def compute_index_version(vectorstore_path: str, names: Optional[Sequence[str]] = None) -> str:
+    """
+    저장된 인덱스 파일의 이름/크기/수정 시각으로 인덱스 버전을 계산합니다.
+    인덱스가 다시 생성되면 버전이 바뀌어 진단 요청 키와 캐시가 자동으로 분리됩니다.
+    names를 지정하면 해당 파일만 사용합니다. (백엔드 색인 파일 추가로 버전이 바뀌지 않도록)
+    """
+    digest = hashlib.sha256()
+    if os.path.isdir(vectorstore_path):
+        for name in sorted(names or os.listdir(vectorstore_path)):
+            if not os.path.exists(os.path.join(vectorstore_path, name)):
+                continue
+            stat = os.stat(os.path.join(vectorstore_path, name))
+            digest.update(f"{name}:{stat.st_size}:{int(stat.st_mtime)}".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+def load_corpus_documents(data_dir: str) -> List[Document]:
+    """
+    data/content 아래 텍스트 파일과 이북 콘텐츠를 읽어 청크 단위 문서로 분할합니다.
+    모든 벡터 스토어 구현(FAISS, Chroma)이 같은 청크를 사용합니다.
+    """
+    # 텍스트 데이터 파일 목록 가져오기
+    content_dir = os.path.join(data_dir, "content")
+    if not os.path.exists(content_dir):
+        os.makedirs(content_dir, exist_ok=True)
+
+    text_files = []
+    for root, _, files in os.walk(content_dir):
+        for file in files:
+            if file.endswith(".txt"):
+                text_files.append(os.path.join(root, file))
+
+    # 이북 컨텐츠 파일 추가
+    ebook_file = os.path.join(data_dir, "ebook_content.txt")
+    if os.path.exists(ebook_file):
+        text_files.append(ebook_file)
+
+    if not text_files:
+        # 기본 텍스트 파일 생성
+        default_file = os.path.join(content_dir, "default_content.txt")
+        with open(default_file, "w", encoding="utf-8") as f:
+            f.write("""
+            네이버 스마트 플레이스 최적화를 위한 기본 가이드:
+
+            1. 정확한 기본 정보 입력하기
+            2. 매력적인 이미지 사용하기
+            3. 키워드 최적화하기
+            4. 고객 리뷰 관리하기
+            5. 정기적인 업데이트하기
+            """)
+        text_files.append(default_file)
+
+    # 문서 로드 및 분할
+    documents = []
+    for file_path in text_files:
+        try:
+            loader = TextLoader(file_path, encoding="utf-8")
+            documents.extend(loader.load())
+        except Exception:
+            logger.exception(f"파일 로드 오류 ({file_path})")
+
+    # 텍스트 분할 설정
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000, 
+        chunk_overlap=200
+    )
+
+    # 문서 분할
+    split_documents = text_splitter.split_documents(documents)
+    return split_documents
 
 class VectorStore:
     """벡터 스토어 클래스: 텍스트 데이터를 벡터화하고 검색 기능을 제공합니다."""
     
-    def __init__(self):
-        """벡터 스토어 초기화"""
+    def __init__(self, backend: Optional[str] = None, embeddings=None, index_dir: str = VECTOR_INDEX_DIR,
+                 validate_key: bool = False):
+        """
+        벡터 스토어 초기화
+        
+        Args:
+            backend: 검색 백엔드 이름 (None이면 config.VECTOR_STORE_BACKEND)
+            embeddings: 임베딩 객체 (None이면 OpenAI 임베딩)
+            index_dir: 청크/임베딩/색인 저장 디렉토리
+            validate_key: 초기화 시 임베딩 호출로 API 키를 확인할지 여부
+        """
         try:
-            # API 키 확인
-            if "OPENAI_API_KEY" in st.secrets:
-                api_key = st.secrets["OPENAI_API_KEY"]
-            else:
-                api_key = OPENAI_API_KEY
+            if embeddings is None:
+                # API 키 확인
+                if "OPENAI_API_KEY" in st.secrets:
+                    api_key = st.secrets["OPENAI_API_KEY"]
+                else:
+                    api_key = OPENAI_API_KEY
+                    
+                if not api_key:
+                    st.error("OpenAI API 키가 설정되지 않았습니다.")
+                    raise ValueError("API 키가 없습니다")
                 
-            if not api_key:
-                st.error("OpenAI API 키가 설정되지 않았습니다.")
-                raise ValueError("API 키가 없습니다")
-            
-            # 임베딩 초기화
-            self.embeddings = OpenAIEmbeddings(
-                openai_api_key=api_key,
-                model="text-embedding-ada-002"
-            )
+                # 임베딩 초기화
+                embeddings = create_embeddings(api_key, model="text-embedding-ada-002")
+                if validate_key:
+                    try:
+                        embeddings.embed_query("test")
+                    except Exception as e:
+                        st.error(f"OpenAI API 키 유효성 검사 실패: {e}")
+                        raise ValueError("API 키가 유효하지 않습니다")
+            self.embeddings = embeddings
             
             # 데이터 디렉토리 경로 설정
-            self.data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+            self.data_dir = DATA_DIR
+            self.index_dir = index_dir
+            self.backend_name = backend or VECTOR_STORE_BACKEND
+            self.backend = create_backend(self.backend_name)
             
-            # 벡터 스토어 로드 또는 생성
-            vectorstore_path = os.path.join(self.data_dir, "vectorstore")
-            if os.path.exists(vectorstore_path):
-                self.vectorstore = FAISS.load_local(vectorstore_path, self.embeddings)
+            # 저장된 청크/임베딩이 있으면 로드, 없으면 생성
+            if os.path.exists(os.path.join(index_dir, CHUNKS_FILE)):
+                self._load_index()
             else:
-                # 초기 데이터 로드 및 벡터 스토어 생성
                 self._create_vectorstore()
+            
+            # 고정 진단 쿼리 임베딩은 색인과 함께 저장 (새 색인이면 여기서 한 번 계산)
+            self.query_cache = QueryEmbeddingCache(self.embeddings)
+            self.query_cache.load_or_build(os.path.join(index_dir, QUERY_EMBEDDINGS_FILE), fixed_queries())
+            self.index_version = compute_index_version(index_dir, names=(CHUNKS_FILE, EMBEDDINGS_FILE))
         except Exception as e:
             st.error(f"벡터 스토어 초기화 오류: {e}")
             raise
     
     def _create_vectorstore(self):
-        """초기 데이터를 로드하고 벡터 스토어를 생성합니다."""
+        """초기 데이터를 로드하고 임베딩과 검색 색인을 생성합니다."""
         try:
-            # 텍스트 데이터 파일 목록 가져오기
-            content_dir = os.path.join(self.data_dir, "content")
-            if not os.path.exists(content_dir):
-                os.makedirs(content_dir, exist_ok=True)
-                
-            text_files = []
-            for root, _, files in os.walk(content_dir):
-                for file in files:
-                    if file.endswith(".txt"):
-                        text_files.append(os.path.join(root, file))
-            
-            # 이북 컨텐츠 파일 추가
-            ebook_file = os.path.join(self.data_dir, "ebook_content.txt")
-            if os.path.exists(ebook_file):
-                text_files.append(ebook_file)
-            
-            if not text_files:
-                # 기본 텍스트 파일 생성
-                default_file = os.path.join(content_dir, "default_content.txt")
-                with open(default_file, "w", encoding="utf-8") as f:
-                    f.write("""
-                    네이버 스마트 플레이스 최적화를 위한 기본 가이드:
-                    
-                    1. 정확한 기본 정보 입력하기
-                    2. 매력적인 이미지 사용하기
-                    3. 키워드 최적화하기
-                    4. 고객 리뷰 관리하기
-                    5. 정기적인 업데이트하기
-                    """)
-                text_files.append(default_file)
-            
             # 문서 로드 및 분할
-            documents = []
-            for file_path in text_files:
-                try:
-                    loader = TextLoader(file_path, encoding="utf-8")
-                    documents.extend(loader.load())
-                except Exception as e:
-                    st.warning(f"파일 로드 오류 ({file_path}): {e}")
+            split_documents = load_corpus_documents(self.data_dir)
+            if not split_documents:
+                raise ValueError("로드할 수 있는 문서가 없습니다.")
             
-            # 텍스트 분할 설정
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000, 
-                chunk_overlap=200
-            )
+            # 청크 임베딩 (OpenAIEmbeddings가 chunk_size 단위로 묶어 요청)
+            with span("vector_store.embed_documents", n=len(split_documents)):
+                vectors = np.array(
+                    self.embeddings.embed_documents([doc.page_content for doc in split_documents]),
+                    dtype=np.float32
+                )
+            self.documents = split_documents
+            self.vectors = vectors
             
-            # 문서 분할
-            split_documents = text_splitter.split_documents(documents)
+            # 청크/임베딩 저장 (백엔드와 무관하게 재사용)
+            os.makedirs(self.index_dir, exist_ok=True)
+            with open(os.path.join(self.index_dir, CHUNKS_FILE), "w", encoding="utf-8") as f:
+                json.dump([{"text": doc.page_content, "metadata": doc.metadata} for doc in split_documents],
+                          f, ensure_ascii=False)
+            np.save(os.path.join(self.index_dir, EMBEDDINGS_FILE), vectors)
             
-            # 벡터 스토어 생성
-            self.vectorstore = FAISS.from_documents(split_documents, self.embeddings)
-            
-            # 벡터 스토어 저장
-            vectorstore_path = os.path.join(self.data_dir, "vectorstore")
-            self.vectorstore.save_local(vectorstore_path)
+            # 검색 색인 생성 및 저장
+            self.backend.build(vectors)
+            self.backend.save(self.index_dir)
         except Exception as e:
             st.error(f"벡터 스토어 생성 오류: {e}")
             raise
     
+    def _load_index(self):
+        """저장된 청크/임베딩을 읽고 백엔드 색인을 로드합니다. (색인 파일이 없으면 임베딩으로 생성)"""
+        with open(os.path.join(self.index_dir, CHUNKS_FILE), encoding="utf-8") as f:
+            chunks = json.load(f)
+        self.documents = [Document(page_content=c["text"], metadata=c["metadata"]) for c in chunks]
+        self.vectors = np.load(os.path.join(self.index_dir, EMBEDDINGS_FILE))
+        if not self.backend.load(self.index_dir, self.vectors):
+            self.backend.save(self.index_dir)
+    
+    def _search_vectors(self, query_vectors: np.ndarray, k: int) -> List[List[Document]]:
+        """임베딩 행렬로 한 번에 검색하여 질의별 문서 목록을 반환합니다."""
+        with span("vector_store.similarity_search", k=k, backend=self.backend_name, n=len(query_vectors)):
+            _, indices = self.backend.search(query_vectors, k)
+        return [[self.documents[i] for i in row if i >= 0] for row in indices]
+    
+    def similarity_search(self, query: str, k: int = 3) -> List[Document]:
+        """쿼리와 유사한 문서를 검색합니다."""
+        return self.search_many([query], k)[0]
+    
+    def search_many(self, queries: List[str], k: int = 3) -> List[List[Document]]:
+        """
+        여러 쿼리를 한 번의 임베딩 요청과 한 번의 행렬 검색으로 처리합니다.
+        고정 쿼리와 최근 쿼리는 캐시된 임베딩을 사용합니다.
+        
+        Args:
+            queries: 검색 쿼리 목록
+            k: 쿼리별 반환할 결과 수
+            
+        Returns:
+            쿼리 순서대로 유사한 문서 리스트
+        """
+        if not queries:
+            return []
+        return self._search_vectors(self.query_cache.embed(queries), k)
+    
+    def get_relevant_contents(self, queries: List[str], n_results: int = 3) -> List[str]:
+        """
+        여러 쿼리의 관련 콘텐츠를 한 번에 검색합니다. (get_relevant_content의 일괄 버전)
+        
+        Returns:
+            쿼리 순서대로 관련 콘텐츠 문자열
+        """
+        try:
+            return ["\n\n".join([doc.page_content for doc in docs]) for docs in self.search_many(queries, k=n_results)]
+        except Exception as e:
+            st.error(f"콘텐츠 검색 오류: {e}")
+            return ["콘텐츠 검색 중 오류가 발생했습니다."] * len(queries)
+    
     def get_relevant_content(self, query: str, n_results: int = 3) -> str:
         """
         쿼리와 관련된 콘텐츠를 검색합니다.
@@ -122,7 +243,7 @@ class VectorStore:
         """
         try:
             # 벡터 스토어에서 유사한 문서 검색
-            docs = self.vectorstore.similarity_search(query, k=n_results)
+            docs = self.similarity_search(query, k=n_results)
             
             # 검색 결과를 하나의 문자열로 결합
             context = "\n\n".join([doc.page_content for doc in docs])
@@ -144,15 +265,6 @@ class VectorStore:
             관련 콘텐츠를 포함한 문자열
         """
         try:
-            # 약점 영역을 바탕으로 검색 쿼리 생성
-            title_map = {
-                "인식하게 한다": "검색 노출 최적화",
-                "클릭하게 한다": "클릭율 높이는 전략",
-                "머물게 한다": "체류시간 늘리는 방법", 
-                "연락오게 한다": "문의/예약 전환율 높이기",
-                "후속 피드백 받는다": "고객 재방문 유도 전략"
-            }
-            
             # 약점 영역별로 맞춤 쿼리 생성 및 검색
             all_contents = []
             
@@ -160,14 +272,12 @@ class VectorStore:
             if not weak_areas:
                 return "개선 필요 영역이 확인되지 않았습니다."
             
-            for area in weak_areas[:2]:  # 상위 2개 영역에 집중
-                area_term = title_map.get(area, area)
-                # 더 구체적인 쿼리 생성
-                query = f"네이버 스마트 플레이스 {area_term} 최신 전략과 성공 사례"
-                
-                # 벡터 스토어에서 유사한 문서 검색
-                docs = self.vectorstore.similarity_search(query, k=n_results)
-                
+            # 상위 2개 영역에 집중 - 더 구체적인 쿼리 생성
+            area_terms = [TITLE_MAP.get(area, area) for area in weak_areas[:2]]
+            queries = [diagnosis_query(area) for area in weak_areas[:2]]
+            
+            # 벡터 스토어에서 유사한 문서를 한 번에 검색 (고정 쿼리라 임베딩 API 호출 없음)
+            for area_term, docs in zip(area_terms, self.search_many(queries, k=n_results)):
                 # 검색 결과를 리스트에 추가
                 area_content = f"\n## {area_term} 관련 콘텐츠:\n"
                 area_content += "\n\n".join([doc.page_content for doc in docs])
@@ -196,9 +306,20 @@ class VectorStore:
                 return []
                 
             # 벡터 스토어에서 유사한 문서 검색
-            docs = self.vectorstore.similarity_search(query, k=k)
+            docs = self.similarity_search(query, k=k)
             return docs
         except Exception as e:
             st.error(f"문서 검색 오류: {e}")
             # 오류 발생 시 빈 리스트 반환
-            return [] 
\ No newline at end of file
+            return []
+
+def create_vector_store(validate_key: bool = False):
+    """
+    설정(VECTOR_STORE_BACKEND)에 맞는 벡터 스토어를 생성합니다.
+    "chroma"는 db/chroma.sqlite3에 영구 저장하는 ChromaVectorStore, 그 외에는 해당 백엔드를 쓰는 VectorStore입니다.
+    두 구현 모두 get_relevant_content/get_relevant_content_for_diagnosis/raw_similarity_search를 제공합니다.
+    """
+    if VECTOR_STORE_BACKEND == "chroma":
+        from utils.chroma_store import ChromaVectorStore
+        return ChromaVectorStore()
+    return VectorStore(validate_key=validate_key)